@@ -27,10 +27,11 @@ import config
 if config.DRM_UPLOAD:
     from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - BLE Scanner v%s" % __version__)
@@ -152,8 +153,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -237,7 +238,7 @@ while True:
         if config.HTTP_UPLOAD:
             try:
                 json = {"variable":config.HTTP_VARIABLE1,"value":label,"unit":config.HTTP_UNIT1}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , label," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
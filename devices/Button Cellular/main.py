@@ -48,10 +48,11 @@ import qwiic_button
 import qwiic_i2c
 from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - Button v%s" % __version__)
@@ -69,8 +70,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -100,7 +101,7 @@ except Exception as e:
 drm_fail = mqtt_fail = http_fail = 0
 
 # first sample immediately
-t1 = t3 = time.ticks_add(time.ticks_ms(), int(config.UPLOAD_RATE * -1000))
+t1 = time.ticks_add(time.ticks_ms(), int(config.UPLOAD_RATE * -1000))
 last_press = -1
 # main loop
 while True:
@@ -115,7 +116,7 @@ while True:
         if config.HTTP_UPLOAD:
             try:
                 json = {"variable":config.HTTP_VARIABLE,"value":button_press,"unit":config.HTTP_UNIT}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , button_press," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
@@ -149,9 +150,7 @@ while True:
                 drm_fail  += 1
                 status_led.blink(2, 0.2)
     if config.MQTT_UPLOAD:
-        if time.ticks_diff(t2, t3) >= 60 * 1000: # ping mqtt every 60 seconds
-            t3 = time.ticks_ms()
-            client.ping() # send a ping to the mqtt server
+        client.poll() # keepalive pings and reconnects
     button.check(5000) # check for shutdown button
     time.sleep_ms(20)
     if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
@@ -30,10 +30,11 @@ import qwiic_i2c
 if config.DRM_UPLOAD:
     from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 __version__ = "1.3.1"
 print(" Digi Sensor Lab - Button for Relay v%s" % __version__)
@@ -174,8 +175,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -206,7 +207,7 @@ relay_ctrl = RelayControl(bt, rm)
 drm_fail = mqtt_fail = http_fail = 0
 
 # start timer for relay checks
-t1 = t3 = time.ticks_add(time.ticks_ms(), int(config.RELAY_CHECK_RATE * - 1000))
+t1 = time.ticks_add(time.ticks_ms(), int(config.RELAY_CHECK_RATE * - 1000))
 relay_state = False # state is unknown at this point
 button_click = False
 
@@ -254,7 +255,7 @@ while True:
         if config.HTTP_UPLOAD:
             try:
                 json = {"variable":config.HTTP_VARIABLE,"value":int(button_click),"unit":config.HTTP_UNIT}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , int(button_click)," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
@@ -302,9 +303,7 @@ while True:
                 status_led.blink(2, 0.2) 
         print(' waiting for clicks...')
     if config.MQTT_UPLOAD:
-        if time.ticks_diff(t2, t3) >= 60 * 1000: # ping mqtt every 60 seconds
-            t3 = time.ticks_ms()
-            client.ping() # send a ping to the mqtt server
+        client.poll() # keepalive pings and reconnects
     button.check(5000) # check for shutdown button
     time.sleep_ms(20)
     if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
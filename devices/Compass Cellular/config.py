@@ -5,10 +5,17 @@ __version__ = "1.3.0"
 from digi import cloud
 
 UPLOAD_RATE = 2 # upload frequency in seconds
+UPLOAD_BATCH = 1 # readings coalesced into each upload
 MAX_COMMS_FAIL = 15 # number of consecutive communications failures before reset
 INPUT_BUTTON = "D0" # button to shut down cellular component when long-pressed
 STATUS_LED = "D4" # LED output pin for status messages
 
+# hard iron offsets (gauss) and soft iron matrix for the compass, from
+# compass.fit_calibration() over samples taken while turning the board in
+# every direction. the defaults apply no correction.
+HARD_IRON = (0.0, 0.0, 0.0)
+SOFT_IRON = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+
 MQTT_UPLOAD = True
 if MQTT_UPLOAD:
     MQTT_TOPIC = "compass"
@@ -5,6 +5,7 @@ __version__ = "1.3.0"
 from digi import cloud
 
 UPLOAD_RATE = 2 # upload frequency in seconds
+UPLOAD_BATCH = 1 # readings coalesced into each upload
 MAX_COMMS_FAIL = 15 # number of consecutive communications failures before reset
 INPUT_BUTTON = "D0" # button to shut down cellular component when long-pressed
 STATUS_LED = "D4" # LED output pin for status messages
@@ -25,10 +25,11 @@ import uio
 if config.DRM_UPLOAD:
     from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - GNSS v%s" % __version__)
@@ -56,8 +57,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        keepalive=300, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=300, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     mqtt_connect(client)
 
 #create watchdog timer
@@ -90,6 +91,7 @@ def location_cb(location):
         print(lat, long, 1)
         send(lat, long, 1)
         upload_rate = config.UPLOAD_RATE * 2
+        runtime.reschedule(acquire_task, upload_rate * 1000)
     else:
         print(' GNSS received')
         print(location["latitude"], location["longitude"], 0)
@@ -99,6 +101,7 @@ def location_cb(location):
         latlongFile.write(str(location["latitude"]) + ',' + str(location["longitude"]))
         latlongFile.close()
         upload_rate = config.UPLOAD_RATE
+        runtime.reschedule(acquire_task, upload_rate * 1000)
 
 # sending procedure functionalized for clarity
 def send(value1, value2, value3):
@@ -110,7 +113,7 @@ def send(value1, value2, value3):
                 #         {"variable":config.HTTP_VARIABLE3,"value":value3,"unit":config.HTTP_UNIT3},
                 #         {"variable":config.HTTP_VARIABLE4,"value":"(" + value1 + "," + value2 + ")","unit":config.HTTP_UNIT4}]
                 json = [{"variable":"location","value":value3,"location":{"lat":float(value1),"lng":float(value2)}}]
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , value1, value2, value3," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
@@ -125,15 +128,12 @@ def send(value1, value2, value3):
                 response.close()
         if config.MQTT_UPLOAD:
             try:
-                mqtt_connect(client)
                 client.publish(config.MQTT_TOPIC1, str(value1))
                 client.publish(config.MQTT_TOPIC2, str(value2))
                 client.publish(config.MQTT_TOPIC3, str(value3))
                 client.publish(config.MQTT_TOPIC4, "(" + value1 + "," + value2 + ")")
                 print(" mqtt -> ", value1, value2, value3)
                 mqtt_fail = 0
-            except OSError as e:
-                print("OSError", e)
             except Exception as e:
                 print(e)
                 mqtt_fail += 1
@@ -160,24 +160,24 @@ def send(value1, value2, value3):
                 status_led.blink(2, 0.2)
 
 
-# first sample immediately
-t1 = t3 = time.ticks_add(time.ticks_ms(), int(upload_rate * -1000))
-# main loop
-while True:
-    t2 = time.ticks_ms()
-    if time.ticks_diff(t2, t1) >= upload_rate * 1000: # time for a sample
-        t1 = time.ticks_ms()
-        try:
-            print(" requesting GNSS...")
-            gnss.single_acquisition(location_cb, 50)
-        except Exception as e:
-            print(e)
-    if config.MQTT_UPLOAD:
-        if time.ticks_diff(t2, t3) >= 60 * 1000: # ping mqtt every 60 seconds
-            t3 = time.ticks_ms()
-            client.ping() # send a ping to the mqtt server
-    button.check(5000) # check for shutdown button
+# request a fix; the location callback sends the result
+def acquire():
+    global t1
+    t1 = time.ticks_ms()
+    try:
+        print(" requesting GNSS...")
+        gnss.single_acquisition(location_cb, 50)
+    except Exception as e:
+        print(e)
     if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
         print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
         module.reset()
-    dog.feed() # update watchdog timer
+
+# schedule tasks and run
+runtime = sensorlab.Runtime()
+acquire_task = runtime.every(upload_rate * 1000, acquire) # first sample immediately
+if config.MQTT_UPLOAD:
+    runtime.every(1000, client.poll) # keepalive pings and reconnects
+runtime.add_button(button, 5000) # check for shutdown button
+runtime.add_watchdog(dog) # update watchdog timer
+runtime.run()
@@ -20,14 +20,11 @@ import sensorlab
 import time
 import config
 import machine
+from array import array
 import qwiic_max3010x
-if config.DRM_UPLOAD:
-    from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
-if config.HTTP_UPLOAD:
-    import urequests
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - Heart Rate v%s" % __version__)
@@ -40,7 +37,7 @@ class HeartRate():
     for rate in range(RATE_SIZE): # initialize with reasonable defaults
         rates[rate]=60
     rateSpot = 0
-    lastBeat = 0 # Time at which the last beat occurred
+    lastBeat = 0 # Sample at which the last beat occurred
     beatsPerMinute = 0.00
     beatAvg = 0
     samplesTaken = 0 # Counter for calculating the Hz or read rate
@@ -49,21 +46,39 @@ class HeartRate():
         self.heart_sensor = heart_sensor
         self.startTime = self.millis() # Used to calculate measurement rate
         self.finalBeat = 0
+        self.block = array('l', [0] * 32) # IR samples handed to the beat detector
 
     def millis(self):
         return time.ticks_ms()
 
     def measure_bpm(self):
+        sensor = self.heart_sensor
+        # beats are timed by counting samples, which leave the FIFO at the
+        # sample rate divided by the averaging
+        period = 1000.0 * sensor.sampleAverage / sensor.sampleRate
+        block = self.block
         beats = 0
         while True:
 
-            irValue = self.heart_sensor.getIR()
-            self.samplesTaken += 1
-            if self.heart_sensor.checkForBeat(irValue) == True:
+            # take everything read from the FIFO so far, as one block
+            count = 0
+            while sensor.available() and count < len(block):
+                sensor.nextSample()
+                block[count] = sensor.getFIFOIR()
+                count += 1
+            if count == 0:
+                if sensor.check() == 0: # nothing until the FIFO is almost full
+                    time.sleep_ms(10)
+                continue
+            irValue = block[count - 1]
+            previousSamples = self.samplesTaken
+            self.samplesTaken += count
+
+            for beat in sensor.processBlock(block, count):
                 # We sensed a beat!
                 beats += 1
-                delta = ( self.millis() - self.lastBeat )
-                self.lastBeat = self.millis()	
+                delta = ( beat - self.lastBeat ) * period
+                self.lastBeat = beat
                 if beats > 2:
                     print('BEAT ', end='')
 
@@ -84,7 +99,7 @@ class HeartRate():
                         self.beatAvg = round(self.beatAvg)
             
             Hz = round(float(self.samplesTaken) / ( ( self.millis() - self.startTime ) / 1000.0 ) , 2)
-            if (self.samplesTaken % 250 ) == 0:
+            if self.samplesTaken // 250 != previousSamples // 250:
                 return (self.beatAvg, self.beatsPerMinute, irValue, Hz)
 
 
@@ -101,8 +116,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -134,69 +149,44 @@ except Exception as e:
 
 heart_sensor.setPulseAmplitudeRed(0) # Turn Red LED off
 heart_sensor.setPulseAmplitudeGreen(0x80) # Turn on Green LED medium
+heart_sensor.enableInterruptMode(almostFull=24) # drain the FIFO 24 samples at a time
 
 # intialize heart rate calculation
 heartrate = HeartRate(heart_sensor)
 
-# initialize comms failure count
-drm_fail = mqtt_fail = http_fail = 0
-
-# first sample immediately
-t1 = time.ticks_add(time.ticks_ms(), int(config.UPLOAD_RATE * -1000))
-# main loop
-while True:
-    t2 = time.ticks_ms()
-    if time.ticks_diff(t2, t1) >= config.UPLOAD_RATE * 1000: # time for a sample
-        t1 = time.ticks_ms()
-        try:
-            readings = heartrate.measure_bpm()
-            print ('readings: beat avg: {bavg}  beat rate: {brate}  IR value: {ir}  ' \
-                    'Hz: {hertz}'.format(bavg = readings[0], brate = readings[1], ir = readings[2], hertz = readings[3]))
-            bpm = readings[0]
-            ir = readings[2]
-            if ir < 90000: # values are typically over 100,000 when a finger is placed
-                    bpm = -1
-        except Exception as e:
-            print(e)
-            status_led.blink(4, 1.5)
-        if config.HTTP_UPLOAD:
-            try:
-                json = {"variable":config.HTTP_VARIABLE,"value":bpm,"unit":config.HTTP_UNIT}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
-                print(" http -> " , bpm," (" + str(response.status_code), response.reason.decode(), 
-                      "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
-                if 200 <= response.status_code <= 299:
-                    http_fail = 0
-                else:
-                    http_fail +=1
-            except Exception as e:
-                print(e)
-                http_fail += 1
-                status_led.blink(2, 0.2)
-            finally:
-                response.close()
-        if config.MQTT_UPLOAD:
-            try:
-                client.publish(config.MQTT_TOPIC, str(bpm))
-                print(" mqtt -> ", bpm)
-                mqtt_fail = 0
-            except Exception as e:
-                print(e)
-                mqtt_fail += 1
-                status_led.blink(2, 0.2)
-        if config.DRM_UPLOAD:
-            try:
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM,bpm)
-                data.send(timeout=10)
-                print(" drm -> ", bpm)
-                drm_fail = 0
-            except Exception as e:
-                print(e)
-                drm_fail += 1
-                status_led.blink(2, 0.2)
-    button.check(5000) # check for shutdown button
-    if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
-        print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
+# create uploader with a sink for each enabled upload path, logging to flash while offline
+uploader = sensorlab.Uploader(status_led, max_count=config.UPLOAD_BATCH)
+if config.HTTP_UPLOAD:
+    uploader.add_sink(sensorlab.HTTPSink(config.HTTP_URL, config.HTTP_HEADERS, ((config.HTTP_VARIABLE, config.HTTP_UNIT),)), sensorlab.RecordLog("http"))
+if config.MQTT_UPLOAD:
+    uploader.add_sink(sensorlab.MQTTSink(client, (config.MQTT_TOPIC,)), sensorlab.RecordLog("mqtt"))
+if config.DRM_UPLOAD:
+    uploader.add_sink(sensorlab.DRMSink(config.DRM_TRANSPORT, (config.STREAM,)), sensorlab.RecordLog("drm"))
+
+# sample and upload, scheduled by the runtime
+def sample():
+    try:
+        readings = heartrate.measure_bpm()
+        print ('readings: beat avg: {bavg}  beat rate: {brate}  IR value: {ir}  ' \
+                'Hz: {hertz}'.format(bavg = readings[0], brate = readings[1], ir = readings[2], hertz = readings[3]))
+        bpm = readings[0]
+        ir = readings[2]
+        if ir < 90000: # values are typically over 100,000 when a finger is placed
+                bpm = -1
+    except Exception as e:
+        print(e)
+        status_led.blink(4, 1.5)
+        return # nothing to upload
+    uploader.send(bpm)
+    if uploader.failures() >= config.MAX_COMMS_FAIL:
+        print (" " + uploader.report())
         module.reset()
-    dog.feed() # update watchdog timer
+
+# schedule tasks and run
+runtime = sensorlab.Runtime()
+runtime.every(config.UPLOAD_RATE * 1000, sample) # first sample immediately
+if config.MQTT_UPLOAD:
+    runtime.every(1000, client.poll) # keepalive pings and reconnects
+runtime.add_button(button, 5000) # check for shutdown button
+runtime.add_watchdog(dog) # update watchdog timer
+runtime.run()
@@ -5,13 +5,15 @@ __version__ = "1.3.0"
 from digi import cloud
 
 UPLOAD_RATE = 2 # upload frequency in seconds
+UPLOAD_BATCH = 1 # readings coalesced into each upload
 MAX_COMMS_FAIL = 15 # number of consecutive communications failures before reset
 INPUT_BUTTON = "D0" # button to shut down cellular component when long-pressed
 STATUS_LED = "D4" # LED output pin for status messages
 
 MQTT_UPLOAD = True
 if MQTT_UPLOAD:
-    MQTT_TOPIC1 = "imu"  # concatonate all variables into a single string
+    MQTT_TOPIC1 = "imu"  # feature vector of each window as a single string, see imu_features.FEATURES
+    # the per axis topics carry each axis' rms over the window
     MQTT_TOPIC2 = "ax"
     MQTT_TOPIC3 = "ay"
     MQTT_TOPIC4 = "az"
@@ -28,7 +30,7 @@ if HTTP_UPLOAD:
     import secrets
     HTTP_URL = "http://api.tago.io/data"
     HTTP_HEADERS = {"Device-Token": secrets.HTTP_TOKEN}
-    HTTP_VARIABLE = "imu" # concatonate all variables into a single string
+    HTTP_VARIABLE = "imu" # feature vector of each window as a single string
     HTTP_UNIT = ""
 
 DRM_UPLOAD = False
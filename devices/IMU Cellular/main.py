@@ -21,13 +21,10 @@ import time
 import config
 import machine
 import qwiic_lsm6dso
-if config.DRM_UPLOAD:
-    from digi import cloud
+import imu_features
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
-if config.HTTP_UPLOAD:
-    import urequests
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - IMU v%s" % __version__)
@@ -45,8 +42,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -63,87 +60,53 @@ dog = machine.WDT(timeout=90000, response=machine.HARD_RESET)
 try:
     lsm = qwiic_lsm6dso.QwiicLSM6DSO()
     lsm.begin()
+    # stream 104 Hz accel and gyro through the FIFO, read every ~50 samples
+    lsm.set_accel_data_rate(lsm.ODR_104Hz)
+    lsm.set_gyro_data_rate(lsm.ODR_104Hz)
+    lsm.begin_fifo(watermark=150) # 50 batches of timestamp, gyro and accel words
 except Exception as e:
     print(e)
     status_led.blink(20, 1.5)
     module.reset()
 
-# initialize comms failure count
-drm_fail = mqtt_fail = http_fail = 0
+# create uploader with a sink for each enabled upload path, logging to flash while offline.
+# a window's feature string and rms values come to up to about 450 bytes of json, more
+# than the default 256 byte log record
+RECORD_SIZE = 512
+uploader = sensorlab.Uploader(status_led, max_count=config.UPLOAD_BATCH)
+if config.HTTP_UPLOAD:
+    uploader.add_sink(sensorlab.HTTPSink(config.HTTP_URL, config.HTTP_HEADERS, ((config.HTTP_VARIABLE, config.HTTP_UNIT), None, None, None, None, None, None)), sensorlab.RecordLog("http", record_size=RECORD_SIZE))
+if config.MQTT_UPLOAD:
+    uploader.add_sink(sensorlab.MQTTSink(client, (config.MQTT_TOPIC1, config.MQTT_TOPIC2, config.MQTT_TOPIC3, config.MQTT_TOPIC4, config.MQTT_TOPIC5, config.MQTT_TOPIC6, config.MQTT_TOPIC7)), sensorlab.RecordLog("mqtt", record_size=RECORD_SIZE))
+if config.DRM_UPLOAD:
+    uploader.add_sink(sensorlab.DRMSink(config.DRM_TRANSPORT, (None, config.STREAM1, config.STREAM2, config.STREAM3, config.STREAM4, config.STREAM5, config.STREAM6)), sensorlab.RecordLog("drm", record_size=RECORD_SIZE))
 
-# first sample immediately
-t1 = time.ticks_add(time.ticks_ms(), int(config.UPLOAD_RATE * -1000))
-# main loop
-while True:
-    t2 = time.ticks_ms()
-    if time.ticks_diff(t2, t1) >= config.UPLOAD_RATE * 1000: # time for a sample
-        t1 = time.ticks_ms()
-        try:
-            ax, ay, az, gx, gy, gz = lsm.read_float_accel_gyro_all()
-            readings = str(ax),str(ay),str(az),str(gx),str(gy),str(gz)
-            readings =  ",".join(readings)
-        except Exception as e:
-            print(e)
-            status_led.blink(4, 1.5)
-        if config.HTTP_UPLOAD:
-            try:
-                json = {"variable":config.HTTP_VARIABLE,"value":readings,"unit":config.HTTP_UNIT}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
-                print(" http -> " , readings," (" + str(response.status_code), response.reason.decode(), 
-                      "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
-                if 200 <= response.status_code <= 299:
-                    http_fail = 0
-                else:
-                    http_fail +=1
-            except Exception as e:
-                print(e)
-                http_fail += 1
-                status_led.blink(2, 0.2)
-            finally:
-                response.close()
-        if config.MQTT_UPLOAD:
-            try:
-                client.publish(config.MQTT_TOPIC1, str(readings))
-                client.publish(config.MQTT_TOPIC2, str(ax))
-                client.publish(config.MQTT_TOPIC3, str(ay))
-                client.publish(config.MQTT_TOPIC4, str(az))
-                client.publish(config.MQTT_TOPIC5, str(gx))
-                client.publish(config.MQTT_TOPIC6, str(gy))
-                client.publish(config.MQTT_TOPIC7, str(gz))
-                print(" mqtt -> ", readings)
-                mqtt_fail = 0
-            except Exception as e:
-                print(e)
-                mqtt_fail += 1
-                status_led.blink(2, 0.2)
-        if config.DRM_UPLOAD:
-            try:
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM1,ax)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM2,ay)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM3,az)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM4,gx)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM5,gy)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM6,gz)
-                data.send(timeout=10)
-                print(" drm -> ", ax, ay, az, gx, gy, gz)
-                drm_fail = 0
-            except Exception as e:
-                print(e)
-                drm_fail += 1
-                status_led.blink(2, 0.2)
-    button.check(5000) # check for shutdown button
-    if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
-        print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
+# fold the FIFO into motion features once it reaches the watermark, and
+# upload a feature vector for every window of UPLOAD_RATE seconds
+extractor = imu_features.WindowFeatures(104, config.UPLOAD_RATE * 104)
+def drain():
+    try:
+        if not (lsm.get_fifo_status()[1] & lsm.FIFO_WTM_IA):
+            return
+        lsm.read_fifo()
+        windows = extractor.add_fifo(lsm)
+    except Exception as e:
+        print(e)
+        status_led.blink(4, 1.5)
+        return # nothing to upload
+    for features in windows:
+        readings = ",".join(["%.4g" % value for value in features])
+        # the per axis topics get each axis' rms
+        uploader.send(readings, *features[1:24:4])
+    if uploader.failures() >= config.MAX_COMMS_FAIL:
+        print (" " + uploader.report())
         module.reset()
-    dog.feed() # update watchdog timer
+
+# schedule tasks and run
+runtime = sensorlab.Runtime()
+runtime.every(250, drain) # the watermark is reached about every 480 ms
+if config.MQTT_UPLOAD:
+    runtime.every(1000, client.poll) # keepalive pings and reconnects
+runtime.add_button(button, 5000) # check for shutdown button
+runtime.add_watchdog(dog) # update watchdog timer
+runtime.run()
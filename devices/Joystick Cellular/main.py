@@ -21,13 +21,9 @@ import time
 import config
 import machine
 import qwiic_joystick
-if config.DRM_UPLOAD:
-    from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
-if config.HTTP_UPLOAD:
-    import urequests
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - Joystick v%s" % __version__)
@@ -45,8 +41,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
@@ -70,71 +66,35 @@ except Exception as e:
     status_led.blink(20, 1.5)
     module.reset()
 
-# initialize comms failure count
-drm_fail = mqtt_fail = http_fail = 0
+# create uploader with a sink for each enabled upload path, logging to flash while offline
+uploader = sensorlab.Uploader(status_led, max_count=config.UPLOAD_BATCH)
+if config.HTTP_UPLOAD:
+    uploader.add_sink(sensorlab.HTTPSink(config.HTTP_URL, config.HTTP_HEADERS, ((config.HTTP_VARIABLE1, config.HTTP_UNIT1), (config.HTTP_VARIABLE2, config.HTTP_UNIT2), (config.HTTP_VARIABLE3, config.HTTP_UNIT3))), sensorlab.RecordLog("http"))
+if config.MQTT_UPLOAD:
+    uploader.add_sink(sensorlab.MQTTSink(client, (config.MQTT_TOPIC1, config.MQTT_TOPIC2, config.MQTT_TOPIC3)), sensorlab.RecordLog("mqtt"))
+if config.DRM_UPLOAD:
+    uploader.add_sink(sensorlab.DRMSink(config.DRM_TRANSPORT, (config.STREAM1, config.STREAM2, config.STREAM3)), sensorlab.RecordLog("drm"))
 
-# first sample immediately
-t1 = time.ticks_add(time.ticks_ms(), int(config.UPLOAD_RATE * -1000))
-# main loop
-while True:
-    t2 = time.ticks_ms()
-    if time.ticks_diff(t2, t1) >= config.UPLOAD_RATE * 1000: # time for a sample
-        t1 = time.ticks_ms()
-        try:
-            xaxis = js.horizontal
-            yaxis = js.vertical
-            button_press = int(not js.button) # swap 0 and 1 responses
-        except Exception as e:
-            print(e)
-            status_led.blink(4, 1.5)
-        if config.HTTP_UPLOAD:
-            try:
-                json = [{"variable":config.HTTP_VARIABLE1,"value":xaxis,"unit":config.HTTP_UNIT},
-                        {"variable":config.HTTP_VARIABLE2,"value":yaxis,"unit":config.HTTP_UNIT},
-                        {"variable":config.HTTP_VARIABLE3,"value":button_press,"unit":config.HTTP_UNIT}]
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
-                print(" http -> " , xaxis,yaxis,button_press," (" + str(response.status_code), response.reason.decode(), 
-                      "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
-                if 200 <= response.status_code <= 299:
-                    http_fail = 0
-                else:
-                    http_fail +=1
-            except Exception as e:
-                print(e)
-                http_fail += 1
-                status_led.blink(2, 0.2)
-            finally:
-                response.close()
-        if config.MQTT_UPLOAD:
-            try:
-                client.publish(config.MQTT_TOPIC1, str(xaxis))
-                client.publish(config.MQTT_TOPIC2, str(yaxis))
-                client.publish(config.MQTT_TOPIC3, str(button_press))
-                print(" mqtt -> ", xaxis,yaxis,button_press)
-                mqtt_fail = 0
-            except Exception as e:
-                print(e)
-                mqtt_fail += 1
-                status_led.blink(2, 0.2)
-        if config.DRM_UPLOAD:
-            try: 
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM1,xaxis)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM2,yaxis)
-                data.send(timeout=10)
-                data = cloud.DataPoints(config.DRM_TRANSPORT)
-                data.add(config.STREAM3,button_press)
-                data.send(timeout=10)
-                print(" drm -> ", xaxis, yaxis, button_press)
-                drm_fail = 0
-            except Exception as e:
-                print(e)
-                drm_fail += 1
-                status_led.blink(2, 0.2)
-    button.check(5000) # check for shutdown button
-    if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
-        print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
+# sample and upload, scheduled by the runtime
+def sample():
+    try:
+        xaxis = js.horizontal
+        yaxis = js.vertical
+        button_press = int(not js.button) # swap 0 and 1 responses
+    except Exception as e:
+        print(e)
+        status_led.blink(4, 1.5)
+        return # nothing to upload
+    uploader.send(xaxis, yaxis, button_press)
+    if uploader.failures() >= config.MAX_COMMS_FAIL:
+        print (" " + uploader.report())
         module.reset()
-    dog.feed() # update watchdog timer
+
+# schedule tasks and run
+runtime = sensorlab.Runtime()
+runtime.every(config.UPLOAD_RATE * 1000, sample) # first sample immediately
+if config.MQTT_UPLOAD:
+    runtime.every(1000, client.poll) # keepalive pings and reconnects
+runtime.add_button(button, 5000) # check for shutdown button
+runtime.add_watchdog(dog) # update watchdog timer
+runtime.run()
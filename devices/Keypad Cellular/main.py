@@ -25,10 +25,11 @@ import qwiic_i2c
 if config.DRM_UPLOAD:
     from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 __version__ = "1.3.0"
 print(" Digi Sensor Lab - Keypad v%s" % __version__)
@@ -56,8 +57,8 @@ status_led.off()
 
 # create mqtt client and connect to server
 if config.MQTT_UPLOAD:
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     mqtt_connect(client)
 
 #create watchdog timer
@@ -82,7 +83,7 @@ def send(value):
     if config.HTTP_UPLOAD:
         try:
             json = {"variable":config.HTTP_VARIABLE,"value":value,"unit":config.HTTP_UNIT}
-            response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+            response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
             print(" http -> " , value," (" + str(response.status_code), response.reason.decode(), 
                     "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
             if 200 <= response.status_code <= 299:
@@ -120,7 +121,7 @@ def send(value):
 presses = ""
 cnt = 0
 active = False
-t1 = t3 = time.ticks_ms() - (86400 * 1000)  # first upload immediately
+t1 = time.ticks_ms() - (86400 * 1000)  # first upload immediately
 print(" waiting for key presses...")
 while True:
     try:
@@ -155,9 +156,7 @@ while True:
         t1 = time.ticks_ms()
         send(-1) # send a negative one
     if config.MQTT_UPLOAD:
-        if time.ticks_diff(t2, t3) >= 60 * 1000: # ping mqtt every 60 seconds
-            t3 = time.ticks_ms()
-            client.ping() # send a ping to the mqtt server
+        client.poll() # keepalive pings and reconnects
     button.check(5000) # check for shutdown button
     if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
         print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
@@ -30,10 +30,11 @@ import uio
 if config.DRM_UPLOAD:
     from digi import cloud
 if config.MQTT_UPLOAD:
-    from umqtt.simple import MQTTClient
+    from umqtt.robust import RobustMQTTClient
     import secrets
 if config.HTTP_UPLOAD:
     import urequests
+    session = urequests.Session() # connection is kept open between posts
 
 # there is currently a 93-character limit in the datastream upload module,
 #  therefore an authenticated API call via HTTP can be selected in the config file
@@ -45,17 +46,17 @@ __version__ = "1.3.0"
 print(" Digi Sensor Lab - SMS Text Display v%s" % __version__)
 
 def mqtt_connect():
-    client = MQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+    client = RobustMQTTClient(config.MQTT_CLIENT_ID+module.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
+                        keepalive=120, user=secrets.MQTT_USER, password=secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL, queue_size=0)
     print(" connecting to '%s'... " % config.MQTT_SERVER, end="")
     try:
         client.connect()
         print(" connected")
-        return client
     except Exception as e:
         print(e)
         status_led.blink(10, 0.5)
-        print(" mqtt connection failed")
+        print(" mqtt connection failed") # client.poll() keeps retrying
+    return client
 
 # defines a function for uploading data when using HTTP API calls
 if config.USE_HTTP:
@@ -122,7 +123,7 @@ if config.HTTP_UPLOAD:
     try:
         json = [{"variable":config.HTTP_VARIABLE1,"value":message,"unit":config.HTTP_UNIT},
                 {"variable":config.HTTP_VARIABLE3,"value":ph,"unit":config.HTTP_UNIT}]
-        response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+        response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
         print(" http -> " , message, ph," (" + str(response.status_code), response.reason.decode(), 
                 "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
         if 200 <= response.status_code <= 299:
@@ -163,7 +164,7 @@ if config.DRM_UPLOAD:
 
 print('waiting for messages...')
 # main loop
-t1 = t3 = time.ticks_ms()
+t1 = time.ticks_ms()
 recent_messages = False
 while True:
     t2 = time.ticks_ms() # mark the current time
@@ -190,7 +191,7 @@ while True:
             try:
                 json = [{"variable":config.HTTP_VARIABLE1,"value":message,"unit":config.HTTP_UNIT},
                         {"variable":config.HTTP_VARIABLE2,"value":sender,"unit":config.HTTP_UNIT}]
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , message, sender," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
@@ -265,7 +266,7 @@ while True:
         if config.HTTP_UPLOAD:
             try:
                 json = {"variable":config.HTTP_VARIABLE1,"value":message,"unit":config.HTTP_UNIT}
-                response = urequests.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
+                response = session.post(config.HTTP_URL, headers=config.HTTP_HEADERS, json=json, request_1_1=True)
                 print(" http -> " , message," (" + str(response.status_code), response.reason.decode(), 
                       "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
                 if 200 <= response.status_code <= 299:
@@ -292,9 +293,7 @@ while True:
             data.add(config.STREAM1,message)
             data.send(timeout=10)
     if config.MQTT_UPLOAD:
-        if time.ticks_diff(t2, t3) >= 60 * 1000: # ping mqtt every 60 seconds
-            t3 = time.ticks_ms()
-            client.ping() # send a ping to the mqtt server
+        client.poll() # keepalive pings and reconnects
     button.check(5000) # check for shutdown button
     if max(drm_fail,mqtt_fail,http_fail) >= config.MAX_COMMS_FAIL:
         print (" drm_fails {drm}, mqtt_fails {mqtt}, http_fails {http}".format(drm=drm_fail, mqtt=mqtt_fail, http=http_fail, ))
@@ -6,6 +6,7 @@ from digi import cloud
 
 
 UPLOAD_RATE = 2 # upload frequency in seconds
+UPLOAD_BATCH = 1 # readings coalesced into each upload
 ZERO_OFFSET = 67120  # initial calibration, hold D0 button on boot to update
 CALIBRATION_FACTOR = 250 # initial calibration, hold D0 button on boot to update
 CALIBRATION_FILE = 'calibration.txt'
@@ -0,0 +1,163 @@
+'''
+ Copyright 2023, Digi International Inc.
+
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+'''
+
+# windowed motion features for accelerometer / gyroscope streams, such as the
+# qwiic_lsm6dso FIFO. every sample is folded into running sums as it arrives,
+# so memory doesn't grow with the window. plain python, so the same code runs
+# on the xbee and on a pc.
+
+import math
+
+# names of the values in a feature vector, in order
+AXES = ("ax", "ay", "az", "gx", "gy", "gz")
+FEATURES = tuple(axis + "_" + f for axis in AXES for f in ("mean", "rms", "p2p", "hz")) + \
+    ("tilt_roll", "tilt_pitch", "roll", "pitch")
+
+class WindowFeatures:
+    # per axis mean, rms (about the mean), peak to peak and dominant frequency
+    # over each window of accelerometer samples (g) and gyroscope samples
+    # (dps), plus tilt from the window's mean acceleration and a
+    # complementary filter orientation, in degrees.
+    #
+    # the dominant frequency is estimated from zero crossings around the
+    # previous window's mean, with a hysteresis band (g and dps) so noise on a
+    # still sensor doesn't count. alpha is the complementary filter's weight
+    # on the integrated gyroscope.
+    def __init__(self, sample_rate, window, alpha=0.98, hysteresis=(0.02, 2.0)):
+        self.dt = 1.0 / sample_rate
+        self.window = window
+        self.alpha = alpha
+        self.bands = (hysteresis[0],) * 3 + (hysteresis[1],) * 3
+        self.roll = None # complementary filter, set from the first accel sample
+        self.pitch = 0.0
+        self.ref = [None] * 6 # per axis reference level, from the first sample, then each window's mean
+        self.signs = [0] * 6 # which side of the reference each axis was last on
+        self.reset()
+
+    def reset(self):
+        # start a new window, keeping the filter and reference levels
+        self.counts = [0, 0] # accel, gyro samples in the window
+        self.sums = [0.0] * 6 # of samples less the reference, which keeps the float32 sums precise
+        self.squares = [0.0] * 6
+        self.mins = [0.0] * 6
+        self.maxs = [0.0] * 6
+        self.crossings = [0] * 6
+
+    def _add(self, first, x, y, z, count):
+        ref = self.ref
+        if ref[first] is None:
+            ref[first:first + 3] = [x, y, z]
+        sums = self.sums
+        squares = self.squares
+        mins = self.mins
+        maxs = self.maxs
+        signs = self.signs
+        for i, v in ((first, x), (first + 1, y), (first + 2, z)):
+            d = v - ref[i]
+            sums[i] += d
+            squares[i] += d * d
+            if count == 0 or v < mins[i]:
+                mins[i] = v
+            if count == 0 or v > maxs[i]:
+                maxs[i] = v
+            band = self.bands[i]
+            if d > band:
+                if signs[i] < 0:
+                    self.crossings[i] += 1
+                signs[i] = 1
+            elif d < -band:
+                if signs[i] > 0:
+                    self.crossings[i] += 1
+                signs[i] = -1
+
+    def add_gyro(self, x, y, z):
+        # integrate roll and pitch rates between accelerometer corrections
+        self._add(3, x, y, z, self.counts[1])
+        self.counts[1] += 1
+        if self.roll is not None:
+            self.roll += x * self.dt
+            self.pitch += y * self.dt
+
+    def add_accel(self, x, y, z):
+        # returns the feature vector when this sample completes the window
+        self._add(0, x, y, z, self.counts[0])
+        self.counts[0] += 1
+        roll = math.degrees(math.atan2(y, z))
+        pitch = math.degrees(math.atan2(-x, math.sqrt(y * y + z * z)))
+        if self.roll is None:
+            self.roll = roll
+            self.pitch = pitch
+        else:
+            self.roll = self.alpha * self.roll + (1 - self.alpha) * roll
+            self.pitch = self.alpha * self.pitch + (1 - self.alpha) * pitch
+        if self.counts[0] >= self.window:
+            features = self.features()
+            # the next window's crossings are counted around this one's means
+            for i in range(6):
+                if self.counts[i // 3]:
+                    self.ref[i] = features[4 * i]
+            self.reset()
+            return features
+        return None
+
+    def add_fifo(self, imu):
+        # feeds the samples of the last qwiic_lsm6dso read_fifo(), gyro first
+        # as the sensor batches them. returns the feature vectors of the
+        # windows completed, usually none or one.
+        g = imu.gyro_raw_to_dps
+        gx = imu.fifo_gyro_x
+        gy = imu.fifo_gyro_y
+        gz = imu.fifo_gyro_z
+        a = imu.accel_raw_to_g
+        ax = imu.fifo_accel_x
+        ay = imu.fifo_accel_y
+        az = imu.fifo_accel_z
+        done = []
+        gyros = imu.fifo_gyro_count
+        j = 0
+        for i in range(imu.fifo_accel_count):
+            if j < gyros:
+                self.add_gyro(gx[j] * g, gy[j] * g, gz[j] * g)
+                j += 1
+            features = self.add_accel(ax[i] * a, ay[i] * a, az[i] * a)
+            if features is not None:
+                done.append(features)
+        while j < gyros:
+            self.add_gyro(gx[j] * g, gy[j] * g, gz[j] * g)
+            j += 1
+        return done
+
+    def features(self):
+        # the feature vector of the samples so far, in FEATURES order
+        values = []
+        means = [0.0] * 6
+        for i in range(6):
+            n = self.counts[i // 3]
+            if n == 0:
+                values += (0.0, 0.0, 0.0, 0.0)
+                continue
+            offset = self.sums[i] / n
+            mean = self.ref[i] + offset
+            rms = math.sqrt(max(self.squares[i] / n - offset * offset, 0.0))
+            hz = self.crossings[i] / (2 * n * self.dt)
+            values += (mean, rms, self.maxs[i] - self.mins[i], hz)
+            means[i] = mean
+        x, y, z = means[0:3]
+        values.append(math.degrees(math.atan2(y, z)))
+        values.append(math.degrees(math.atan2(-x, math.sqrt(y * y + z * z))))
+        values.append(self.roll or 0.0)
+        values.append(self.pitch)
+        return tuple(values)
@@ -181,6 +181,14 @@ class QwiicBme280(object):
 
         self.t_fine=0
 
+        # calibration constants as tuples, unpacked into locals by read_all()
+        self._cal_t = None
+        self._cal_p = None
+        self._cal_h = None
+
+        # buffer for the pressure, temperature and humidity registers
+        self._data = bytearray(8)
+
         self._referencePressure = 101325.0
 
     # ----------------------------------
@@ -265,6 +273,11 @@ class QwiicBme280(object):
         self.calibration["dig_H5"] = unsigned_short_to_signed_short((self._i2c.readByte(self.address, self.BME280_DIG_H5_MSB_REG) << 4) + ((self._i2c.readByte(self.address, self.BME280_DIG_H4_LSB_REG) >> 4) & 0x0F))
         self.calibration["dig_H6"] = unsigned_char_to_signed_char(self._i2c.readByte(self.address, self.BME280_DIG_H6_REG))
 
+        cal = self.calibration
+        self._cal_t = (cal["dig_T1"], cal["dig_T2"], cal["dig_T3"])
+        self._cal_p = tuple(cal["dig_P%d" % i] for i in range(1, 10))
+        self._cal_h = tuple(cal["dig_H%d" % i] for i in range(1, 7))
+
         # Most of the time the sensor will be init with default values
         # But in case user has old/deprecated code, use the _settings.x values
 
@@ -699,6 +712,81 @@ class QwiicBme280(object):
 
     temperature_fahrenheit = property(get_temperature_fahrenheit)
 
+    # ****************************************************************************#
+    #
+    #   All measurements
+    #
+    # ****************************************************************************#
+
+    def add_to_plan( self, plan ):
+        """
+        Adds the data registers to a qwiic_i2c.ReadPlan, so they are read
+        along with the other devices' registers. Pass the plan's view of them
+        to read_all() after each run.
+
+        :param plan: The read plan
+        :return: Handle of the read in the plan
+        :rtype: int
+        """
+        return plan.add(self.address, self.BME280_PRESSURE_MSB_REG, len(self._data))
+
+    def read_all( self, data=None ):
+        """
+        Returns temperature, pressure and humidity from one burst read of
+        the data registers, so all three come from the same measurement.
+        t_fine is computed once and updated, as by get_temperature_celsius().
+
+        :param data: The data registers from a ReadPlan run, see
+            add_to_plan(). Defaults to None, which reads the sensor
+
+        :return: Temperature in DegC, pressure in Pa and humidity in %RH
+        :rtype: tuple(float, float, float)
+        """
+        data_buffer = data
+        if data_buffer is None:
+            data_buffer = self._data
+            self._i2c.readBlockInto(self.address, self.BME280_PRESSURE_MSB_REG, data_buffer)
+        adc_P = (data_buffer[0] << 12) | (data_buffer[1] << 4) | (data_buffer[2] >> 4)
+        adc_T = (data_buffer[3] << 12) | (data_buffer[4] << 4) | (data_buffer[5] >> 4)
+        adc_H = (data_buffer[6] << 8) | data_buffer[7]
+
+        # Temperature, by datasheet
+        T1, T2, T3 = self._cal_t
+        var1 = (((adc_T >> 3) - (T1 << 1)) * T2) >> 11
+        var2 = (adc_T >> 4) - T1
+        var2 = (((var2 * var2) >> 12) * T3) >> 14
+        t_fine = var1 + var2
+        self.t_fine = t_fine
+        temperature = ((t_fine * 5 + 128) >> 8) / 100 + _settings["tempCorrection"]
+
+        # Pressure
+        P1, P2, P3, P4, P5, P6, P7, P8, P9 = self._cal_p
+        var1 = t_fine - 128000
+        var2 = var1 * var1 * P6
+        var2 = var2 + ((var1 * P5) << 17) + (P4 << 35)
+        var1 = ((var1 * var1 * P3) >> 8) + ((var1 * P2) << 12)
+        var1 = ((1 << 47) + var1) * P1 >> 33
+        if var1 == 0:
+            pressure = 0  #  avoid exception caused by division by zero
+        else:
+            p_acc = 1048576 - adc_P
+            p_acc = (((p_acc << 31) - var2) * 3125) // var1
+            var1 = (P9 * (p_acc >> 13) * (p_acc >> 13)) >> 25
+            var2 = (P8 * p_acc) >> 19
+            pressure = (((p_acc + var1 + var2) >> 8) + (P7 << 4)) / 256.0
+
+        # Humidity
+        H1, H2, H3, H4, H5, H6 = self._cal_h
+        var1 = t_fine - 76800
+        var1 = ((((adc_H << 14) - (H4 << 20) - (H5 * var1)) + 16384) >> 15) * \
+            (((((((var1 * H6) >> 10) * (((var1 * H3) >> 11) + 32768)) >> 10) + 2097152) * H2 + 8192) >> 14)
+        var1 = var1 - (((((var1 >> 15) * (var1 >> 15)) >> 7) * H1) >> 4)
+        var1 = 0 if var1 < 0 else var1
+        var1 = 419430400 if var1 > 419430400 else var1
+        humidity = (var1 >> 12) / 1024.0
+
+        return temperature, pressure, humidity
+
     # ****************************************************************************#
     #
     #   Dew point Section
@@ -174,7 +174,14 @@ class QwiicCAP1203(object):
         else:
             self._i2c = i2c_driver
 
-        # TODO: Initialize any variables used by this driver
+        # The configuration registers only change when we write them, so
+        # keep a copy of them. Touch polling clears the interrupt on every
+        # touch, which is then a single write. The INT bit of the main
+        # control register is set by the device.
+        self._regs = qwiic_i2c.RegisterCache(self._i2c, self.address)
+        self._regs.cacheable(self.SENSITIVITY_CONTROL, self.INTERRUPT_ENABLE,
+                             self.POWER_BUTTON, self.POWER_BUTTON_CONFIG)
+        self._regs.volatile(self.MAIN_CONTROL, 0x01)
 
     def is_connected(self):
         """
@@ -229,9 +236,7 @@ class QwiicCAP1203(object):
         This bit must be cleared in order to detec a new capacitive
         touch input. See datasheet on Main Control Register (pg. 22).
         """
-        reg = self._i2c.readByte(self.address, self.MAIN_CONTROL)
-        reg &= 0xFE
-        self._i2c.writeByte(self.address, self.MAIN_CONTROL, reg)
+        self._regs.update(self.MAIN_CONTROL, 0xFE, 0x00)
 
     def set_interrupt_disabled(self):
         """
@@ -239,18 +244,18 @@ class QwiicCAP1203(object):
         when a sensor is touched. Set on default in begin function See data 
         sheet on Interrupt Enable Register (pg. 33).
         """
-        reg = self._i2c.readByte(self.address, self.INTERRUPT_ENABLE)
+        reg = self._regs.read(self.INTERRUPT_ENABLE)
         reg &= 0xF8
-        self._i2c.writeByte(self.address, self.INTERRUPT_ENABLE, reg)
+        self._regs.write(self.INTERRUPT_ENABLE, reg)
 
     def set_interrupt_enabled(self):
         """
         This turns on all the interrupts, so the alert LED turns on when any 
         sensor is touched. See data sheet on Interrupt Enable Register (pg. 33).
         """
-        reg = self._i2c.readByte(self.address, self.INTERRUPT_ENABLE)
+        reg = self._regs.read(self.INTERRUPT_ENABLE)
         reg |= 0x07
-        self._i2c.writeByte(self.address, self.INTERRUPT_ENABLE, reg)
+        self._regs.write(self.INTERRUPT_ENABLE, reg)
 
     def is_interrupt_enabled(self):
         """
@@ -259,7 +264,7 @@ class QwiicCAP1203(object):
         LED on the CAP1203 Touch Slider Board turns on when it detects a touch 
         (pg. 33).
         """
-        reg = self._i2c.readByte(self.address, self.INTERRUPT_ENABLE)
+        reg = self._regs.read(self.INTERRUPT_ENABLE)
         if (reg & 0x07) == 0x07:
             return True
         return False
@@ -273,21 +278,21 @@ class QwiicCAP1203(object):
         :param sensitivity: Sensitivity multiplier
         :type sensitivity: int
         """
-        reg = self._i2c.readByte(self.address, self.SENSITIVITY_CONTROL)
+        reg = self._regs.read(self.SENSITIVITY_CONTROL)
         reg &= 0x8F
         if sensitivity >= self.SENSITIVITY_128X and sensitivity <= self.SENSITIVITY_1X:
             reg |= sensitivity << 4
         else:
             # Default case: calibrated for CAP1203 touch sensor
             reg |= self.SENSITIVITY_2X << 4
-        self._i2c.writeByte(self.address, self.SENSITIVITY_CONTROL, reg)
+        self._regs.write(self.SENSITIVITY_CONTROL, reg)
 
     def get_sensitivity(self):
         """
         Returns the sensitivity multiplier for current sensitivity settings
         (pg. 25).
         """
-        reg = self._i2c.readByte(self.address, self.SENSITIVITY_CONTROL)
+        reg = self._regs.read(self.SENSITIVITY_CONTROL)
         sensitivity = (reg >> 4) & 0x07
         if sensitivity == self.SENSITIVITY_128X:
             return 128
@@ -467,7 +472,7 @@ class QwiicCAP1203(object):
         :return: `True` if successful, otherwise `False`
         :rtype: bool
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON)
+        reg = self._regs.read(self.POWER_BUTTON)
         reg &= 0xF8
 
         # Set pad to act as power button (pg. 43)
@@ -480,7 +485,7 @@ class QwiicCAP1203(object):
         else:
             # User input invalid pad number
             return False
-        self._i2c.writeByte(self.address, self.POWER_BUTTON, reg)
+        self._regs.write(self.POWER_BUTTON, reg)
         return True
 
     def get_power_button_pad(self):
@@ -495,7 +500,7 @@ class QwiicCAP1203(object):
             0x01        2
             0x02        3
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON)
+        reg = self._regs.read(self.POWER_BUTTON)
 
         return (reg & 0x07) + 1
 
@@ -513,14 +518,14 @@ class QwiicCAP1203(object):
         :return: `True` if successful, otherwise `False`
         :rtype: bool
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON_CONFIG)
+        reg = self._regs.read(self.POWER_BUTTON_CONFIG)
         reg &= 0xFC
         if input_time >= self.PWR_TIME_280_MS and input_time <= self.PWR_TIME_2240_MS:
             reg |= input_time & 0x03
         else:
             # User input invalid time
             return False
-        self._i2c.writeByte(self.address, self.POWER_BUTTON_CONFIG, reg)
+        self._regs.write(self.POWER_BUTTON_CONFIG, reg)
         return True
 
     def get_power_button_time(self):
@@ -535,7 +540,7 @@ class QwiicCAP1203(object):
             0x02        1120 MS
             0x03        2240 MS
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON_CONFIG)
+        reg = self._regs.read(self.POWER_BUTTON_CONFIG)
         if (reg & 0x03) == self.PWR_TIME_280_MS:
             return 280
         elif (reg & 0x03) == self.PWR_TIME_560_MS:
@@ -552,18 +557,18 @@ class QwiicCAP1203(object):
         Enables power button in active state. See data sheet on Power Button
         Configuration Register (pg. 43-44)
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON_CONFIG)
+        reg = self._regs.read(self.POWER_BUTTON_CONFIG)
         reg |= 0x04
-        self._i2c.writeByte(self.address, self.POWER_BUTTON_CONFIG, reg)
+        self._regs.write(self.POWER_BUTTON_CONFIG, reg)
 
     def set_power_button_disabled(self):
         """
         Disables power button in active state. See data sheet on Power Button
         Configuration Register (pg. 43-44)
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON_CONFIG)
+        reg = self._regs.read(self.POWER_BUTTON_CONFIG)
         reg &= 0xFB
-        self._i2c.writeByte(self.address, self.POWER_BUTTON_CONFIG, reg)
+        self._regs.write(self.POWER_BUTTON_CONFIG, reg)
 
     def is_power_button_enabled(self):
         """
@@ -571,7 +576,7 @@ class QwiicCAP1203(object):
         0x01), otherwise returns false. Power button must be ENABLED to use.
         See data sheet on Power Button Configuration Register (pg. 43-44).
         """
-        reg = self._i2c.readByte(self.address, self.POWER_BUTTON_CONFIG)
+        reg = self._regs.read(self.POWER_BUTTON_CONFIG)
         if reg & 0x04 == 0x04:
             # Power button enabled
             return True
@@ -45,6 +45,10 @@ This package is part of the python package for SparkFun qwiic ecosystem.
 
 New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.sparkfun.com/qwiic).
 
+Only the platform module for the running system is loaded, the first time a
+driver is asked for. Set the QWIIC_I2C_PLATFORM environment variable to
+"linux", "circuitpy" or "micropython" to pick one explicitly.
+
 :example:
 
 	>>> import qwiic_i2c
@@ -65,6 +69,30 @@ New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.s
 # Drivers and driver baseclass
 from .i2c_driver import I2CDriver
 
+# The helpers below are loaded the first time one is created, so an
+# application only pays the import (and, on MicroPython, the heap) for the
+# ones it uses.
+
+# Batched register reads across devices
+def ReadPlan(*args, **argk):
+	from .read_plan import ReadPlan
+	return ReadPlan(*args, **argk)
+
+# Awaitable driver calls for asyncio applications. Only useful on CPython.
+def AsyncI2C(*args, **argk):
+	from .async_i2c import AsyncI2C
+	return AsyncI2C(*args, **argk)
+
+# Shadow copies of device configuration registers
+def RegisterCache(*args, **argk):
+	from .register_cache import RegisterCache
+	return RegisterCache(*args, **argk)
+
+# Cached map of the devices on the bus
+def BusCensus(*args, **argk):
+	from .bus_census import BusCensus
+	return BusCensus(*args, **argk)
+
 # All supported platform module and class names
 _supported_platforms = {
 	"linux_i2c": "LinuxI2C",
@@ -72,19 +100,81 @@ _supported_platforms = {
 	"micropython_i2c": "MicroPythonI2C"
 }
 
-# List of platform drivers found on this system
-_drivers = []
+# Platform modules are only imported when a driver is first asked for, and
+# then only the one for this system. The driver class found is kept here.
+_platform_driver = None
+
+_default_driver = None
+
+#-------------------------------------------------
+# Returns the platform module most likely to match this system and whether
+# it was forced: from the QWIIC_I2C_PLATFORM environment variable if set
+# ("linux", "circuitpy", "micropython" or the module name), otherwise
+# guessed from sys.implementation.
+def _platformHint():
+	try:
+		import os
+		hint = os.getenv("QWIIC_I2C_PLATFORM")
+	except:
+		hint = None		# MicroPython has no environment
+
+	if hint:
+		hint = hint.lower()
+		return (hint if hint.endswith("_i2c") else hint + "_i2c"), True
+
+	import sys
+	try:
+		name = sys.implementation.name
+	except:
+		name = ""
+
+	if name == "circuitpython":
+		return "circuitpy_i2c", False
+	elif name == "micropython":
+		return "micropython_i2c", False
+	return "linux_i2c", False
 
-# Loop through all supported platform drivers, see if they're included, and
-# append them to the driver list if so
-for module_name, class_name in _supported_platforms.items():
+def _loadDriverClass(module_name):
 	try:
 		sub_module = __import__("qwiic_i2c." + module_name, None, None, [None])
-		_drivers.append(getattr(sub_module, class_name))
+		return getattr(sub_module, _supported_platforms[module_name])
 	except:
-		pass
+		return None
 
-_default_driver = None
+#-------------------------------------------------
+# Finds (once) the driver class for the execution platform. 
+#
+# The hinted module is tried first. An explicit QWIIC_I2C_PLATFORM is used
+# as is, and is an error if it names no platform or its module won't load;
+# a guess must pass the class's isPlatform() check, and if it doesn't the
+# other modules are tried in turn.
+def _getDriverClass():
+	global _platform_driver
+	if _platform_driver != None:
+		return _platform_driver
+
+	hint, forced = _platformHint()
+
+	if forced and hint not in _supported_platforms:
+		raise ValueError("QWIIC_I2C_PLATFORM: unknown platform %s, expected one of %s" % \
+				(hint[:-4], ", ".join(name[:-4] for name in _supported_platforms)))
+
+	driverClass = _loadDriverClass(hint) if hint in _supported_platforms else None
+	if forced and driverClass == None:
+		raise ImportError("QWIIC_I2C_PLATFORM: unable to load the %s driver" % hint[:-4])
+	if driverClass != None and (forced or driverClass.isPlatform()):
+		_platform_driver = driverClass
+		return driverClass
+
+	for module_name in _supported_platforms:
+		if module_name == hint:
+			continue
+		driverClass = _loadDriverClass(module_name)
+		if driverClass != None and driverClass.isPlatform():
+			_platform_driver = driverClass
+			return driverClass
+
+	return None
 
 #-------------------------------------------------
 # Exported method to get the I2C driver for the execution plaform. 
@@ -111,18 +201,18 @@ def getI2CDriver(*args, **argk):
 	if len(argk) == 0 and _default_driver != None:
 		return _default_driver
 	
-	# Loop through all the drivers to find the one for this platform
-	for driverClass in _drivers:
-		if driverClass.isPlatform():
-			# Found it!
-			driver = driverClass(*args, **argk)
-
-			# If no parameters are provided, set this as the default driver
-			if len(argk) == 0:
-				_default_driver = driver
-			
-			# And return it
-			return driver
+	# Find the driver for this platform
+	driverClass = _getDriverClass()
+	if driverClass != None:
+		# Found it!
+		driver = driverClass(*args, **argk)
+
+		# If no parameters are provided, set this as the default driver
+		if len(argk) == 0:
+			_default_driver = driver
+		
+		# And return it
+		return driver
 	
 	# If we get here, we didn't find a driver for this platform
 	return None
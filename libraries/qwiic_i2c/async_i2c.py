@@ -0,0 +1,152 @@
+#-----------------------------------------------------------------------------
+# async_i2c.py
+#
+# asyncio front end for a qwiic I2C driver.
+#
+# I2C calls block until the transaction is done. This wraps a driver so an
+# asyncio application can await them instead; each call runs on an executor
+# thread and the driver's bus lock keeps transactions from interleaving with
+# any other thread using the bus.
+#
+# Needs a full asyncio (CPython); MicroPython's uasyncio has no executors.
+#
+#-----------------------------------------------------------------------------
+
+"""
+async_i2c
+=========
+Awaitable versions of the qwiic I2C driver calls.
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> bus = qwiic_i2c.AsyncI2C()
+	>>> data = await bus.read_block(0x77, 0xF7, 8)
+	>>> await bus.write_byte(0x77, 0xF4, 0x27)
+"""
+
+class AsyncI2C(object):
+	"""
+	AsyncI2C
+
+		Runs the calls of a qwiic I2C driver on an executor so they can be
+		awaited.
+
+		:param i2c_driver: The qwiic I2C driver to wrap. Defaults to the
+			platform's default driver.
+		:param executor: A concurrent.futures executor to run the calls on.
+			Defaults to one worker thread of its own - the bus can only do one
+			thing at a time, so more threads just wait on the lock.
+
+		:return: The AsyncI2C object.
+		:rtype: Object
+	"""
+
+	def __init__(self, i2c_driver=None, executor=None):
+		if i2c_driver == None:
+			from . import getI2CDriver
+			i2c_driver = getI2CDriver()
+		self.i2c = i2c_driver
+		self._executor = executor
+		self._own_executor = False
+
+	def _run(self, func, *args):
+		import asyncio
+		if self._executor == None:
+			from concurrent.futures import ThreadPoolExecutor
+			self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qwiic_i2c")
+			self._own_executor = True
+		return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+	def run(self, func, *args):
+		"""
+			Awaitable call of any blocking function on the bus executor, e.g. a
+			device driver method that does several transactions.
+
+			:param func: The function to call
+			:param args: Its arguments
+
+			:return: An awaitable for the function's result
+		"""
+		return self._run(func, *args)
+
+	def close(self):
+		"""
+			Shuts down the executor if this object created it.
+		"""
+		if self._own_executor:
+			self._executor.shutdown()
+			self._executor = None
+			self._own_executor = False
+
+	#-------------------------------------------------------------------------
+	# read Data Command
+
+	async def readWord(self, address, commandCode):
+		return await self._run(self.i2c.readWord, address, commandCode)
+
+	async def read_word(self, address, commandCode):
+		return await self.readWord(address, commandCode)
+
+	async def readByte(self, address, commandCode = None):
+		return await self._run(self.i2c.readByte, address, commandCode)
+
+	async def read_byte(self, address, commandCode = None):
+		return await self.readByte(address, commandCode)
+
+	async def readBlock(self, address, commandCode, nBytes):
+		return await self._run(self.i2c.readBlock, address, commandCode, nBytes)
+
+	async def read_block(self, address, commandCode, nBytes):
+		return await self.readBlock(address, commandCode, nBytes)
+
+	async def readBlockInto(self, address, commandCode, buf, offset=0, nBytes=None):
+		return await self._run(self.i2c.readBlockInto, address, commandCode, buf, offset, nBytes)
+
+	async def read_block_into(self, address, commandCode, buf, offset=0, nBytes=None):
+		return await self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
+	async def readBlocks(self, reads, buf):
+		return await self._run(self.i2c.readBlocks, reads, buf)
+
+	async def read_blocks(self, reads, buf):
+		return await self.readBlocks(reads, buf)
+
+	#-------------------------------------------------------------------------
+	# write Data Commands
+
+	async def writeCommand(self, address, commandCode):
+		return await self._run(self.i2c.writeCommand, address, commandCode)
+
+	async def write_command(self, address, commandCode):
+		return await self.writeCommand(address, commandCode)
+
+	async def writeWord(self, address, commandCode, value):
+		return await self._run(self.i2c.writeWord, address, commandCode, value)
+
+	async def write_word(self, address, commandCode, value):
+		return await self.writeWord(address, commandCode, value)
+
+	async def writeByte(self, address, commandCode, value):
+		return await self._run(self.i2c.writeByte, address, commandCode, value)
+
+	async def write_byte(self, address, commandCode, value):
+		return await self.writeByte(address, commandCode, value)
+
+	async def writeBlock(self, address, commandCode, value):
+		return await self._run(self.i2c.writeBlock, address, commandCode, value)
+
+	async def write_block(self, address, commandCode, value):
+		return await self.writeBlock(address, commandCode, value)
+
+	async def isDeviceConnected(self, devAddress):
+		return await self._run(self.i2c.isDeviceConnected, devAddress)
+
+	async def is_device_connected(self, devAddress):
+		return await self.isDeviceConnected(devAddress)
+
+	async def ping(self, devAddress):
+		return await self.isDeviceConnected(devAddress)
+
+	async def scan(self):
+		return await self._run(self.i2c.scan)
@@ -0,0 +1,164 @@
+#-----------------------------------------------------------------------------
+# bus_census.py
+#
+# One scan of the bus, shared by everything that asks whether a device is
+# there.
+#
+# Every qwiic driver checks is_connected() in its constructor or begin(),
+# and each check is a probe of the bus (with retries on some platforms).
+# With a census attached to the I2C driver those checks are answered from a
+# single scan. An address is probed again only after an error on it, an
+# explicit invalidate() or, optionally, once the scan is max_age seconds old.
+#
+#-----------------------------------------------------------------------------
+
+"""
+bus_census
+==========
+Cached map of the devices on an I2C bus.
+
+Give the census the qwiic driver classes the application uses and it also
+maps each address found to the classes that can live there (from their
+available_addresses).
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> from qwiic_bme280 import QwiicBme280
+	>>> census = qwiic_i2c.BusCensus(drivers=[QwiicBme280])
+	>>> census.devices()
+	{119: [<class 'qwiic_bme280.QwiicBme280'>]}
+	>>> qwiic_i2c.isDeviceConnected(0x77)	# no bus traffic
+	True
+"""
+
+import time
+
+class BusCensus(object):
+	"""
+	BusCensus
+
+		Scans the bus once and answers isDeviceConnected() for the I2C
+		driver from the result.
+
+		:param i2c_driver: The qwiic I2C driver to take the census of.
+			Defaults to the platform's default driver.
+		:param drivers: qwiic driver classes to map addresses to
+		:param max_age: Seconds after which the scan is repeated. None (the
+			default) keeps it until invalidated.
+
+		:return: The BusCensus object.
+		:rtype: Object
+	"""
+
+	def __init__(self, i2c_driver=None, drivers=(), max_age=None):
+		if i2c_driver == None:
+			from . import getI2CDriver
+			i2c_driver = getI2CDriver()
+		self._i2c = i2c_driver
+		self.max_age = max_age
+
+		self._classes = {}		# address -> driver classes that can use it
+		self._present = None	# address -> True/False/None (probe again), None before the scan
+		self._scanned = 0
+
+		self.add(*drivers)
+
+		# From now on the driver asks us
+		i2c_driver.census = self
+
+	def add(self, *drivers):
+		"""
+			Adds qwiic driver classes to the address map.
+
+			:param drivers: Classes with an available_addresses list
+		"""
+		for driver in drivers:
+			for address in driver.available_addresses:
+				classes = self._classes.setdefault(address, [])
+				if driver not in classes:
+					classes.append(driver)
+
+	def scan(self):
+		"""
+			Scans the bus, replacing what the census knew.
+
+			:return: The addresses found
+			:rtype: list
+		"""
+		found = self._i2c.scan() or []
+		self._present = dict((address, True) for address in found)
+		self._scanned = time.time()
+		return found
+
+	def _current(self):
+		if self._present == None or \
+				(self.max_age != None and time.time() - self._scanned > self.max_age):
+			self.scan()
+		return self._present
+
+	def isConnected(self, address):
+		"""
+			Whether a device answers at address. Answered from the scan; an
+			address that was invalidated is probed on its own.
+
+			:param address: The I2C address
+
+			:rtype: bool
+		"""
+		present = self._current()
+		connected = present.get(address, False)
+		if connected == None:
+			connected = self._i2c._probe(address)
+			present[address] = connected
+		return connected
+
+	def is_connected(self, address):
+		return self.isConnected(address)
+
+	def invalidate(self, address=None):
+		"""
+			Forgets what the census knows about one address, so it is probed
+			again on the next check, or about the whole bus, so it is scanned
+			again.
+
+			:param address: The I2C address, or None for all
+		"""
+		if address == None:
+			self._present = None
+		elif self._present != None:
+			self._present[address] = None
+
+	def addresses(self):
+		"""
+			The addresses that answered.
+
+			:rtype: list
+		"""
+		return sorted(address for address in list(self._current()) if self.isConnected(address))
+
+	def devices(self):
+		"""
+			The addresses that answered and the known driver classes for
+			each. Addresses no added driver uses are mapped to an empty list.
+
+			:rtype: dict
+		"""
+		return dict((address, self._classes.get(address, [])) for address in self.addresses())
+
+	def find(self, driver):
+		"""
+			The addresses a driver class's devices answered at.
+
+			:param driver: A qwiic driver class
+
+			:rtype: list
+		"""
+		return [address for address in self.addresses() if driver in self._classes.get(address, ())]
+
+	def detach(self):
+		"""
+			Stops answering for the I2C driver, which probes the bus again.
+		"""
+		if self._i2c.census is self:
+			self._i2c.census = None
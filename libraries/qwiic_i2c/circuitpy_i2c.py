@@ -114,6 +114,9 @@ class CircuitPythonI2C(I2CDriver):
 
 		self._i2cbus = _connectToI2CBus(sda=self._sda, scl=self._scl, freq=self._freq)
 
+		# register byte for readBlockInto(), reused for every call
+		self._reg = bytearray(1)
+
 	# Okay, are we running on a circuit py system?
 	@classmethod
 	def isPlatform(cls):
@@ -215,6 +218,27 @@ class CircuitPythonI2C(I2CDriver):
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	#----------------------------------------------------------
+	def readBlockInto(self, address, commandCode, buf, offset=0, nBytes=None):
+		if nBytes == None:
+			nBytes = len(buf) - offset
+
+		if not self._i2cbus.try_lock():
+			raise Exception("Unable to lock I2C bus")
+
+		self._reg[0] = commandCode
+
+		try:
+			self._i2cbus.writeto_then_readfrom(address, self._reg, buf, in_start=offset, in_end=offset + nBytes)
+		except Exception as e:
+			self._i2cbus.unlock()
+			raise e
+		else:
+			self._i2cbus.unlock()
+
+	def read_block_into(self, address, commandCode, buf, offset=0, nBytes=None):
+		return self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
 	#
@@ -291,6 +315,11 @@ class CircuitPythonI2C(I2CDriver):
 		return self.writeBlock(address, commandCode, value)
 
 	def isDeviceConnected(self, devAddress):
+		if self.census != None:
+			return self.census.isConnected(devAddress)
+		return self._probe(devAddress)
+
+	def _probe(self, devAddress):
 		if not self._i2cbus.try_lock():
 			raise Exception("Unable to lock I2C bus")
 		
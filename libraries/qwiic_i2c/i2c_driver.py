@@ -78,6 +78,9 @@ class I2CDriver(object):
 	# stubs
 	name = 'qwiic I2C abstract base class'
 
+	# A BusCensus answering isDeviceConnected() for this driver, if any
+	census = None
+
 	def __init__(self, *args, **argk):
 		pass
 
@@ -109,7 +112,8 @@ class I2CDriver(object):
 	#-------------------------------------------------------------------------	
 	# stubs to support Python with statements. 
 	#
-	# Helpful for I2C interactions that require a mutex.
+	# Helpful for I2C interactions that require a mutex. Platforms with
+	# threads (Linux) override these to hold the bus lock.
 
 	def __enter__(self):
 		return self
@@ -200,6 +204,69 @@ class I2CDriver(object):
 
 		"""
 		return None
+
+	def readBlockInto(self, address, commandCode, buf, offset=0, nBytes=None):
+		""" 
+			Called to read a block of bytes from a specific device directly into
+			a caller owned buffer, so no new object is created for the data.
+
+			:param address: The I2C address of the device to read from
+			:param commandCode: The "command" or register to read from
+			:param buf: A bytearray to read into
+			:param offset: Where in buf the data starts
+			:param nBytes: The number of bytes to read. Defaults to the rest of buf.
+
+			:return: None
+
+		"""
+		if nBytes == None:
+			nBytes = len(buf) - offset
+		buf[offset:offset + nBytes] = bytes(self.readBlock(address, commandCode, nBytes))
+
+	def read_block_into(self, address, commandCode, buf, offset=0, nBytes=None):
+		""" 
+			Called to read a block of bytes from a specific device directly into
+			a caller owned buffer, so no new object is created for the data.
+
+			:param address: The I2C address of the device to read from
+			:param commandCode: The "command" or register to read from
+			:param buf: A bytearray to read into
+			:param offset: Where in buf the data starts
+			:param nBytes: The number of bytes to read. Defaults to the rest of buf.
+
+			:return: None
+
+		"""
+		return self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
+	def readBlocks(self, reads, buf):
+		""" 
+			Called to run several block reads in one pass, placing the data
+			in a single buffer. This default issues one readBlockInto() per read;
+			platforms that can combine reads into one bus transaction
+			override it.
+
+			:param reads: A list of (address, commandCode, nBytes, offset) tuples
+			:param buf: The bytearray to fill. Each read lands at its offset.
+
+			:return: None
+
+		"""
+		for address, commandCode, nBytes, offset in reads:
+			self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
+	def read_blocks(self, reads, buf):
+		""" 
+			Called to run several block reads in one pass, placing the data
+			in a single buffer.
+
+			:param reads: A list of (address, commandCode, nBytes, offset) tuples
+			:param buf: The bytearray to fill. Each read lands at its offset.
+
+			:return: None
+
+		"""
+		return self.readBlocks(reads, buf)
 	
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
@@ -316,13 +383,28 @@ class I2CDriver(object):
 	def isDeviceConnected(self, devAddress):
 		"""
 			Determines if a particular device (at the provided address)
-			is connected to the bus.
+			is connected to the bus. Answered by the attached BusCensus if
+			there is one.
 
 			:param devAddress: The I2C address of the device to check
 
 			:return: True if the device is connected, otherwise False.
 			:rtype: bool
 
+		"""
+		if self.census != None:
+			return self.census.isConnected(devAddress)
+		return self._probe(devAddress)
+
+	def _probe(self, devAddress):
+		"""
+			Probes the bus for a device, once and without retries.
+
+			:param devAddress: The I2C address of the device to check
+
+			:return: True if the device answered, otherwise False.
+			:rtype: bool
+
 		"""
 		return None
 
@@ -337,7 +419,7 @@ class I2CDriver(object):
 			:rtype: bool
 
 		"""
-		return None
+		return self.isDeviceConnected(devAddress)
 
 	def ping(self, devAddress):
 		"""
@@ -350,7 +432,7 @@ class I2CDriver(object):
 			:rtype: bool
 
 		"""
-		return None
+		return self.isDeviceConnected(devAddress)
 
 	def scan(self):
 		"""
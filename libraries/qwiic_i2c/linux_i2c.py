@@ -39,11 +39,350 @@
 from .i2c_driver import I2CDriver
 
 import sys
+import time
+import errno
+import random
+import threading
 
 
 _PLATFORM_NAME = "Linux"
 
 _retry_count = 3
+
+# I2C_RDRW_IOCTL_MAX_MSGS in the kernel
+_max_rdwr_msgs = 42
+
+# i2c_msg flag for a read
+_I2C_M_RD = 0x0001
+
+#-----------------------------------------------------------------------------
+# Error classification
+#
+# The errno the i2c-dev driver reports tells us what went wrong on the wire.
+# Adapters differ a little, so each class covers the codes seen in practice.
+#
+NACK = "nack"
+ARBITRATION = "arbitration"
+TIMEOUT = "timeout"
+OTHER = "other"
+
+_error_classes = {
+	errno.EREMOTEIO: NACK,		# address or data not acknowledged
+	errno.ENXIO: NACK,
+	errno.EIO: NACK,			# some adapters report NACKs and short transfers as EIO
+	errno.EAGAIN: ARBITRATION,	# lost arbitration / bus busy
+	errno.EBUSY: ARBITRATION,
+	errno.ETIMEDOUT: TIMEOUT,	# clock stretched too long, stuck bus
+}
+
+def classifyError(ioErr):
+	"""
+		Classifies an I2C IOError.
+
+		:param ioErr: The error raised by the bus
+
+		:return: NACK, ARBITRATION, TIMEOUT or OTHER
+		:rtype: string
+	"""
+	return _error_classes.get(getattr(ioErr, "errno", None), OTHER)
+
+def classify_error(ioErr):
+	return classifyError(ioErr)
+
+#-----------------------------------------------------------------------------
+# RetryPolicy
+#
+# How LinuxI2C retries a failed transaction, and when it stops talking to a
+# device altogether. 
+#
+class RetryPolicy(object):
+	"""
+	RetryPolicy
+
+		Bounded, jittered exponential backoff between attempts, plus a circuit
+		breaker per address: once trip_count transactions to a device have
+		failed with a NACK (after all their retries) within trip_window
+		seconds, transactions to it fail immediately for cooldown seconds.
+		After that one trial transaction is let through; success closes the
+		breaker again, another NACK re-opens it.
+
+		:param attempts: Total tries per transaction, including the first
+		:param base_delay: Backoff before the first retry, in seconds. Doubled
+			for each further retry.
+		:param max_delay: Upper bound on the backoff, in seconds
+		:param jitter: Fraction of the backoff that is randomized
+		:param trip_count: NACKed transactions within trip_window that open
+			the breaker
+		:param trip_window: Seconds over which NACKed transactions are counted
+		:param cooldown: Seconds an open breaker fast-fails
+
+		:return: The RetryPolicy object.
+		:rtype: Object
+	"""
+
+	# retry these error classes; anything else is raised straight away
+	retry_on = (NACK, ARBITRATION, TIMEOUT, OTHER)
+
+	def __init__(self, attempts=_retry_count, base_delay=0.0005, max_delay=0.02, jitter=0.5,
+				trip_count=5, trip_window=1.0, cooldown=5.0):
+		self.attempts = attempts
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.jitter = jitter
+		self.trip_count = trip_count
+		self.trip_window = trip_window
+		self.cooldown = cooldown
+
+		self._nacks = {}	# address -> times of recent NACKed transactions
+		self._open_until = {}	# address -> time the breaker may half-open
+		self._guard = threading.Lock()
+
+	def delay(self, retry):
+		"""
+			Backoff before the given retry (1 for the first).
+
+			:rtype: float
+		"""
+		d = min(self.base_delay * (2 ** (retry - 1)), self.max_delay)
+		return d * (1 - self.jitter * random.random())
+
+	def shouldRetry(self, address, kind, attempt):
+		"""
+			Whether a transaction that failed with the given error class on the
+			given attempt (1 for the first) should be tried again.
+
+			:rtype: bool
+		"""
+		return attempt < self.attempts and kind in self.retry_on and not self.isOpen(address)
+
+	def isOpen(self, address):
+		"""
+			True while the breaker for address is open and transactions to it
+			should fail fast.
+
+			:rtype: bool
+		"""
+		until = self._open_until.get(address)
+		return until != None and time.monotonic() < until
+
+	def failed(self, address, kind):
+		"""
+			Records a failed transaction, once its retries are used up,
+			opening the breaker if the device keeps NACKing.
+		"""
+		if kind != NACK:
+			return
+		now = time.monotonic()
+		with self._guard:
+			if address in self._open_until:
+				# the half-open trial failed
+				self._open_until[address] = now + self.cooldown
+				return
+			nacks = [t for t in self._nacks.get(address, ()) if now - t < self.trip_window]
+			nacks.append(now)
+			if len(nacks) >= self.trip_count:
+				self._open_until[address] = now + self.cooldown
+				nacks = []
+			self._nacks[address] = nacks
+
+	def succeeded(self, address):
+		"""
+			Records a successful transaction, closing the breaker.
+		"""
+		if address in self._open_until or address in self._nacks:
+			with self._guard:
+				self._open_until.pop(address, None)
+				self._nacks.pop(address, None)
+
+	def reset(self, address=None):
+		"""
+			Forgets the history of one address, or of all of them.
+		"""
+		if address == None:
+			with self._guard:
+				self._nacks = {}
+				self._open_until = {}
+		else:
+			self.succeeded(address)
+
+	# snake_case aliases
+	def should_retry(self, address, kind, attempt):
+		return self.shouldRetry(address, kind, attempt)
+
+	def is_open(self, address):
+		return self.isOpen(address)
+
+#-----------------------------------------------------------------------------
+# DeviceStats
+#
+# Per address bus health counters kept by LinuxI2C
+#
+class DeviceStats(object):
+	"""
+	DeviceStats
+
+		Transaction counters and a latency histogram for one I2C address.
+		Safe to update from several threads.
+
+		:return: The DeviceStats object.
+		:rtype: Object
+	"""
+
+	# upper bounds of the latency histogram buckets, in microseconds. The
+	# last bucket counts everything slower.
+	latency_buckets = (100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+	def __init__(self, address):
+		self.address = address
+		self.transactions = 0
+		self.bytes = 0
+		self.retries = 0
+		self.failures = 0
+		self.fast_fails = 0
+		self.errors = {NACK: 0, ARBITRATION: 0, TIMEOUT: 0, OTHER: 0}
+		self.latency = [0] * (len(self.latency_buckets) + 1)
+		self._guard = threading.Lock()
+
+	def record(self, nBytes, seconds):
+		us = seconds * 1000000
+		i = 0
+		for bound in self.latency_buckets:
+			if us <= bound:
+				break
+			i += 1
+		with self._guard:
+			self.transactions += 1
+			self.bytes += nBytes
+			self.latency[i] += 1
+
+	def recordError(self, kind, retried):
+		with self._guard:
+			self.errors[kind] += 1
+			if retried:
+				self.retries += 1
+			else:
+				self.failures += 1
+
+	def recordFastFail(self):
+		with self._guard:
+			self.fast_fails += 1
+
+	def asDict(self):
+		"""
+			The counters as a plain dictionary.
+
+			:rtype: dict
+		"""
+		with self._guard:
+			return {"address": self.address, "transactions": self.transactions,
+					"bytes": self.bytes, "retries": self.retries, "failures": self.failures,
+					"fast_fails": self.fast_fails, "errors": dict(self.errors),
+					"latency_us": dict(zip(self.latency_buckets + (None,), self.latency))}
+
+	def as_dict(self):
+		return self.asDict()
+
+	def record_error(self, kind, retried):
+		return self.recordError(kind, retried)
+
+	def record_fast_fail(self):
+		return self.recordFastFail()
+
+#-----------------------------------------------------------------------------
+# BusLock
+#
+# Serializes access to one physical bus across threads. 
+#
+class BusLock(object):
+	"""
+	BusLock
+
+		A re-entrant lock for an I2C bus. A thread already holding the lock
+		can take it again, so a driver method called inside a ``with bus:``
+		block doesn't deadlock.
+
+		:param fair: If True (the default) threads get the bus in the order
+			they asked for it, so a thread polling a fast sensor in a tight
+			loop can't starve the others. If False whichever waiting thread
+			wakes first gets it, which is a little cheaper.
+
+		:return: The BusLock object.
+		:rtype: Object
+	"""
+
+	def __init__(self, fair=True):
+		self.fair = fair
+		self._cond = threading.Condition(threading.Lock())
+		self._owner = None
+		self._depth = 0
+		self._next_ticket = 0
+		self._serving = 0
+		self._abandoned = set()	# tickets of waiters that gave up
+
+	def acquire(self):
+		me = threading.get_ident()
+		with self._cond:
+			if self._owner == me:
+				self._depth += 1
+				return True
+
+			if self.fair:
+				ticket = self._next_ticket
+				self._next_ticket += 1
+				try:
+					while self._owner != None or self._serving != ticket:
+						self._cond.wait()
+				except BaseException:
+					# Interrupted (KeyboardInterrupt...) - give up the ticket so
+					# the threads queued behind it aren't stuck forever
+					self._abandoned.add(ticket)
+					self._skipAbandoned()
+					self._cond.notify_all()
+					raise
+				self._serving += 1
+				self._skipAbandoned()
+			else:
+				while self._owner != None:
+					self._cond.wait()
+
+			self._owner = me
+			self._depth = 1
+			return True
+
+	def _skipAbandoned(self):
+		# Called with the condition held
+		while self._serving in self._abandoned:
+			self._abandoned.discard(self._serving)
+			self._serving += 1
+
+	def release(self):
+		with self._cond:
+			if self._owner != threading.get_ident():
+				raise RuntimeError("I2C bus lock released by a thread that doesn't hold it")
+			self._depth -= 1
+			if self._depth == 0:
+				self._owner = None
+				self._cond.notify_all()
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.release()
+
+# One lock per bus number, shared by every LinuxI2C object opened on that bus
+_bus_locks = {}
+_bus_locks_guard = threading.Lock()
+
+def _busLock(iBus, fair):
+	with _bus_locks_guard:
+		lock = _bus_locks.get(iBus)
+		if lock == None:
+			lock = BusLock(fair)
+			_bus_locks[iBus] = lock
+		return lock
+
 #-----------------------------------------------------------------------------
 # Internal function to connect to the systems I2C bus.
 #
@@ -102,7 +441,7 @@ class LinuxI2C(I2CDriver):
 	_i2cbus = None
 	_i2c_msg = None
 
-	def __init__(self, iBus=1, *args, **argk):
+	def __init__(self, iBus=1, retry_policy=None, fair=True, *args, **argk):
 
 		# Call the super class. The super calss will use default values if not 
 		# proviced
@@ -112,6 +451,12 @@ class LinuxI2C(I2CDriver):
 
 		self._i2cbus = _connectToI2CBus(self._iBus)
 
+		self.retry_policy = retry_policy if retry_policy != None else RetryPolicy()
+		self._stats = {}
+
+		# The first driver opened on a bus decides the lock's fairness
+		self._lock = _busLock(self._iBus, fair)
+
 	# Okay, are we running on a Linux system?
 	@classmethod
 	def isPlatform(cls):
@@ -148,72 +493,184 @@ class LinuxI2C(I2CDriver):
 		if(name != "i2cbus"):
 			super(I2CDriver, self).__setattr__(name, value)
 
-#-------------------------------------------------------------------------	
-	# read Data Command
+	#-------------------------------------------------------------------------
+	# Python with statement support.
+	#
+	# Every method below already holds the bus lock for its own transaction.
+	# Use a with block for sequences that must not be interleaved with other
+	# threads, such as writing a register pointer and then reading from it.
+	#
+	#	>>> with i2c:
+	#	...		i2c.writeCommand(address, register)
+	#	...		value = i2c.readByte(address)
+	#
+	def __enter__(self):
+		self._lock.acquire()
+		return self
 
-	def readWord(self, address, commandCode):
+	def __exit__(self, type, value, traceback):
+		self._lock.release()
 
-		data = 0
+	#-------------------------------------------------------------------------
+	# Runs one bus transaction under the retry policy, keeping the per address
+	# statistics. Writes are not retried (retry=False) but are still counted
+	# and still blocked by an open breaker. The bus lock is held for each
+	# attempt but not during the backoff, so other devices can be served.
+	#
+	def _transact(self, address, nBytes, retry, func, *args):
+		policy = self.retry_policy
+		stats = self.deviceStats(address)
 
-		# add some error handling and recovery....
-		for i in range(_retry_count):
-			try:
-				data = self._i2cbus.read_word_data(address, commandCode)
-			
-				break # break if try succeeds
+		if policy.isOpen(address):
+			stats.recordFastFail()
+			raise IOError(errno.EREMOTEIO, "I2C device 0x%02X not responding, skipped" % address)
 
+		attempt = 1
+		while True:
+			start = time.monotonic()
+			try:
+				with self._lock:
+					result = func(*args)
 			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
+				kind = classifyError(ioErr)
+				if not retry or not policy.shouldRetry(address, kind, attempt):
+					stats.recordError(kind, False)
+					# One failure per transaction, not per attempt
+					policy.failed(address, kind)
+					# Whatever a census knew about the device may be stale now
+					if kind == NACK and self.census != None:
+						self.census.invalidate(address)
 					raise ioErr
-				pass
+				stats.recordError(kind, True)
+				time.sleep(policy.delay(attempt))
+				attempt += 1
+				continue
+
+			stats.record(nBytes, time.monotonic() - start)
+			policy.succeeded(address)
+			return result
+
+	def deviceStats(self, address):
+		"""
+			Bus health counters for one address.
+
+			:param address: The I2C address of the device
+
+			:return: The counters, created on first use
+			:rtype: DeviceStats
+		"""
+		stats = self._stats.get(address)
+		if stats == None:
+			stats = self._stats.setdefault(address, DeviceStats(address))
+		return stats
 
-		return data
+	def device_stats(self, address):
+		return self.deviceStats(address)
+
+	def busStats(self):
+		"""
+			Bus health counters for every address used so far.
+
+			:return: address -> DeviceStats
+			:rtype: dict
+		"""
+		return self._stats
+
+	def bus_stats(self):
+		return self.busStats()
+
+#-------------------------------------------------------------------------	
+	# read Data Command
+
+	def readWord(self, address, commandCode):
+		return self._transact(address, 2, True, self._i2cbus.read_word_data, address, commandCode)
 
 	def read_word(self, address, commandCode):
 		return self.readWord(address, commandCode)
 
 	def readByte(self, address, commandCode = None):
-		data = 0
-		for i in range(_retry_count):
-			try:
-				if commandCode == None:
-					data = self._i2cbus.read_byte(address)
-				elif commandCode != None:
-					data = self._i2cbus.read_byte_data(address, commandCode)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
-
-		return data
+		if commandCode == None:
+			return self._transact(address, 1, True, self._i2cbus.read_byte, address)
+		return self._transact(address, 1, True, self._i2cbus.read_byte_data, address, commandCode)
 
 	def read_byte(self, address, commandCode = None):
 		return self.readByte(address, commandCode)
 
 	def readBlock(self, address, commandCode, nBytes):
-		data = 0
-		for i in range(_retry_count):
-			try:
-				data = self._i2cbus.read_i2c_block_data(address, commandCode, nBytes)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
-
-		return data
+		return self._transact(address, nBytes, True, self._i2cbus.read_i2c_block_data, address, commandCode, nBytes)
 
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	#-----------------------------------------------------------------------
+	# Builds the write (register) and read message pair for a block read. The
+	# read message's data pointer is buf itself, so the kernel fills it
+	# directly and nothing is copied or allocated for the data.
+	#
+	def _readMsgsInto(self, address, commandCode, buf, offset, nBytes):
+		global _i2c_msg
+
+		# Loads i2c_msg if not previously loaded
+		if _i2c_msg == None:
+			from smbus2 import i2c_msg
+			_i2c_msg = i2c_msg
+
+		import ctypes
+		data = (ctypes.c_char * nBytes).from_buffer(buf, offset)
+		read = _i2c_msg(addr=address, flags=_I2C_M_RD, len=nBytes,
+						buf=ctypes.cast(data, ctypes.POINTER(ctypes.c_char)))
+		return _i2c_msg.write(address, [commandCode]), read
+
+	def readBlockInto(self, address, commandCode, buf, offset=0, nBytes=None):
+		if nBytes == None:
+			nBytes = len(buf) - offset
+
+		msgs = self._readMsgsInto(address, commandCode, buf, offset, nBytes)
+		self._transact(address, nBytes, True, self._i2cbus.i2c_rdwr, *msgs)
+
+	def read_block_into(self, address, commandCode, buf, offset=0, nBytes=None):
+		return self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
+	#-----------------------------------------------------------------------
+	# Runs all the reads as combined write/read messages with repeated starts,
+	# so a whole read plan costs one I2C_RDWR ioctl instead of one per block.
+	#
+	def readBlocks(self, reads, buf):
+		policy = self.retry_policy
+
+		# the kernel accepts at most 42 messages (21 reads) per call
+		step = _max_rdwr_msgs // 2
+		for start in range(0, len(reads), step):
+			chunk = reads[start:start + step]
+			msgs = []
+			for address, commandCode, nBytes, offset in chunk:
+				if policy.isOpen(address):
+					msgs = None
+					break
+				msgs.extend(self._readMsgsInto(address, commandCode, buf, offset, nBytes))
+
+			if msgs:
+				t = time.monotonic()
+				try:
+					with self._lock:
+						self._i2cbus.i2c_rdwr(*msgs)
+				except IOError:
+					pass
+				else:
+					t = (time.monotonic() - t) / len(chunk)
+					for address, commandCode, nBytes, offset in chunk:
+						self.deviceStats(address).record(nBytes, t)
+						policy.succeeded(address)
+					continue
+
+			# a combined transaction can't say which device failed, so run the
+			# chunk read by read to retry and account each device on its own
+			for address, commandCode, nBytes, offset in chunk:
+				self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
+	def read_blocks(self, reads, buf):
+		return self.readBlocks(reads, buf)
+
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
 	#
@@ -224,21 +681,21 @@ class LinuxI2C(I2CDriver):
 
 	def writeCommand(self, address, commandCode):
 
-		return self._i2cbus.write_byte(address, commandCode)
+		return self._transact(address, 1, False, self._i2cbus.write_byte, address, commandCode)
 
 	def write_command(self, address, commandCode):
 		return self.writeCommand(address, commandCode)
 
 	def writeWord(self, address, commandCode, value):
 
-		return self._i2cbus.write_word_data(address, commandCode, value)
+		return self._transact(address, 2, False, self._i2cbus.write_word_data, address, commandCode, value)
 
 	def write_word(self, address, commandCode, value):
 		return self.writeWord(address, commandCode, value)
 
 	def writeByte(self, address, commandCode, value):
 
-		return self._i2cbus.write_byte_data(address, commandCode, value)
+		return self._transact(address, 1, False, self._i2cbus.write_byte_data, address, commandCode, value)
 
 	def write_byte(self, address, commandCode, value):
 		return self.writeByte(address, commandCode, value)
@@ -248,23 +705,29 @@ class LinuxI2C(I2CDriver):
 		# if value is a bytearray - convert to list of ints (it's what 
 		# required by this call)
 		tmpVal = list(value) if type(value) == bytearray else value
-		self._i2cbus.write_i2c_block_data(address, commandCode, tmpVal)
+		self._transact(address, len(tmpVal), False, self._i2cbus.write_i2c_block_data, address, commandCode, tmpVal)
 
 	def write_block(self, address, commandCode, value):
 		return self.writeBlock(address, commandCode, value)
 
-	def isDeviceConnected(self, devAddress):
+	def _probe(self, devAddress):
 		isConnected = False
 		try:
 			# Try to write nothing to the device
 			# If it throws an I/O error - the device isn't connected
-			self._i2cbus.write_quick(devAddress)
+			with self._lock:
+				self._i2cbus.write_quick(devAddress)
 			isConnected = True
 		except:
 			pass
 		
 		return isConnected
 
+	def isDeviceConnected(self, devAddress):
+		if self.census != None:
+			return self.census.isConnected(devAddress)
+		return self._probe(devAddress)
+
 	def is_device_connected(self, devAddress):
 		return self.isDeviceConnected(devAddress)
 
@@ -281,7 +744,7 @@ class LinuxI2C(I2CDriver):
 		foundDevices = []
 		# Loop over the list of legal addresses (0x08 - 0x77)
 		for currAddress in range(0x08, 0x78):
-			if self.ping(currAddress) == True:
+			if self._probe(currAddress) == True:
 				foundDevices.append(currAddress)
 		return foundDevices
 
@@ -310,17 +773,7 @@ class LinuxI2C(I2CDriver):
 		read = _i2c_msg.read(address, read_nbytes)
 
 		# Read Register
-		for i in range(_retry_count):
-			try:
-				self._i2cbus.i2c_rdwr(write, read)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
+		self._transact(address, read_nbytes, True, self._i2cbus.i2c_rdwr, write, read)
 		
 		# Return read transaction (list)
 		# Note - To retreive values, list the return: list(read)
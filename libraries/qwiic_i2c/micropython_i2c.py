@@ -135,6 +135,17 @@ class MicroPythonI2C(I2CDriver):
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	def readBlockInto(self, address, commandCode, buf, offset=0, nBytes=None):
+		if nBytes == None:
+			nBytes = len(buf) - offset
+		if offset == 0 and nBytes == len(buf):
+			self._i2cbus.readfrom_mem_into(address, commandCode, buf)
+		else:
+			self._i2cbus.readfrom_mem_into(address, commandCode, memoryview(buf)[offset:offset + nBytes])
+
+	def read_block_into(self, address, commandCode, buf, offset=0, nBytes=None):
+		return self.readBlockInto(address, commandCode, buf, offset, nBytes)
+
 	# write commands----------------------------------------------------------
 	def writeCommand(self, address, commandCode):
 		self._i2cbus.writeto(address, commandCode.to_bytes(1, 'little'))
@@ -161,6 +172,11 @@ class MicroPythonI2C(I2CDriver):
 		return self.writeBlock(address, commandCode, value)
 
 	def isDeviceConnected(self, devAddress):
+		if self.census != None:
+			return self.census.isConnected(devAddress)
+		return self._probe(devAddress)
+
+	def _probe(self, devAddress):
 		isConnected = False
 		try:
 			# Try to write nothing to the device
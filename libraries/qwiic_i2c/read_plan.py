@@ -0,0 +1,162 @@
+#-----------------------------------------------------------------------------
+# read_plan.py
+#
+# Batches register reads from one or more devices on the bus into as few
+# I2C transactions as possible.
+#
+# Drivers (or the application) declare the registers they need each sample
+# up front. The plan merges reads of the same device that touch or overlap
+# into one block read, lays every block out in a single buffer, and then
+# runs them all in one pass through the platform driver's readBlocks().
+#
+#-----------------------------------------------------------------------------
+
+"""
+read_plan
+=========
+Collects (device, start register, length) reads into a plan that is run in one
+scheduled pass. Contiguous or overlapping reads of the same device become a
+single block read and, on Linux, all blocks go out as one combined I2C_RDWR
+transaction.
+
+Only plan registers of devices that auto-increment the register address on
+block reads, and don't merge across registers whose read has side effects
+(FIFO data, clear-on-read status) unless the whole block is wanted.
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> plan = qwiic_i2c.ReadPlan()
+	>>> env = plan.add(0x77, 0xF7, 8)
+	>>> imu = plan.add(0x6B, 0x22, 12)
+	>>> plan.run()
+	>>> raw = plan.view(env)
+"""
+
+class ReadPlan(object):
+	"""
+	ReadPlan
+
+		A reusable set of register reads, run together in as few bus
+		transactions as possible.
+
+		:param i2c_driver: The qwiic I2C driver to run on. Defaults to the
+			platform's default driver.
+		:param max_block: The largest merged block, in bytes (SMBus block
+			reads are limited to 32).
+		:param max_gap: Unrequested registers that may be read to join two
+			reads of the same device into one block.
+
+		:return: The ReadPlan object.
+		:rtype: Object
+	"""
+
+	def __init__(self, i2c_driver=None, max_block=32, max_gap=0):
+		if i2c_driver == None:
+			from . import getI2CDriver
+			i2c_driver = getI2CDriver()
+		self._i2c = i2c_driver
+		self._max_block = max_block
+		self._max_gap = max_gap
+		self._reads = []
+		self._blocks = None
+		self._offsets = None
+		self.buffer = bytearray()
+
+	def add(self, address, commandCode, nBytes):
+		"""
+			Adds a read to the plan.
+
+			:param address: The I2C address of the device to read from
+			:param commandCode: The first register to read
+			:param nBytes: The number of bytes to read
+
+			:return: A handle used to find the data after run()
+			:rtype: int
+
+		"""
+		self._reads.append((address, commandCode, nBytes))
+		self._blocks = None
+		return len(self._reads) - 1
+
+	def _compile(self):
+		# merge reads of the same device that overlap or touch (or are within
+		# max_gap registers), then give each block its place in the buffer
+		blocks = []
+		for address, reg, n in sorted(self._reads):
+			if blocks:
+				last = blocks[-1]
+				end = max(last[1] + last[2], reg + n)
+				if last[0] == address and reg <= last[1] + last[2] + self._max_gap \
+						and end - last[1] <= self._max_block:
+					last[2] = end - last[1]
+					continue
+			blocks.append([address, reg, n, 0])
+
+		size = 0
+		for block in blocks:
+			block[3] = size
+			size += block[2]
+
+		offsets = []
+		for address, reg, n in self._reads:
+			for block in blocks:
+				if block[0] == address and block[1] <= reg and reg + n <= block[1] + block[2]:
+					offsets.append(block[3] + reg - block[1])
+					break
+
+		self._blocks = [tuple(block) for block in blocks]
+		self._offsets = offsets
+		self.buffer = bytearray(size)
+
+	def run(self):
+		"""
+			Runs every read in the plan.
+
+			:return: The buffer holding all the read data
+			:rtype: bytearray
+
+		"""
+		if self._blocks == None:
+			self._compile()
+		self._i2c.readBlocks(self._blocks, self.buffer)
+		return self.buffer
+
+	def offset(self, handle):
+		"""
+			Where a read's data starts in the plan's buffer.
+
+			:param handle: The handle returned by add()
+
+			:return: Offset into buffer
+			:rtype: int
+
+		"""
+		if self._blocks == None:
+			self._compile()
+		return self._offsets[handle]
+
+	def view(self, handle):
+		"""
+			The data of one read from the last run(), without copying.
+
+			:param handle: The handle returned by add()
+
+			:return: The bytes of that read
+			:rtype: memoryview
+
+		"""
+		offset = self.offset(handle)
+		return memoryview(self.buffer)[offset:offset + self._reads[handle][2]]
+
+	@property
+	def transactions(self):
+		"""
+			The number of block reads the plan runs as.
+
+			:rtype: int
+
+		"""
+		if self._blocks == None:
+			self._compile()
+		return len(self._blocks)
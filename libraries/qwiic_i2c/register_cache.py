@@ -0,0 +1,201 @@
+#-----------------------------------------------------------------------------
+# register_cache.py
+#
+# Shadow copy of a device's configuration registers.
+#
+# Most driver configuration calls read a register, change a few bits and
+# write it back. The value read is almost always the one the driver wrote
+# last time, so the read is wasted bus time. A driver that opts in tells the
+# cache which registers only change when it writes them (cacheable) and
+# which bits change on their own (volatile); reads of those are served from
+# the shadow copy and read-modify-writes become a single write.
+#
+#-----------------------------------------------------------------------------
+
+"""
+register_cache
+==============
+Per device register shadow for read-modify-write heavy drivers.
+
+Registers are volatile (always read from the device) unless declared
+cacheable. A cacheable register can still have some volatile bits - status
+flags or self-clearing command bits. Reads that only look at its other bits
+are served from the cache, and those bits are written back as 0.
+
+Registers that can't be read back at all (write-only) are seeded with
+preset() instead of being read.
+
+After anything that changes registers behind the driver's back, such as a
+device reset, call invalidate().
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> regs = qwiic_i2c.RegisterCache(i2c, 0x48, word=True)
+	>>> regs.cacheable(0x00, 0x03)
+	>>> regs.update(0x00, 0xE7FF, 0x01 << 11)	# one write, no read
+	>>> regs.hitRatio()
+"""
+
+class RegisterCache(object):
+	"""
+	RegisterCache
+
+		Read-through, write-through cache of one device's registers.
+
+		:param i2c_driver: The qwiic I2C driver the device is on
+		:param address: The I2C address of the device
+		:param word: True for 16 bit registers (readWord/writeWord), False
+			(the default) for 8 bit ones.
+
+		:return: The RegisterCache object.
+		:rtype: Object
+	"""
+
+	def __init__(self, i2c_driver, address, word=False):
+		self._i2c = i2c_driver
+		self.address = address
+		self.word = word
+		self._full = 0xFFFF if word else 0xFF
+
+		self._volatile = {}	# register -> bits that change on their own
+		self._values = {}	# register -> last known value of the other bits
+
+		self.hits = 0
+		self.misses = 0
+
+	def cacheable(self, *registers):
+		"""
+			Declares registers that only change when the driver writes them.
+
+			:param registers: The register addresses
+		"""
+		for reg in registers:
+			self._volatile[reg] = 0
+
+	def volatile(self, register, mask=None):
+		"""
+			Declares bits of a register that change on their own - status
+			flags or self-clearing command bits.
+
+			:param register: The register address
+			:param mask: The volatile bits. Defaults to the whole register,
+				which takes it out of the cache altogether.
+		"""
+		if mask == None or mask & self._full == self._full:
+			if register in self._volatile:
+				del self._volatile[register]
+			if register in self._values:
+				del self._values[register]
+		else:
+			self._volatile[register] = mask
+			if register in self._values:
+				self._values[register] &= ~mask
+
+	def _readDevice(self, reg):
+		if self.word:
+			return self._i2c.readWord(self.address, reg)
+		return self._i2c.readByte(self.address, reg)
+
+	def read(self, register, mask=None):
+		"""
+			Reads a register, from the cache if possible.
+
+			:param register: The register address
+			:param mask: The bits the caller is interested in. If none of
+				them are volatile the read can be served from the cache even
+				when other bits of the register are.
+
+			:return: The register value
+			:rtype: int
+		"""
+		vmask = self._volatile.get(register)
+		if vmask == None:
+			return self._readDevice(register)
+
+		value = self._values.get(register)
+		if value != None and (vmask == 0 or (mask != None and mask & vmask == 0)):
+			self.hits += 1
+			return value
+
+		self.misses += 1
+		value = self._readDevice(register)
+		self._values[register] = value & ~vmask
+		return value
+
+	def write(self, register, value):
+		"""
+			Writes a register and remembers the value.
+
+			:param register: The register address
+			:param value: The value to write
+
+			:return: Whatever the I2C driver returned
+		"""
+		if self.word:
+			result = self._i2c.writeWord(self.address, register, value)
+		else:
+			result = self._i2c.writeByte(self.address, register, value)
+
+		vmask = self._volatile.get(register)
+		if vmask != None:
+			self._values[register] = value & ~vmask
+		return result
+
+	def update(self, register, mask, bits):
+		"""
+			Read-modify-write of a register. For a cached register this is a
+			single bus write.
+
+			:param register: The register address
+			:param mask: The bits of the current value to keep
+			:param bits: The bits to set after masking
+
+			:return: Whatever the I2C driver returned
+		"""
+		vmask = self._volatile.get(register)
+		value = self._values.get(register) if vmask != None else None
+		if value == None:
+			value = self.read(register)
+			if vmask != None:
+				value &= ~vmask
+		else:
+			self.hits += 1
+		return self.write(register, (value & mask) | bits)
+
+	def preset(self, register, value):
+		"""
+			Sets the cached value of a register without touching the device.
+			Used for write-only registers, whose reset value is known but
+			which can't be read back. Makes the register cacheable if it
+			wasn't declared.
+
+			:param register: The register address
+			:param value: The register value
+		"""
+		vmask = self._volatile.setdefault(register, 0)
+		self._values[register] = value & ~vmask
+
+	def invalidate(self, register=None):
+		"""
+			Forgets the cached value of one register, or of all of them, so
+			the next access reads the device.
+
+			:param register: The register address, or None for all
+		"""
+		if register == None:
+			self._values = {}
+		elif register in self._values:
+			del self._values[register]
+
+	def hitRatio(self):
+		"""
+			The share of cached register accesses that didn't need a bus read.
+
+			:rtype: float
+		"""
+		total = self.hits + self.misses
+		return float(self.hits) / total if total else 0.0
+
+	def hit_ratio(self):
+		return self.hitRatio()
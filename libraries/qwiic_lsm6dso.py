@@ -50,6 +50,8 @@ New to Qwiic? Take a look at the entire [SparkFun Qwiic ecosystem](https://www.s
 # The Qwiic_I2C_Py platform driver is designed to work on almost any Python
 # platform, check it out here: https://github.com/sparkfun/Qwiic_I2C_Py
 import qwiic_i2c
+import struct
+from array import array
 
 # Define the device name and I2C addresses. These are set in the class defintion
 # as class variables, making them avilable without having to create a class
@@ -187,6 +189,47 @@ class QwiicLSM6DSO(object):
     ODR_MASK      = 0x0F
     ODR_POS       = 4
 
+    # FIFO modes
+    FIFO_MODE_BYPASS         = 0x00
+    FIFO_MODE_FIFO           = 0x01 # Stops when full
+    FIFO_MODE_CONT_TO_FIFO   = 0x03
+    FIFO_MODE_BYPASS_TO_CONT = 0x04
+    FIFO_MODE_CONTINUOUS     = 0x06 # Oldest data is overwritten when full
+    FIFO_MODE_BYPASS_TO_FIFO = 0x07
+    FIFO_MODE_MASK           = 0xF8
+
+    # FIFO timestamp batching, one timestamp every 1, 8 or 32 batches
+    FIFO_TS_DISABLE = 0x00
+    FIFO_TS_DEC_1   = 0x01
+    FIFO_TS_DEC_8   = 0x02
+    FIFO_TS_DEC_32  = 0x03
+    FIFO_TS_MASK    = 0x3F
+    FIFO_TS_POS     = 6
+
+    # FIFO status flags, FIFO_STATUS2
+    FIFO_WTM_IA        = 0x80 # Watermark reached
+    FIFO_OVR_IA        = 0x40 # Overrun
+    FIFO_FULL_IA       = 0x20 # Full at the next sample
+    FIFO_OVR_LATCHED   = 0x08
+    FIFO_DIFF_MSB_MASK = 0x03
+
+    # FIFO word tags
+    FIFO_TAG_GYRO       = 0x01
+    FIFO_TAG_ACCEL      = 0x02
+    FIFO_TAG_TEMP       = 0x03
+    FIFO_TAG_TIMESTAMP  = 0x04
+    FIFO_TAG_CFG_CHANGE = 0x05
+
+    # Each FIFO word is a tag byte and 6 data bytes, read from FIFO_DATA_OUT_TAG
+    # onwards. The register address wraps back to the tag after the last data
+    # byte, so any number of words can be read in one go.
+    FIFO_WORD_SIZE     = 7
+    FIFO_WTM_MAX       = 511 # 3 KB FIFO, 9 bit watermark
+    FIFO_READ_SIZE     = 511 * 7 # Largest single read, lower it if the platform can't
+    TIMESTAMP_EN       = 0x20 # CTRL10_C
+    INT1_FIFO_TH       = 0x08 # INT1_CTRL
+    TIMESTAMP_US       = 25 # Nominal timestamp resolution
+
     def __init__(self, address=None, i2c_driver=None):
         """
         Constructor
@@ -205,6 +248,14 @@ class QwiicLSM6DSO(object):
         else:
             self.address = self.available_addresses[0]
 
+        # Buffer for read_raw_accel_gyro_all(), reused for every sample
+        self._raw_all = bytearray(12)
+
+        # FIFO status registers, and buffers for read_fifo(), allocated by
+        # begin_fifo() or set_fifo_capacity()
+        self._fifo_status = bytearray(2)
+        self.set_fifo_capacity(0)
+
         # Load the I2C driver if one isn't provided
         if i2c_driver is None:
             self._i2c = qwiic_i2c.getI2CDriver()
@@ -815,21 +866,39 @@ class QwiicLSM6DSO(object):
         """
         Reads the raw accelerometer and gyroscope X, Y, and Z axis values
 
-        :return: The raw accelerometer and gyroscope X, Y, and Z axis values
-        :rtype: list
+        :return: The raw gyroscope then accelerometer X, Y, and Z axis values,
+            little endian. The buffer is reused by the next call.
+        :rtype: bytearray
         """
-        return self._i2c.readBlock(self.address, self.OUTX_L_G, 12)
+        self._i2c.readBlockInto(self.address, self.OUTX_L_G, self._raw_all)
+        return self._raw_all
 
-    def read_float_accel_gyro_all(self):
+    def add_to_plan(self, plan):
+        """
+        Adds the gyroscope and accelerometer output registers to a ReadPlan,
+        so they are read along with the other devices' registers. Pass the
+        plan's view of them to read_float_accel_gyro_all() after each run.
+
+        :param plan: The read plan
+        :type plan: qwiic_i2c.ReadPlan
+        :return: Handle of the read in the plan
+        :rtype: int
+        """
+        return plan.add(self.address, self.OUTX_L_G, len(self._raw_all))
+
+    def read_float_accel_gyro_all(self, data=None):
         """
         Reads the accelerometer and gyroscope X, Y, and Z axis values in G and
         degrees per second
 
+        :param data: The output registers from a ReadPlan run, see
+            add_to_plan(). Defaults to None, which reads the sensor
+        :type data: memoryview, optional
         :return: The accelerometer and gyroscope X, Y, and Z axis values in G
             and degrees per second
         :rtype: tuple
         """
-        raw = self.read_raw_accel_gyro_all()
+        raw = self.read_raw_accel_gyro_all() if data is None else data
         gyrX = self.calc_gyro(raw[0] | (raw[1] << 8))
         gyrY = self.calc_gyro(raw[2] | (raw[3] << 8))
         gyrZ = self.calc_gyro(raw[4] | (raw[5] << 8))
@@ -871,3 +940,289 @@ class QwiicLSM6DSO(object):
         :rtype: float
         """
         return (self.read_temp_c() * 9) / 5 + 32
+
+    def set_fifo_watermark(self, words):
+        """
+        Sets the number of unread FIFO words (0-511) that raises the FIFO
+        watermark flag. Each accelerometer, gyroscope or timestamp sample is
+        one word.
+
+        :param words: The watermark level
+        :type words: int
+        :return: `True` if successful, otherwise `False`
+        :rtype: bool
+        """
+        # Ensure provided watermark is valid
+        if words < 0 or words > self.FIFO_WTM_MAX:
+            return False
+
+        # Low 8 bits in FIFO_CTRL1, bit 8 in FIFO_CTRL2
+        self._i2c.writeByte(self.address, self.FIFO_CTRL1, words & 0xFF)
+        reg_val = self._i2c.readByte(self.address, self.FIFO_CTRL2)
+        reg_val &= 0xFE
+        reg_val |= words >> 8
+        self._i2c.writeByte(self.address, self.FIFO_CTRL2, reg_val)
+
+        # Done!
+        return True
+
+    def get_fifo_watermark(self):
+        """
+        Returns the FIFO watermark level
+
+        :return: The watermark level in words
+        :rtype: int
+        """
+        low = self._i2c.readByte(self.address, self.FIFO_CTRL1)
+        high = self._i2c.readByte(self.address, self.FIFO_CTRL2) & 0x01
+        return (high << 8) | low
+
+    def set_fifo_batch_rates(self, accel_rate, gyro_rate):
+        """
+        Sets the rates at which accelerometer and gyroscope samples are stored
+        in the FIFO, using the same ODR values as set_accel_data_rate(). The
+        batch rate can be lower than the output data rate to decimate it.
+        ODR_DISABLE leaves that sensor out of the FIFO.
+
+        :param accel_rate: The accelerometer batch data rate
+        :type accel_rate: int
+        :param gyro_rate: The gyroscope batch data rate
+        :type gyro_rate: int
+        :return: `True` if successful, otherwise `False`
+        :rtype: bool
+        """
+        # Ensure provided rates are valid
+        if accel_rate < self.ODR_DISABLE or accel_rate > self.ODR_1_6Hz:
+            return False
+        if gyro_rate < self.ODR_DISABLE or gyro_rate > self.ODR_6660Hz:
+            return False
+
+        self._i2c.writeByte(self.address, self.FIFO_CTRL3, (gyro_rate << 4) | accel_rate)
+
+        # Done!
+        return True
+
+    def set_fifo_mode(self, mode):
+        """
+        Sets the FIFO mode. Bypass (the default) empties and disables the FIFO.
+
+        :param mode: One of the FIFO_MODE values
+        :type mode: int
+        :return: `True` if successful, otherwise `False`
+        :rtype: bool
+        """
+        # Ensure provided mode is valid
+        if mode not in (self.FIFO_MODE_BYPASS, self.FIFO_MODE_FIFO,
+                        self.FIFO_MODE_CONT_TO_FIFO, self.FIFO_MODE_BYPASS_TO_CONT,
+                        self.FIFO_MODE_CONTINUOUS, self.FIFO_MODE_BYPASS_TO_FIFO):
+            return False
+
+        # Get current register value, set new mode, write new register value
+        reg_val = self._i2c.readByte(self.address, self.FIFO_CTRL4)
+        reg_val &= self.FIFO_MODE_MASK
+        reg_val |= mode
+        self._i2c.writeByte(self.address, self.FIFO_CTRL4, reg_val)
+
+        # Done!
+        return True
+
+    def get_fifo_mode(self):
+        """
+        Returns the FIFO mode
+
+        :return: The FIFO mode
+        :rtype: int
+        """
+        reg_val = self._i2c.readByte(self.address, self.FIFO_CTRL4)
+        return reg_val & (0xFF ^ self.FIFO_MODE_MASK)
+
+    def set_fifo_timestamp_batching(self, decimation):
+        """
+        Sets how often a timestamp is stored in the FIFO, and turns the
+        timestamp counter on or off to match
+
+        :param decimation: One of the FIFO_TS values
+        :type decimation: int
+        :return: `True` if successful, otherwise `False`
+        :rtype: bool
+        """
+        # Ensure provided decimation is valid
+        if decimation < self.FIFO_TS_DISABLE or decimation > self.FIFO_TS_DEC_32:
+            return False
+
+        reg_val = self._i2c.readByte(self.address, self.FIFO_CTRL4)
+        reg_val &= self.FIFO_TS_MASK
+        reg_val |= decimation << self.FIFO_TS_POS
+        self._i2c.writeByte(self.address, self.FIFO_CTRL4, reg_val)
+
+        reg_val = self._i2c.readByte(self.address, self.CTRL10_C)
+        reg_val &= 0xFF ^ self.TIMESTAMP_EN
+        if decimation != self.FIFO_TS_DISABLE:
+            reg_val |= self.TIMESTAMP_EN
+        self._i2c.writeByte(self.address, self.CTRL10_C, reg_val)
+
+        # Done!
+        return True
+
+    def set_fifo_watermark_interrupt(self, enable):
+        """
+        Sets whether the FIFO watermark drives the INT1 pin
+
+        :param enable: `True` to enable, `False` to disable
+        :type enable: bool
+        """
+        reg_val = self._i2c.readByte(self.address, self.INT1_CTRL)
+        reg_val &= 0xFF ^ self.INT1_FIFO_TH
+        reg_val |= enable << 3
+        self._i2c.writeByte(self.address, self.INT1_CTRL, reg_val)
+
+    def begin_fifo(self, watermark, accel_rate=None, gyro_rate=None,
+                   mode=None, timestamps=True, capacity=None):
+        """
+        Sets up FIFO streaming: batch rates, timestamps, watermark and mode.
+        The FIFO is emptied first.
+
+        :param watermark: The watermark level in words
+        :type watermark: int
+        :param accel_rate: The accelerometer batch rate, defaults to ODR_104Hz
+        :type accel_rate: int, optional
+        :param gyro_rate: The gyroscope batch rate, defaults to ODR_104Hz
+        :type gyro_rate: int, optional
+        :param mode: The FIFO mode, defaults to FIFO_MODE_CONTINUOUS
+        :type mode: int, optional
+        :param timestamps: `True` to store a timestamp with every batch
+        :type timestamps: bool, optional
+        :param capacity: Words read_fifo() takes at a time, defaults to twice
+            the watermark, to leave time to get to it
+        :type capacity: int, optional
+        :return: `True` if successful, otherwise `False`
+        :rtype: bool
+        """
+        if accel_rate is None:
+            accel_rate = self.ODR_104Hz
+        if gyro_rate is None:
+            gyro_rate = self.ODR_104Hz
+        if mode is None:
+            mode = self.FIFO_MODE_CONTINUOUS
+
+        if capacity is None:
+            capacity = min(2 * watermark, self.FIFO_WTM_MAX + 1)
+        self.set_fifo_capacity(capacity)
+
+        # Bypass mode empties the FIFO
+        self.set_fifo_mode(self.FIFO_MODE_BYPASS)
+
+        if not self.set_fifo_batch_rates(accel_rate, gyro_rate):
+            return False
+        if timestamps:
+            self.set_fifo_timestamp_batching(self.FIFO_TS_DEC_1)
+        else:
+            self.set_fifo_timestamp_batching(self.FIFO_TS_DISABLE)
+        if not self.set_fifo_watermark(watermark):
+            return False
+        return self.set_fifo_mode(mode)
+
+    def get_fifo_status(self):
+        """
+        Returns the number of unread FIFO words and the FIFO status flags
+
+        :return: The number of unread words, and the FIFO_WTM_IA,
+            FIFO_OVR_IA, FIFO_FULL_IA and FIFO_OVR_LATCHED flags
+        :rtype: tuple
+        """
+        status = self._fifo_status
+        self._i2c.readBlockInto(self.address, self.FIFO_STATUS1, status)
+        count = ((status[1] & self.FIFO_DIFF_MSB_MASK) << 8) | status[0]
+        return count, status[1] & (0xFF ^ self.FIFO_DIFF_MSB_MASK)
+
+    def set_fifo_capacity(self, words):
+        """
+        Sets how many FIFO words read_fifo() takes at a time, and allocates
+        its buffers. Any more are left in the FIFO for the next call.
+
+        :param words: The number of words
+        :type words: int
+        """
+        self._fifo_raw = bytearray(words * self.FIFO_WORD_SIZE)
+        self._fifo_time = 0
+
+        # Samples decoded by read_fifo(), reused for every call
+        self.fifo_accel_x = array('h', [0] * words)
+        self.fifo_accel_y = array('h', [0] * words)
+        self.fifo_accel_z = array('h', [0] * words)
+        self.fifo_accel_time = array('L', [0] * words)
+        self.fifo_accel_count = 0
+        self.fifo_gyro_x = array('h', [0] * words)
+        self.fifo_gyro_y = array('h', [0] * words)
+        self.fifo_gyro_z = array('h', [0] * words)
+        self.fifo_gyro_time = array('L', [0] * words)
+        self.fifo_gyro_count = 0
+        self.fifo_overrun = False
+
+    def read_fifo_raw(self):
+        """
+        Reads the unread FIFO words, up to the capacity, in as few reads as
+        the platform allows
+
+        :return: The number of words read into the raw buffer
+        :rtype: int
+        """
+        count, flags = self.get_fifo_status()
+        self.fifo_overrun = bool(flags & self.FIFO_OVR_IA)
+
+        words = min(count, len(self._fifo_raw) // self.FIFO_WORD_SIZE)
+        nbytes = words * self.FIFO_WORD_SIZE
+
+        # Only ever split the read between words
+        max_read = self.FIFO_READ_SIZE - self.FIFO_READ_SIZE % self.FIFO_WORD_SIZE
+        offset = 0
+        while offset < nbytes:
+            chunk = min(nbytes - offset, max_read)
+            self._i2c.readBlockInto(self.address, self.FIFO_DATA_OUT_TAG, self._fifo_raw, offset, chunk)
+            offset += chunk
+        return words
+
+    def read_fifo(self):
+        """
+        Reads the FIFO and decodes it into the fifo_accel_x/y/z and
+        fifo_gyro_x/y/z arrays (raw signed values, see calc_accel() and
+        calc_gyro() for the scale), with fifo_accel_count and fifo_gyro_count
+        samples. Each sample's time is the last timestamp stored before it,
+        in TIMESTAMP_US ticks, in fifo_accel_time and fifo_gyro_time.
+
+        :return: The number of FIFO words read
+        :rtype: int
+        """
+        words = self.read_fifo_raw()
+
+        raw = self._fifo_raw
+        unpack = struct.unpack_from
+        ax = self.fifo_accel_x
+        ay = self.fifo_accel_y
+        az = self.fifo_accel_z
+        at = self.fifo_accel_time
+        gx = self.fifo_gyro_x
+        gy = self.fifo_gyro_y
+        gz = self.fifo_gyro_z
+        gt = self.fifo_gyro_time
+        stamp = self._fifo_time
+        accels = 0
+        gyros = 0
+
+        for i in range(0, words * self.FIFO_WORD_SIZE, self.FIFO_WORD_SIZE):
+            tag = raw[i] >> 3
+            if tag == self.FIFO_TAG_ACCEL:
+                ax[accels], ay[accels], az[accels] = unpack('<hhh', raw, i + 1)
+                at[accels] = stamp
+                accels += 1
+            elif tag == self.FIFO_TAG_GYRO:
+                gx[gyros], gy[gyros], gz[gyros] = unpack('<hhh', raw, i + 1)
+                gt[gyros] = stamp
+                gyros += 1
+            elif tag == self.FIFO_TAG_TIMESTAMP:
+                stamp = unpack('<I', raw, i + 1)[0]
+
+        self._fifo_time = stamp
+        self.fifo_accel_count = accels
+        self.fifo_gyro_count = gyros
+        return words
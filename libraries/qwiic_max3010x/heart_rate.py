@@ -60,6 +60,8 @@
 #  
 # 
 
+from array import array
+
 # define the class that encapsulates the device being created. All information associated with this
 # device is encapsulated by this class. The device class should be the only value exported
 # from this module.
@@ -86,9 +88,13 @@ class HeartRate(object):
         self.negativeEdge = 0
         self.ir_avg_reg = 0
 
-        self.cbuff = list(range(32))
+        # FIR history, 32 samples. Every sample is stored twice, 32 apart, so
+        # the 23 samples the filter needs are always in one unwrapped run.
+        self.cbuff = array('l', list(range(32)) * 2)
         self.offset = 0
 
+        self.sampleCount = 0 # Samples processed, the timestamp of processBlock() beats
+
         self.FIRCoeffs = [172, 321, 579, 927, 1360, 1858, 2390, 2916, 3391, 3768, 4012, 4096]
 
     # Average DC Estimator
@@ -105,11 +111,13 @@ class HeartRate(object):
     def lowPassFIRFilter(self,din):
         
         self.cbuff[self.offset] = din
+        self.cbuff[self.offset + 32] = din
+        newest = self.offset + 32
 
-        z = self.mul16(self.FIRCoeffs[11], self.cbuff[(self.offset - 11) & 0x1F])
+        z = self.mul16(self.FIRCoeffs[11], self.cbuff[newest - 11])
       
         for i in range(0,11):
-            z += self.mul16(self.FIRCoeffs[i], self.cbuff[(self.offset - i) & 0x1F] + self.cbuff[(self.offset - 22 + i) & 0x1F])
+            z += self.mul16(self.FIRCoeffs[i], self.cbuff[newest - i] + self.cbuff[newest - 22 + i])
 
         self.offset += 1
         self.offset %= 32 #Wrap condition
@@ -124,6 +132,7 @@ class HeartRate(object):
     #  A running average of four samples is recommended for display on the screen.
     def checkForBeat(self, sample):
         beatDetected = False
+        self.sampleCount += 1
         
         #  Save current state
         self.IR_AC_Signal_Previous = self.IR_AC_Signal_Current
@@ -165,3 +174,93 @@ class HeartRate(object):
             self.IR_AC_Signal_min = self.IR_AC_Signal_Current
       
         return beatDetected
+
+    #  Runs checkForBeat() over a block of samples, such as a whole FIFO drain,
+    #  with the filters unrolled and all state held in locals.
+    #  Returns the sampleCount of each sample a beat was detected at.
+    def processBlock(self, samples, count=None):
+        """
+            Checks a block of samples for beats
+
+            :param samples: IR samples, e.g. an array reused for every block
+            :param count: number of samples to use, default all of them
+
+            :return: the sampleCount of each beat detected
+            :rtype: list
+        """
+        if count is None:
+            count = len(samples)
+
+        c0, c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11 = self.FIRCoeffs
+        cbuff = self.cbuff
+        offset = self.offset
+        avg = self.ir_avg_reg
+        current = self.IR_AC_Signal_Current
+        signalMax = self.IR_AC_Signal_max
+        signalMin = self.IR_AC_Signal_min
+        positiveEdge = self.positiveEdge
+        negativeEdge = self.negativeEdge
+        sampleCount = self.sampleCount
+        estimate = self.IR_Average_Estimated
+        previous = self.IR_AC_Signal_Previous
+        beats = []
+
+        for k in range(count):
+            sample = samples[k]
+            sampleCount += 1
+            previous = current
+
+            # Average DC Estimator
+            avg += ((sample << 15) - avg) >> 4
+            estimate = avg >> 15
+
+            # Low Pass FIR Filter, symmetric taps paired
+            din = sample - estimate
+            cbuff[offset] = din
+            cbuff[offset + 32] = din
+            n = offset + 32
+            current = (c0 * (cbuff[n] + cbuff[n - 22]) + c1 * (cbuff[n - 1] + cbuff[n - 21]) +
+                       c2 * (cbuff[n - 2] + cbuff[n - 20]) + c3 * (cbuff[n - 3] + cbuff[n - 19]) +
+                       c4 * (cbuff[n - 4] + cbuff[n - 18]) + c5 * (cbuff[n - 5] + cbuff[n - 17]) +
+                       c6 * (cbuff[n - 6] + cbuff[n - 16]) + c7 * (cbuff[n - 7] + cbuff[n - 15]) +
+                       c8 * (cbuff[n - 8] + cbuff[n - 14]) + c9 * (cbuff[n - 9] + cbuff[n - 13]) +
+                       c10 * (cbuff[n - 10] + cbuff[n - 12]) + c11 * cbuff[n - 11]) >> 15
+            offset = (offset + 1) & 0x1F
+
+            # Detect positive zero crossing (rising edge)
+            if previous < 0 and current >= 0:
+                self.IR_AC_Max = signalMax
+                self.IR_AC_Min = signalMin
+                positiveEdge = 1
+                negativeEdge = 0
+                swing = signalMax - signalMin
+                signalMax = 0
+                # Same check as checkForBeat()
+                if (swing > 20 & swing < 1000):
+                    beats.append(sampleCount)
+
+            # Detect negative zero crossing (falling edge)
+            elif previous > 0 and current <= 0:
+                positiveEdge = 0
+                negativeEdge = 1
+                signalMin = 0
+
+            if positiveEdge and current > previous:
+                signalMax = current
+            elif negativeEdge and current < previous:
+                signalMin = current
+
+        self.offset = offset
+        self.ir_avg_reg = avg
+        self.IR_Average_Estimated = estimate
+        self.IR_AC_Signal_Previous = previous
+        self.IR_AC_Signal_Current = current
+        self.IR_AC_Signal_max = signalMax
+        self.IR_AC_Signal_min = signalMin
+        self.positiveEdge = positiveEdge
+        self.negativeEdge = negativeEdge
+        self.sampleCount = sampleCount
+        return beats
+
+    def process_block(self, samples, count=None):
+        return self.processBlock(samples, count)
@@ -0,0 +1,209 @@
+#  Batch Heart Rate and SpO2 Analysis
+#
+#  Reprocesses recorded MAX3010x IR (and red) traces in one go with NumPy, for
+#  use on a server rather than on the device. NumPy is only needed by this
+#  module; nothing else in the package imports it.
+#
+#  The beat detector gives exactly the same answers as heart_rate.HeartRate
+#  fed the same samples one at a time: the same integer DC estimator, the same
+#  12 coefficient symmetric FIR (as a 23 tap convolution, starting from the
+#  same filter history) and the same zero crossing rules, including the
+#  amplitude check as heart_rate.py evaluates it.
+#
+#  The DC estimator rounds at every step, so it can't be written as a linear
+#  filter; it runs as a plain integer loop. Everything after it is vectorized.
+#
+#  SpO2 is estimated per beat from the ratio of ratios of the red and IR
+#  signals, with the calibration curve used by Maxim's reference algorithm.
+#  As with heart_rate.py, don't use this for actual medical diagnosis.
+#
+
+FIR_COEFFS = (172, 321, 579, 927, 1360, 1858, 2390, 2916, 3391, 3768, 4012, 4096)
+
+class HeartRateBatch(object):
+    """
+    HeartRateBatch
+
+        :param sampleRate: Samples per second in the recording, after any
+            averaging the sensor did (sample rate / sample average)
+        :param rateSize: Number of beats the average heart rate is taken over
+
+        :return: The batch heart rate object.
+        :rtype: Object
+    """
+    def __init__(self, sampleRate=100, rateSize=4):
+        import numpy
+
+        self.np = numpy
+        self.sampleRate = sampleRate
+        self.rateSize = rateSize
+
+        # 23 taps, symmetric about the centre coefficient
+        self.taps = numpy.array(FIR_COEFFS + FIR_COEFFS[-2::-1], dtype=numpy.int64)
+
+        # heart_rate.HeartRate starts its FIR history as 0 to 31, so the first
+        # 22 outputs see those values as earlier samples
+        self.history = numpy.arange(32, dtype=numpy.int64)
+
+    # Average DC Estimator, over the whole trace
+    def averageDCEstimator(self, samples):
+        np = self.np
+        estimate = [0] * len(samples)
+        reg = 0
+        i = 0
+        for x in samples.tolist():
+            reg += ((x << 15) - reg) >> 4
+            estimate[i] = reg >> 15
+            i += 1
+        return np.array(estimate, dtype=np.int64)
+
+    # Low Pass FIR Filter, over the whole trace
+    def lowPassFIRFilter(self, din):
+        np = self.np
+        z = np.convolve(np.concatenate((self.history, din)), self.taps)
+        return z[32:32 + len(din)] >> 15
+
+    def filter(self, samples):
+        """
+            Removes the DC level and low pass filters a trace
+
+            :param samples: IR samples
+
+            :return: the DC estimate and the filtered AC signal
+            :rtype: tuple of numpy arrays
+        """
+        np = self.np
+        samples = np.asarray(samples, dtype=np.int64)
+        dc = self.averageDCEstimator(samples)
+        return dc, self.lowPassFIRFilter(samples - dc)
+
+    def checkForBeats(self, samples):
+        """
+            Finds the beats in a trace
+
+            :param samples: IR samples
+
+            :return: True for each sample checkForBeat() would have returned True for
+            :rtype: numpy array of bool
+        """
+        np = self.np
+        current = self.filter(samples)[1]
+        n = len(current)
+        previous = np.empty_like(current)
+        previous[:1] = 0
+        previous[1:] = current[:-1]
+        index = np.arange(n)
+
+        rising = (previous < 0) & (current >= 0)
+        falling = (previous > 0) & (current <= 0)
+
+        # Which half of the cycle each sample is in, from the last crossing
+        last = np.maximum.accumulate(np.where(rising | falling, index, -1))
+        crossed = last >= 0
+        positiveEdge = crossed & rising[last]
+        negativeEdge = crossed & falling[last]
+
+        # The signal max and min are the last value the signal rose to in the
+        # positive half, and fell to in the negative half. The crossing sample
+        # always sets them, so their resets at the crossings never show.
+        def track(updates):
+            last = np.maximum.accumulate(np.where(updates, index, -1))
+            held = np.where(last >= 0, current[last], 0)
+            before = np.empty_like(held)
+            before[:1] = 0
+            before[1:] = held[:-1]
+            return before
+
+        signalMax = track(positiveEdge & (current > previous))
+        signalMin = track(negativeEdge & (current < previous))
+
+        # heart_rate.py checks (max - min) > 20 & (max - min) < 1000, which as
+        # written means (max - min) > (20 & (max - min))
+        swing = signalMax - signalMin
+        return rising & (swing > (swing & 20))
+
+    def beatsPerMinute(self, beats):
+        """
+            Heart rate at each beat
+
+            :param beats: sample index of each beat
+
+            :return: the rate since the previous beat, and the average of the
+                last rateSize plausible (20 to 255) rates. NaN where there is none.
+            :rtype: tuple of numpy arrays, one shorter than beats
+        """
+        np = self.np
+        beats = np.asarray(beats)
+        bpm = 60.0 * self.sampleRate / np.diff(beats)
+        valid = (bpm > 20) & (bpm < 255)
+
+        rates = bpm[valid]
+        average = np.full(len(bpm), np.nan)
+        if len(rates) >= self.rateSize:
+            window = np.convolve(rates, np.ones(self.rateSize), 'valid') / self.rateSize
+            at = np.flatnonzero(valid)[self.rateSize - 1:]
+            average[at] = window
+            # hold the average until the next plausible beat
+            held = np.maximum.accumulate(np.where(np.isnan(average), -1, np.arange(len(average))))
+            average = np.where(held >= 0, average[held], np.nan)
+        return bpm, average
+
+    def spo2(self, red, ir, beats):
+        """
+            Blood oxygen saturation for each beat to beat interval
+
+            :param red: red samples, recorded alongside ir
+            :param ir: IR samples
+            :param beats: sample index of each beat
+
+            :return: SpO2 in percent for each interval, NaN where the ratio is
+                out of the calibrated range
+            :rtype: numpy array, one shorter than beats
+        """
+        np = self.np
+        red = np.asarray(red, dtype=np.float64)
+        ir = np.asarray(ir, dtype=np.float64)
+        beats = np.asarray(beats)
+        if len(beats) < 2:
+            return np.array([])
+
+        starts = beats[:-1] - beats[0]
+        lengths = np.diff(beats)
+
+        def acdc(signal):
+            signal = signal[beats[0]:beats[-1]]
+            ac = np.maximum.reduceat(signal, starts) - np.minimum.reduceat(signal, starts)
+            dc = np.add.reduceat(signal, starts) / lengths
+            return ac, dc
+
+        redAC, redDC = acdc(red)
+        irAC, irDC = acdc(ir)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (redAC / redDC) / (irAC / irDC)
+        saturation = -45.060 * ratio * ratio + 30.354 * ratio + 94.845
+        inRange = (ratio > 0.02) & (ratio < 1.84)
+        return np.where(inRange, np.minimum(saturation, 100.0), np.nan)
+
+    def analyze(self, ir, red=None):
+        """
+            Runs the whole analysis on a recording
+
+            :param ir: IR samples
+            :param red: red samples, optional, needed for SpO2
+
+            :return: beats (sample indices), times (seconds), bpm, beatAvg and,
+                with red samples, spo2
+            :rtype: dict
+        """
+        np = self.np
+        beats = np.flatnonzero(self.checkForBeats(ir))
+        bpm, average = self.beatsPerMinute(beats)
+        result = {
+            'beats': beats,
+            'times': beats / float(self.sampleRate),
+            'bpm': bpm,
+            'beatAvg': average,
+        }
+        if red is not None:
+            result['spo2'] = self.spo2(red, ir, beats)
+        return result
@@ -66,6 +66,7 @@ New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.s
 #-----------------------------------------------------------------------------
 import qwiic_i2c
 import time
+from array import array
 
 from . import heart_rate
 hr = heart_rate.HeartRate()
@@ -232,13 +233,17 @@ class QwiicMax3010x(object):
     
     # Storage size
     # (This is "left over" from the arduino library, but needed for rollovers) 
-    # Each long is 4 bytes so limit this to fit on your micro
-    STORAGE_SIZE = 4
+    # Each long is 4 bytes so limit this to fit on your micro. Big enough to
+    # hold a whole drained FIFO (32 samples) plus what the caller hasn't
+    # consumed yet.
+    STORAGE_SIZE = 64
 
-    # Circular buffer of readings from the sensor
-    red = [0,0,0,0] # place holders to make this list 4 spaces long (to mimic previous struct arrays in arduino library)
-    IR = [0,0,0,0]
-    green = [0,0,0,0]
+    # Largest single read from the FIFO. A full FIFO is 288 bytes (32 samples *
+    # 3 LEDs * 3 bytes); lower this on platforms that can't read that much
+    # in one transaction.
+    FIFO_READ_SIZE = 288
+
+    # Circular buffer of readings from the sensor (created per instance)
     head = 0
     tail = 0
 
@@ -253,6 +258,25 @@ class QwiicMax3010x(object):
         # Did the user specify an I2C address?
         self.address = address if address is not None else self.available_addresses[0]
 
+        # FIFO read buffer for check(), big enough for a full FIFO (32 samples * 3 LEDs * 3 bytes)
+        self._fifo = bytearray(288)
+
+        # FIFO write pointer, overflow counter and read pointer, read together
+        self._pointers = bytearray(3)
+
+        # Circular buffers of readings from the sensor
+        self.red = array('L', [0] * self.STORAGE_SIZE)
+        self.IR = array('L', [0] * self.STORAGE_SIZE)
+        self.green = array('L', [0] * self.STORAGE_SIZE)
+
+        # Interrupt driven mode, see enableInterruptMode()
+        self._int_mask = 0
+        self._int_pin = None
+
+        # Set by setup(): the sample rate and averaging, for timing FIFO samples
+        self.sampleRate = 0
+        self.sampleAverage = 1
+
         # load the I2C driver if one isn't provided
 
         if i2c_driver is None:
@@ -263,6 +287,13 @@ class QwiicMax3010x(object):
         else:
             self._i2c = i2c_driver
 
+        # Shadow of the configuration registers, so bit_mask() is a single
+        # write. The reset bit in MODECONFIG clears itself.
+        self._regs = qwiic_i2c.RegisterCache(self._i2c, self.address)
+        self._regs.cacheable(MAX30105_INTENABLE1, MAX30105_INTENABLE2, MAX30105_FIFOCONFIG,
+                             MAX30105_PARTICLECONFIG, MAX30105_MULTILEDCONFIG1, MAX30105_MULTILEDCONFIG2)
+        self._regs.volatile(MAX30105_MODECONFIG, MAX30105_RESET)
+
     # ----------------------------------
     # isConnected()
     #
@@ -316,16 +347,10 @@ class QwiicMax3010x(object):
 
         """
 
-        # Grab current register context, store it in local variable "temp_reg"
-        temp_reg = self._i2c.readByte(self.address, reg)
-
-        # Zero-out the portions of the register we're interested in
-        temp_reg &= mask
-
-        # Change contents
-        temp_reg |= thing
-
-        return self._i2c.writeByte(self.address, reg, temp_reg)
+        # Zero-out the portions of the register we're interested in and change
+        # the contents. The current register context comes from the register
+        # cache when we've seen it before.
+        return self._regs.update(reg, mask, thing)
 
     # ----------------------------------
     # millis()
@@ -364,6 +389,7 @@ class QwiicMax3010x(object):
         while (timeout):
             response = self._i2c.readByte(self.address, MAX30105_MODECONFIG)
             if ((response & MAX30105_RESET) == 0):
+                self._regs.invalidate() # All registers are back to their defaults
                 return True # We're done!
             time.sleep(0.001) # Let's not over burden the I2C bus
             timeout -= 1
@@ -403,6 +429,54 @@ class QwiicMax3010x(object):
         """
         return self._i2c.readByte(self.address, MAX30105_INTSTAT2)
 
+    # ----------------------------------
+    # enableInterruptMode()
+    #
+    # Let check() wait for the sensor's interrupt instead of polling the FIFO pointers
+
+    def enableInterruptMode(self, almostFull=None, pin=None):
+        """
+            Switch check() to interrupt driven draining. check() then returns 0
+            straight away until the sensor raises its interrupt, and drains the
+            whole FIFO in one read when it does.
+
+            :param almostFull: number of unread samples (17-32) that raises the
+                almost full interrupt. If None the data ready interrupt is used,
+                raised for every new sample.
+            :param pin: optional input pin (anything with a value() method) wired to
+                the INT output. If given, waiting costs no I2C traffic at all;
+                otherwise the interrupt status register is read.
+
+            :return: no return value
+        """
+        if almostFull is None:
+            self.disableAFULL()
+            self.enableDATARDY()
+            self._int_mask = MAX30105_INT_DATA_RDY_ENABLE
+        else:
+            self.setFIFOThreshold(almostFull)
+            self.disableDATARDY()
+            self.enableAFULL()
+            self._int_mask = MAX30105_INT_A_FULL_ENABLE
+        self._int_pin = pin
+        self.getINT1() # Clear anything already pending
+
+    # ----------------------------------
+    # disableInterruptMode()
+    #
+    # Go back to polling the FIFO pointers
+
+    def disableInterruptMode(self):
+        """
+            Switch check() back to polling the FIFO pointers
+
+            :return: no return value
+        """
+        self.disableAFULL()
+        self.disableDATARDY()
+        self._int_mask = 0
+        self._int_pin = None
+
     # ----------------------------------
     # enableAFULL()
     #
@@ -755,8 +829,8 @@ class QwiicMax3010x(object):
 
             :return: no return value
         """
-        self._i2c.writeByte(self.address, MAX30105_MULTILEDCONFIG1, 0)
-        self._i2c.writeByte(self.address, MAX30105_MULTILEDCONFIG2, 0)
+        self._regs.write(MAX30105_MULTILEDCONFIG1, 0)
+        self._regs.write(MAX30105_MULTILEDCONFIG2, 0)
 
     #
     # FIFO Configuration
@@ -836,6 +910,20 @@ class QwiicMax3010x(object):
         """
         self.bit_mask(MAX30105_FIFOCONFIG, MAX30105_A_FULL_MASK, numberOfSamples)
 
+    # Set the number of unread samples in the FIFO that triggers the almost full
+    # interrupt, 17 to 32
+
+    def setFIFOThreshold(self, samples):
+        """
+            Set the number of unread samples that triggers the almost full interrupt
+
+            :param samples: 17 to 32
+
+            :return: no return value
+        """
+        samples = min(max(samples, 17), 32)
+        self.setFIFOAlmostFull(32 - samples)
+
     # 
     # getWritePointer()
     # 
@@ -910,6 +998,7 @@ class QwiicMax3010x(object):
             self.setFIFOAverage(MAX30105_SAMPLEAVG_32)
         else:
             self.setFIFOAverage(MAX30105_SAMPLEAVG_4)
+        self.sampleAverage = sampleAverage if sampleAverage in (1, 2, 4, 8, 16, 32) else 4
 
         # setFIFOAlmostFull(2) # Set to 30 samples to trigger an 'Almost Full' interrupt
         self.enableFIFORollover() # Allow FIFO to wrap/roll over
@@ -957,6 +1046,10 @@ class QwiicMax3010x(object):
             self.setSampleRate(MAX30105_SAMPLERATE_3200)
         else:
             self.setSampleRate(MAX30105_SAMPLERATE_50)
+        self.sampleRate = 50 # The rate actually set, for timing the samples
+        for rate in (100, 200, 400, 800, 1000, 1600, 3200):
+            if rate <= sampleRate <= 3200:
+                self.sampleRate = rate
 
         # The longer the pulse width the longer range of detection you'll have
         # At 69us and 0.4mA it's about 2 inches
@@ -1034,7 +1127,7 @@ class QwiicMax3010x(object):
 
             :return: no return value
         """
-        if self.available(): #Only advance the tail if new data is available
+        if self.head != self.tail: #Only advance the tail if new data is available
             self.tail += 1
             self.tail %= self.STORAGE_SIZE #Wrap condition
 
@@ -1056,98 +1149,72 @@ class QwiicMax3010x(object):
             :rtype: integer
         """
 
+        # In interrupt mode there's nothing to do until the sensor says so
+        if self._int_mask:
+            if self._int_pin is not None:
+                if self._int_pin.value(): # INT is active low
+                    return 0
+            elif not (self.getINT1() & self._int_mask):
+                return 0
+
         # Read register FIDO_DATA (3-byte * number of active LED)
         # Until FIFO_RD_PTR = FIFO_WR_PTR
 
-        readPointer = self.getReadPointer()
-        writePointer = self.getWritePointer()
-        numberOfSamples = 0
-
-        #Do we have new data?
-        if readPointer != writePointer:
-            #Calculate the number of samples we need to get from sensor
-            numberOfSamples = (writePointer - readPointer)
-            if (numberOfSamples < 0):
-                numberOfSamples += 32 #Wrap condition
-                
-            #We now have the number of samples, now calc bytes to read
-            bytesToRead = numberOfSamples * self.activeLEDs * 3
-
-            # We may need to read as many as 288 bytes (32 * 3 * 3), but not all
-            # platforms can read that much in one go. So we read in blocks until
-            # we reach the end.
-            maxReadSize = 32
-            buff = []
-            while bytesToRead > 0:
-                # Compute how many bytes we need to read in this loop iteration
-                bytesToReadThisTime = bytesToRead
-                if bytesToReadThisTime > maxReadSize:
-                    bytesToReadThisTime = maxReadSize
-                
-                # Update number of bytes remaining
-                bytesToRead -= bytesToReadThisTime
-
-                # Read from FIFO and append to buffer
-                buff += self._i2c.readBlock(self.address, MAX30105_FIFODATA, bytesToReadThisTime)
-            
-            # Grab all the bytes we just read into buff, and plug them into the correct local variables.
-            # Note, we need to keep track of where we are in the buff (using sampleNumber and buffIndex "i")
-            # Also, the bytes in buff will mean different things,
-            # according to which LEDs are active (Red, IR, and/or Green)
-
-            # for loop through the entire buff list,
-            # using sampleNumber to "jump" buffIndex as necessary to each sample start within buff
-            for sampleNumber in range(0, numberOfSamples):
-                buffIndex = sampleNumber * self.activeLEDs * 3 # move index to the start of the next sample
-                self.head += 1 # Advance the head of the storage list
-                self.head %= self.STORAGE_SIZE # Wrap condition
-
-                # First 3 bytes in buff will always be RED
-                tempByte2 = buff[buffIndex+0]
-                tempByte1 = buff[buffIndex+1]
-                tempByte0 = buff[buffIndex+2]
-
-                #also copy to varaibles for testing
-                #self.byte0 = tempByte0
-                #self.byte1 = tempByte1
-                #self.byte2 = tempByte2
-
-                # Combine bytes into single 32 bit integer variable
-                tempLong = 0
-                tempLong |= tempByte0
-                tempLong |= (tempByte1 << 8) 
-                tempLong |= (tempByte2 << 16)
-                tempLong &= 0x3FFFF # Zero out all but 18 bits
-                self.red[self.head] = tempLong # Store this reading into the red list at head
-                #self.red[self.head] = tempByte0 # Store this reading into the red list at head
-
-                if (self.activeLEDs > 1):
-                    # Next 3 bytes in buff will be IR
-                    tempByte2 = buff[buffIndex+3]
-                    tempByte1 = buff[buffIndex+4]
-                    tempByte0 = buff[buffIndex+5]
-
-                    # Combine bytes into single 32 bit integer variable
-                    tempLong = 0
-                    tempLong |= tempByte0
-                    tempLong |= (tempByte1 << 8) 
-                    tempLong |= (tempByte2 << 16)
-                    tempLong &= 0x3FFFF # Zero out all but 18 bits
-                    self.IR[self.head] = tempLong # Store this reading into the IR list at head                    
-
-                if (self.activeLEDs > 2):
-                    # Next 3 bytes in buff will be GREEN
-                    tempByte2 = buff[buffIndex+6]
-                    tempByte1 = buff[buffIndex+7]
-                    tempByte0 = buff[buffIndex+8]
-
-                    # Combine bytes into single 32 bit integer variable
-                    tempLong = 0
-                    tempLong |= tempByte0
-                    tempLong |= (tempByte1 << 8) 
-                    tempLong |= (tempByte2 << 16)
-                    tempLong &= 0x3FFFF # Zero out all but 18 bits
-                    self.green[self.head] = tempLong # Store this reading into the IR list at head          
+        # The write pointer, overflow counter and read pointer are consecutive
+        # registers, so get them in one read
+        pointers = self._pointers
+        self._i2c.readBlockInto(self.address, MAX30105_FIFOWRITEPTR, pointers)
+        writePointer = pointers[0]
+        readPointer = pointers[2]
+
+        #Calculate the number of samples we need to get from sensor
+        numberOfSamples = (writePointer - readPointer) & 0x1F #Wrap condition
+        if numberOfSamples == 0 and pointers[1]:
+            numberOfSamples = 32 # The FIFO overflowed, so it's full
+
+        activeLEDs = self.activeLEDs
+        if numberOfSamples == 0 or activeLEDs == 0:
+            return 0
+
+        #We now have the number of samples, now calc bytes to read
+        bytesToRead = numberOfSamples * activeLEDs * 3
+
+        # Read the FIFO into the buffer, in as few reads as the platform allows
+        maxReadSize = self.FIFO_READ_SIZE
+        buff = self._fifo
+        offset = 0
+        while offset < bytesToRead:
+            bytesToReadThisTime = min(bytesToRead - offset, maxReadSize)
+            self._i2c.readBlockInto(self.address, MAX30105_FIFODATA, buff, offset, bytesToReadThisTime)
+            offset += bytesToReadThisTime
+
+        # Unpack the 18 bit samples into the ring buffers. The bytes of each
+        # sample are red, then IR, then green, depending on the active LEDs.
+        red = self.red
+        ir = self.IR
+        green = self.green
+        size = self.STORAGE_SIZE
+        head = self.head
+        tail = self.tail
+        i = 0
+        for _ in range(numberOfSamples):
+            head += 1
+            if head == size:
+                head = 0 # Wrap condition
+            if head == tail:
+                tail += 1 # Full, drop the oldest unread sample
+                if tail == size:
+                    tail = 0
+
+            red[head] = ((buff[i] << 16) | (buff[i+1] << 8) | buff[i+2]) & 0x3FFFF
+            if activeLEDs > 1:
+                ir[head] = ((buff[i+3] << 16) | (buff[i+4] << 8) | buff[i+5]) & 0x3FFFF
+                if activeLEDs > 2:
+                    green[head] = ((buff[i+6] << 16) | (buff[i+7] << 8) | buff[i+8]) & 0x3FFFF
+            i += activeLEDs * 3
+
+        self.head = head
+        self.tail = tail
 
         return numberOfSamples #Let the world know how much new data we found
 
@@ -1392,3 +1459,14 @@ class QwiicMax3010x(object):
             :rtype: boolean
         """
         return hr.checkForBeat(sample)
+
+    def processBlock(self, samples, count=None):
+        """
+            Wrapper function to allow access to function within supporting heart_rate.py file
+
+            :param samples: IR samples
+            :param count: number of samples to use, default all of them
+            :return: the sample number of each beat detected
+            :rtype: list
+        """
+        return hr.processBlock(samples, count)
@@ -51,6 +51,7 @@ New to Qwiic? Take a look at the entire [SparkFun Qwiic ecosystem](https://www.s
 # platform, check it out here: https://github.com/sparkfun/Qwiic_I2C_Py
 import qwiic_i2c
 import time
+import math
 
 # Define the device name and I2C addresses. These are set in the class defintion
 # as class variables, making them avilable without having to create a class
@@ -125,14 +126,6 @@ class QwiicMMC5983MA(object):
     XYZ_0_SHIFT = 10
     XYZ_1_SHIFT = 2
 
-    # Local copy of control registers
-    class MemoryShadow:
-        def __init__(self):
-            self.internal_control_0 = 0x0
-            self.internal_control_1 = 0x0
-            self.internal_control_2 = 0x0
-            self.internal_control_3 = 0x0
-
     def __init__(self, address=None, i2c_driver=None):
         """
         Constructor
@@ -148,6 +141,9 @@ class QwiicMMC5983MA(object):
         # Use address if provided, otherwise pick the default
         self.address = self.available_addresses[0] if address is None else address
 
+        # Buffer for read_fields_xyz(), reused for every measurement
+        self._xyz = bytearray(7)
+
         # Load the I2C driver if one isn't provided
         if i2c_driver is None:
             self._i2c = qwiic_i2c.getI2CDriver()
@@ -162,8 +158,15 @@ class QwiicMMC5983MA(object):
         self.y_offset = 2**17
         self.z_offset = 2**17
 
-        # Initialize shadow registers
-        self.memory_shadow = self.MemoryShadow()
+        # Hard and soft iron calibration for read_heading(), identity until
+        # set_calibration() or fit_calibration()
+        self.hard_iron = (0.0, 0.0, 0.0)
+        self.soft_iron = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+
+        # Initialize shadow registers. The control registers are write-only,
+        # so the shadow is the only place their value can be read from
+        self._regs = qwiic_i2c.RegisterCache(self._i2c, self.address)
+        self._reset_shadow()
 
         # Calibrate offsets
         self.calibrate_offsets()
@@ -225,6 +228,14 @@ class QwiicMMC5983MA(object):
         reg_value = self._i2c.readByte(self.address, register_address)
         self._i2c.writeByte(self.address, register_address, reg_value | bit_mask)
 
+    def _reset_shadow(self):
+        """
+        Sets the shadow registers to the control registers' power-on value
+        """
+        for register_address in (self.INT_CTRL_0_REG, self.INT_CTRL_1_REG,
+                                 self.INT_CTRL_2_REG, self.INT_CTRL_3_REG):
+            self._regs.preset(register_address, 0x0)
+
     def set_shadow_bit(self, register_address, bit_mask, do_write = True):
         """
         Sets a bit in the shadow register and optionally writes the value to the
@@ -239,25 +250,15 @@ class QwiicMMC5983MA(object):
         :return: `True` if successful, otherwise `False`
         :rtype: bool
         """
-        shadow_register = None
-
-        # Which register are we referring to?
-        if register_address == self.INT_CTRL_0_REG:
-            shadow_register = self.memory_shadow.internal_control_0
-        elif register_address == self.INT_CTRL_1_REG:
-            shadow_register = self.memory_shadow.internal_control_1
-        elif register_address == self.INT_CTRL_2_REG:
-            shadow_register = self.memory_shadow.internal_control_2
-        elif register_address == self.INT_CTRL_3_REG:
-            shadow_register = self.memory_shadow.internal_control_3
-        
-        if shadow_register is not None:
-            shadow_register |= bit_mask
-            if do_write:
-                self._i2c.writeByte(self.address, register_address, shadow_register)
-            return True
+        # Only the control registers are shadowed
+        if register_address < self.INT_CTRL_0_REG or register_address > self.INT_CTRL_3_REG:
+            return False
 
-        return False
+        if do_write:
+            self._regs.update(register_address, 0xFF, bit_mask)
+        else:
+            self._regs.preset(register_address, self._regs.read(register_address) | bit_mask)
+        return True
 
     def clear_shadow_bit(self, register_address, bit_mask, do_write = True):
         """
@@ -273,25 +274,15 @@ class QwiicMMC5983MA(object):
         :return: `True` if successful, otherwise `False`
         :rtype: bool
         """
-        shadow_register = None
-
-        # Which register are we referring to?
-        if register_address == self.INT_CTRL_0_REG:
-            shadow_register = self.memory_shadow.internal_control_0
-        elif register_address == self.INT_CTRL_1_REG:
-            shadow_register = self.memory_shadow.internal_control_1
-        elif register_address == self.INT_CTRL_2_REG:
-            shadow_register = self.memory_shadow.internal_control_2
-        elif register_address == self.INT_CTRL_3_REG:
-            shadow_register = self.memory_shadow.internal_control_3
-
-        if shadow_register is not None:
-            shadow_register &= ~bit_mask
-            if do_write:
-                self._i2c.writeByte(self.address, register_address, shadow_register)
-            return True
+        # Only the control registers are shadowed
+        if register_address < self.INT_CTRL_0_REG or register_address > self.INT_CTRL_3_REG:
+            return False
 
-        return False
+        if do_write:
+            self._regs.update(register_address, ~bit_mask & 0xFF, 0x0)
+        else:
+            self._regs.preset(register_address, self._regs.read(register_address) & ~bit_mask)
+        return True
 
     def is_shadow_bit_set(self, register_address, bit_mask):
         """
@@ -304,17 +295,11 @@ class QwiicMMC5983MA(object):
         :return: `True` if bit is set, otherwise `False`
         :rtype: bool
         """
-        # Which register are we referring to?
-        if register_address == self.INT_CTRL_0_REG:
-            return bool(self.memory_shadow.internal_control_0 & bit_mask)
-        elif register_address == self.INT_CTRL_1_REG:
-            return bool(self.memory_shadow.internal_control_1 & bit_mask)
-        elif register_address == self.INT_CTRL_2_REG:
-            return bool(self.memory_shadow.internal_control_2 & bit_mask)
-        elif register_address == self.INT_CTRL_3_REG:
-            return bool(self.memory_shadow.internal_control_3 & bit_mask)
+        # Only the control registers are shadowed
+        if register_address < self.INT_CTRL_0_REG or register_address > self.INT_CTRL_3_REG:
+            return False
 
-        return False
+        return bool(self._regs.read(register_address) & bit_mask)
 
     def get_temperature(self):
         """
@@ -365,7 +350,8 @@ class QwiicMMC5983MA(object):
         # always seems to read as 1...? I don't know why.
         success = self.set_shadow_bit(self.INT_CTRL_1_REG, self.SW_RST)
 
-        self.clear_shadow_bit(self.INT_CTRL_1_REG, self.SW_RST, False) # Clear the bit - in shadow memory only
+        # The reset puts every control register back to 0
+        self._reset_shadow()
 
         # The reset time is 10 msec. but we'll wait 15 msec. just in case.
         time.sleep(0.015)
@@ -579,10 +565,10 @@ class QwiicMMC5983MA(object):
 
         if bandwidth == 800:
             success = self.set_shadow_bit(self.INT_CTRL_1_REG, self.BW1)
-            success &= self.clear_shadow_bit(self.INT_CTRL_1_REG, self.BW0)
+            success &= self.set_shadow_bit(self.INT_CTRL_1_REG, self.BW0)
         elif bandwidth == 400:
             success = self.set_shadow_bit(self.INT_CTRL_1_REG, self.BW1)
-            success &= self.set_shadow_bit(self.INT_CTRL_1_REG, self.BW0)
+            success &= self.clear_shadow_bit(self.INT_CTRL_1_REG, self.BW0)
         elif bandwidth == 200:
             success = self.clear_shadow_bit(self.INT_CTRL_1_REG, self.BW1)
             success &= self.set_shadow_bit(self.INT_CTRL_1_REG, self.BW0)
@@ -605,9 +591,9 @@ class QwiicMMC5983MA(object):
 
         # Determine the corresponding bandwidth based on the bit values
         if bw1 and not bw0:
-            return 200
-        elif not bw1 and bw0:
             return 400
+        elif not bw1 and bw0:
+            return 200
         elif bw1 and bw0:
             return 800
         else:
@@ -825,7 +811,7 @@ class QwiicMMC5983MA(object):
         # memory contents and return the corresponding period.
 
         # Remove unwanted bits
-        register_value = self.memory_shadow.internal_control_2 & 0x70
+        register_value = self._regs.read(self.INT_CTRL_2_REG) & 0x70
         period = 1
 
         if register_value == 0x10:
@@ -1098,17 +1084,21 @@ class QwiicMMC5983MA(object):
         # Return False if a timeout or a read error occurred
         return self.read_fields_xyz()
 
-    def read_fields_xyz(self):
+    def read_fields_xyz(self, data = None):
         """
         Internal function to get the raw x, y, and z-axis measurements, should
         not be called directly
 
+        :param data: The 7 output registers, already read, defaults to None,
+        which reads them
+        :type data: bytearray, optional
         :return: Raw x, y, and z-axis measurements, 18-bit unsigned integers
         :rtype: tuple(int, int, int)
         """
-        register_values = [0] * 7
-
-        register_values = self._i2c.readBlock(self.address, self.X_OUT_0_REG, 7)
+        register_values = data
+        if register_values is None:
+            register_values = self._xyz
+            self._i2c.readBlockInto(self.address, self.X_OUT_0_REG, register_values)
 
         x = register_values[0]  # Xout[17:10]
         x = (x << 8) | register_values[1]  # Xout[9:2]
@@ -1262,3 +1252,374 @@ class QwiicMMC5983MA(object):
         z_gauss = z_zeroed * gains[2] / 131072
 
         return x_gauss, y_gauss, z_gauss
+
+    def add_to_plan(self, plan):
+        """
+        Adds the x, y, and z-axis output registers to a ReadPlan, so they are
+        read along with the other devices' registers. Pass the plan's view of
+        them to read_field_gauss() or read_heading() after each run. Only
+        useful in continuous mode, where the registers hold the latest
+        measurement.
+
+        :param plan: The read plan
+        :type plan: qwiic_i2c.ReadPlan
+        :return: Handle of the read in the plan
+        :rtype: int
+        """
+        return plan.add(self.address, self.X_OUT_0_REG, len(self._xyz))
+
+    def read_field_gauss(self, data = None):
+        """
+        Gets the x, y, and z-axis field in gauss from a single measurement, with
+        the hard and soft iron calibration applied. In continuous mode this is
+        just a read of the latest measurement.
+
+        :param data: The output registers from a ReadPlan run, see
+        add_to_plan(), defaults to None, which reads the sensor
+        :type data: memoryview, optional
+        :return: x, y, and z-axis field in gauss, or `False` on timeout
+        :rtype: tuple(float, float, float)
+        """
+        if data is None and not self.is_continuous_mode_enabled():
+            # Start the measurement, see get_measurement_xyz()
+            if not self.set_shadow_bit(self.INT_CTRL_0_REG, self.TM_M):
+                self.clear_shadow_bit(self.INT_CTRL_0_REG, self.TM_M, False)
+                return False
+
+            # Sleep through the measurement time (8/4/2/1ms, from the
+            # bandwidth) before checking it's done, so it's usually one check
+            measurement_time = 800 // self.get_filter_bandwidth()
+            time.sleep(measurement_time / 1000)
+            time_out = measurement_time * 3 + 1
+            while (not self.is_bit_set(self.STATUS_REG, self.MEAS_M_DONE)) and (time_out > 0):
+                time.sleep(0.001)
+                time_out -= 1
+
+            self.clear_shadow_bit(self.INT_CTRL_0_REG, self.TM_M, False)  # Clear the bit - in shadow memory only
+
+            if time_out == 0:
+                return False
+
+        x_raw, y_raw, z_raw = self.read_fields_xyz(data)
+
+        # Zero and scale to gauss, then remove the hard iron offset
+        # Raw value is 18 bit, so divide by 2^17 = 131072 (half of full range)
+        x = (x_raw - self.x_offset) * 8 / 131072 - self.hard_iron[0]
+        y = (y_raw - self.y_offset) * 8 / 131072 - self.hard_iron[1]
+        z = (z_raw - self.z_offset) * 8 / 131072 - self.hard_iron[2]
+
+        # And correct the soft iron distortion
+        m = self.soft_iron
+        return (m[0][0] * x + m[0][1] * y + m[0][2] * z,
+                m[1][0] * x + m[1][1] * y + m[1][2] * z,
+                m[2][0] * x + m[2][1] * y + m[2][2] * z)
+
+    def read_heading(self, accel = None, data = None):
+        """
+        Gets the compass heading from a single measurement of all axes
+
+        :param accel: x, y, and z-axis acceleration (any unit) from an
+        accelerometer aligned with the magnetometer, to correct for tilt.
+        Defaults to None, which assumes the sensor is level.
+        :type accel: tuple(float, float, float), optional
+        :param data: The output registers from a ReadPlan run, see
+        read_field_gauss()
+        :type data: memoryview, optional
+        :return: Heading in degrees, 0 to 360, or `False` on timeout
+        :rtype: float
+        """
+        field = self.read_field_gauss(data)
+        if not field:
+            return False
+        x, y, z = field
+
+        if accel is not None:
+            # Rotate the field back to the horizontal plane
+            ax, ay, az = accel
+            roll = math.atan2(ay, az)
+            pitch = math.atan2(-ax, math.sqrt(ay * ay + az * az))
+            sin_roll = math.sin(roll)
+            cos_roll = math.cos(roll)
+            x, y = (x * math.cos(pitch) + (y * sin_roll + z * cos_roll) * math.sin(pitch),
+                    y * cos_roll - z * sin_roll)
+
+        heading = math.degrees(math.atan2(x, -y))
+        if heading < 0:
+            heading += 360
+        return heading
+
+    def stream_xyz(self, frequency = 100, count = None, pin = None, set_interval = 1000):
+        """
+        Streams raw x, y, and z-axis measurements in continuous mode. Each
+        measurement is read once, when the measurement done flag (or the INT
+        pin) says it's ready; in between the generator sleeps. Stopping the
+        generator (or a timeout) takes the sensor out of continuous mode.
+
+        :param frequency: Measurement frequency in Hz, can be 1, 10, 20, 50,
+        100, 200, or 1000. The filter bandwidth is set to the narrowest that
+        keeps up.
+        :type frequency: int, optional
+        :param count: Number of measurements, defaults to None, which streams
+        until the generator is closed
+        :type count: int, optional
+        :param pin: Input pin (anything with a value() method) wired to the
+        INT output, defaults to None, which polls the status register instead
+        :type pin: Pin, optional
+        :param set_interval: Measurements between automatic SET operations,
+        can be 1, 25, 75, 100, 250, 500, 1000, or 2000. None turns periodic
+        SET off.
+        :type set_interval: int, optional
+        :return: Raw x, y, and z-axis measurements, 18-bit unsigned integers
+        :rtype: generator of tuple(int, int, int)
+        """
+        # The measurement has to fit in the period: 8ms at 100Hz bandwidth,
+        # 4ms at 200Hz, 0.5ms at 800Hz, which 1000Hz needs
+        if frequency <= 100:
+            self.set_filter_bandwidth(100)
+        elif frequency <= 200:
+            self.set_filter_bandwidth(200)
+        else:
+            self.set_filter_bandwidth(800)
+
+        # Let the sensor keep itself SET
+        if set_interval is None:
+            self.disable_periodic_set()
+        else:
+            self.enable_automatic_set_reset()
+            self.set_periodic_set_samples(set_interval)
+            self.enable_periodic_set()
+
+        if pin is not None:
+            self.enable_interrupt()
+        if not self.set_continuous_mode_frequency(frequency):
+            return
+        self.clear_meas_done_interrupt(self.MEAS_M_DONE)
+        self.enable_continuous_mode()
+
+        # Check 4 times a period, give up after 10 periods without data
+        poll = 0.25 / frequency
+        read_fields = self.read_fields_xyz
+        i2c = self._i2c
+        try:
+            n = 0
+            while count is None or n < count:
+                time_out = 40
+                while time_out > 0:
+                    if pin is not None:
+                        if pin.value():
+                            break
+                    elif i2c.readByte(self.address, self.STATUS_REG) & self.MEAS_M_DONE:
+                        break
+                    time.sleep(poll)
+                    time_out -= 1
+                if time_out == 0:
+                    return
+
+                xyz = read_fields()
+                # Writing 1 clears the flag (and the INT pin) for the next one
+                i2c.writeByte(self.address, self.STATUS_REG, self.MEAS_M_DONE)
+                n += 1
+                yield xyz
+        finally:
+            self.disable_continuous_mode()
+            self.set_continuous_mode_frequency(0)
+            if pin is not None:
+                self.disable_interrupt()
+
+    def stream(self, callback, frequency = 100, count = None, pin = None, set_interval = 1000):
+        """
+        Streams raw x, y, and z-axis measurements in continuous mode to a
+        callback, see stream_xyz()
+
+        :param callback: Called with x, y, and z for each measurement, returns
+        `False` to stop the stream
+        :type callback: function
+        :return: Number of measurements streamed
+        :rtype: int
+        """
+        n = 0
+        stream = self.stream_xyz(frequency, count, pin, set_interval)
+        try:
+            for x, y, z in stream:
+                n += 1
+                if callback(x, y, z) is False:
+                    break
+        finally:
+            stream.close()
+        return n
+
+    def set_calibration(self, hard_iron, soft_iron = None):
+        """
+        Sets the hard and soft iron calibration used by read_field_gauss() and
+        read_heading()
+
+        :param hard_iron: x, y, and z-axis offsets in gauss
+        :type hard_iron: tuple(float, float, float)
+        :param soft_iron: 3x3 correction matrix, rows of 3, defaults to None,
+        which is the identity
+        :type soft_iron: tuple(tuple(float, float, float)), optional
+        """
+        if soft_iron is None:
+            soft_iron = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+        self.hard_iron = tuple(hard_iron)
+        self.soft_iron = tuple(tuple(row) for row in soft_iron)
+
+    def get_calibration(self):
+        """
+        Gets the hard and soft iron calibration
+
+        :return: Hard iron offsets and soft iron matrix
+        :rtype: tuple
+        """
+        return self.hard_iron, self.soft_iron
+
+    def fit_calibration(self, samples):
+        """
+        Fits the hard and soft iron calibration to field samples taken while
+        turning the sensor through as many orientations as possible, and
+        stores it. Collect the samples with the calibration reset, e.g. from
+        read_field_gauss() after set_calibration((0, 0, 0)).
+
+        The samples should lie on an ellipsoid; the fit finds its centre (the
+        hard iron offset) and the matrix that maps it back onto a sphere of
+        the same average radius (the soft iron correction).
+
+        :param samples: x, y, and z-axis fields in gauss, at least 9
+        :type samples: list(tuple(float, float, float))
+        :return: Hard iron offsets and soft iron matrix, or `False` if the
+        samples don't describe an ellipsoid
+        :rtype: tuple
+        """
+        n = len(samples)
+        if n < 9:
+            return False
+
+        # Centre and scale the samples to about unit radius, which keeps the
+        # fit well conditioned in single precision floats
+        mx = sum(v[0] for v in samples) / n
+        my = sum(v[1] for v in samples) / n
+        mz = sum(v[2] for v in samples) / n
+        scale = math.sqrt(sum((v[0] - mx) ** 2 + (v[1] - my) ** 2 + (v[2] - mz) ** 2 for v in samples) / n)
+        if scale == 0:
+            return False
+
+        # Least squares fit of
+        # a x^2 + b y^2 + c z^2 + 2d xy + 2e xz + 2f yz + 2g x + 2h y + 2i z = 1
+        # through its normal equations, accumulated one sample at a time
+        ata = [[0.0] * 9 for _ in range(9)]
+        atb = [0.0] * 9
+        for v in samples:
+            x = (v[0] - mx) / scale
+            y = (v[1] - my) / scale
+            z = (v[2] - mz) / scale
+            row = (x * x, y * y, z * z, 2 * x * y, 2 * x * z, 2 * y * z, 2 * x, 2 * y, 2 * z)
+            for j in range(9):
+                rj = row[j]
+                atb[j] += rj
+                ata_j = ata[j]
+                for k in range(j, 9):
+                    ata_j[k] += rj * row[k]
+        for j in range(9):
+            for k in range(j):
+                ata[j][k] = ata[k][j]
+        p = self._solve(ata, atb)
+        if not p:
+            return False
+
+        a, b, c, d, e, f, g, h, i = p
+        quadric = [[a, d, e], [d, b, f], [e, f, c]]
+
+        # Centre of the ellipsoid: quadric * centre = -(g, h, i)
+        centre = self._solve([row[:] for row in quadric], [-g, -h, -i])
+        if not centre:
+            return False
+
+        # Normalise to (v - centre)' Q (v - centre) = 1
+        k = 1 + sum(centre[j] * sum(quadric[j][l] * centre[l] for l in range(3)) for j in range(3))
+        if k <= 0:
+            return False
+        quadric = [[quadric[j][l] / k for l in range(3)] for j in range(3)]
+
+        # The correction is the square root of Q, scaled so the corrected
+        # field keeps the ellipsoid's mean radius
+        values, vectors = self._eigen_symmetric(quadric)
+        if min(values) <= 0:
+            return False
+        radius = (values[0] * values[1] * values[2]) ** (-1.0 / 6)
+        roots = [math.sqrt(value) * radius for value in values]
+        soft_iron = tuple(tuple(sum(vectors[j][m] * roots[m] * vectors[l][m] for m in range(3)) for l in range(3)) for j in range(3))
+
+        # Back to gauss: the matrix doesn't change with the scale of the
+        # samples, the offset does
+        hard_iron = (mx + centre[0] * scale, my + centre[1] * scale, mz + centre[2] * scale)
+
+        self.set_calibration(hard_iron, soft_iron)
+        return self.hard_iron, self.soft_iron
+
+    def _solve(self, a, b):
+        """
+        Internal function, solves a x = b by Gaussian elimination with partial
+        pivoting. a and b are modified.
+
+        :return: x, or `None` if a is singular
+        :rtype: list(float)
+        """
+        n = len(b)
+        for col in range(n):
+            pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+            if abs(a[pivot][col]) < 1e-12:
+                return None
+            a[col], a[pivot] = a[pivot], a[col]
+            b[col], b[pivot] = b[pivot], b[col]
+            for r in range(col + 1, n):
+                factor = a[r][col] / a[col][col]
+                if factor:
+                    for c in range(col, n):
+                        a[r][c] -= factor * a[col][c]
+                    b[r] -= factor * b[col]
+        x = [0.0] * n
+        for r in range(n - 1, -1, -1):
+            x[r] = (b[r] - sum(a[r][c] * x[c] for c in range(r + 1, n))) / a[r][r]
+        return x
+
+    def _eigen_symmetric(self, m):
+        """
+        Internal function, eigen decomposition of a symmetric 3x3 matrix by
+        Jacobi rotations
+
+        :return: Eigenvalues, and the matrix with the eigenvectors as columns
+        :rtype: tuple(list(float), list(list(float)))
+        """
+        a = [row[:] for row in m]
+        v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        for _ in range(50):
+            # Largest off-diagonal element
+            p, q = 0, 1
+            if abs(a[0][2]) > abs(a[p][q]):
+                p, q = 0, 2
+            if abs(a[1][2]) > abs(a[p][q]):
+                p, q = 1, 2
+            if abs(a[p][q]) < 1e-12 * (abs(a[0][0]) + abs(a[1][1]) + abs(a[2][2])):
+                break
+
+            # Rotate it to zero
+            theta = (a[q][q] - a[p][p]) / (2 * a[p][q])
+            t = (1 if theta >= 0 else -1) / (abs(theta) + math.sqrt(theta * theta + 1))
+            c = 1 / math.sqrt(t * t + 1)
+            s = t * c
+            for k in range(3):
+                akp = a[k][p]
+                akq = a[k][q]
+                a[k][p] = c * akp - s * akq
+                a[k][q] = s * akp + c * akq
+            for k in range(3):
+                apk = a[p][k]
+                aqk = a[q][k]
+                a[p][k] = c * apk - s * aqk
+                a[q][k] = s * apk + c * aqk
+            for k in range(3):
+                vkp = v[k][p]
+                vkq = v[k][q]
+                v[k][p] = c * vkp - s * vkq
+                v[k][q] = s * vkp + c * vkq
+        return [a[0][0], a[1][1], a[2][2]], v
@@ -197,6 +197,17 @@ class QwiicNAU7802(object):
         else:
             self._i2c = i2c_driver
 
+        # Keep a copy of the configuration registers so the bit set/clear
+        # calls don't have to read them back first. The power-up/cycle ready
+        # and calibration status bits change on their own, so are always read
+        self._regs = qwiic_i2c.RegisterCache(self._i2c, self.address)
+        self._regs.cacheable(self.NAU7802_CTRL1, self.NAU7802_I2C_CONTROL, self.NAU7802_ADC,
+                             self.NAU7802_PGA, self.NAU7802_PGA_PWR)
+        self._regs.volatile(self.NAU7802_PU_CTRL,
+                            (1 << self.NAU7802_PU_CTRL_PUR) | (1 << self.NAU7802_PU_CTRL_CR))
+        self._regs.volatile(self.NAU7802_CTRL2,
+                            (1 << self.NAU7802_CTRL2_CALS) | (1 << self.NAU7802_CTRL2_CAL_ERROR))
+
         # Initialize other member variables
         self._zero_offset = 0
         self._calibration_factor = 1
@@ -373,6 +384,8 @@ class QwiicNAU7802(object):
         """
         self.set_bit(self.NAU7802_PU_CTRL_RR, self.NAU7802_PU_CTRL)
         time.sleep(0.001)
+        # Every register is back to its default, forget the cached values
+        self._regs.invalidate()
         self.clear_bit(self.NAU7802_PU_CTRL_RR, self.NAU7802_PU_CTRL)
 
     def set_ldo(self, ldo_value):
@@ -572,9 +585,7 @@ class QwiicNAU7802(object):
         :param register_address: Register address
         :type register_address: int
         """
-        value = self.get_register(register_address)
-        value |= (1 << bit_number)
-        self.set_register(register_address, value)
+        self._regs.update(register_address, 0xFF, 1 << bit_number)
 
     def clear_bit(self, bit_number, register_address):
         """
@@ -585,9 +596,7 @@ class QwiicNAU7802(object):
         :param register_address: Register address
         :type register_address: int
         """
-        value = self.get_register(register_address)
-        value &= ~(1 << bit_number)
-        self.set_register(register_address, value)
+        self._regs.update(register_address, ~(1 << bit_number) & 0xFF, 0)
 
     def get_bit(self, bit_number, register_address):
         """
@@ -600,7 +609,7 @@ class QwiicNAU7802(object):
         :return: Bit value
         :rtype: bool
         """
-        value = self.get_register(register_address)
+        value = self._regs.read(register_address, 1 << bit_number)
         return bool(value & (1 << bit_number))
 
     def get_register(self, register_address):
@@ -612,7 +621,7 @@ class QwiicNAU7802(object):
         :return: Register value
         :rtype: int
         """
-        return self._i2c.readByte(self.address, register_address)
+        return self._regs.read(register_address)
 
     def set_register(self, register_address, value):
         """
@@ -623,7 +632,7 @@ class QwiicNAU7802(object):
         :param value: Register value
         :type value: int
         """
-        self._i2c.writeByte(self.address, register_address, value)
+        self._regs.write(register_address, value)
     
     def millis(self):
         """
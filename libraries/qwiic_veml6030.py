@@ -159,6 +159,12 @@ class QwiicVEML6030(object):
         else:
             self._i2c = i2c_driver
 
+        # The configuration registers only change when we write them, so
+        # keep a copy instead of reading them back for every change
+        self._regs = qwiic_i2c.RegisterCache(self._i2c, self.address, word=True)
+        self._regs.cacheable(self.VEML6030_SETTING_REG, self.VEML6030_H_THRESH_REG,
+                             self.VEML6030_L_THRESH_REG, self.VEML6030_POWER_SAVE_REG)
+
     def is_connected(self):
         """
         Determines if this device is connected
@@ -679,15 +685,9 @@ class QwiicVEML6030(object):
         :param start_position: Offset position
         :type start_position: int
         """
-        # Read current register value
-        i2c_write = self._read_register(w_reg)
-
-        # Clear bits in mask position, then write provided bits
-        i2c_write &= mask
-        i2c_write |= bits << start_position
-
-        # Write new value back to register
-        self._i2c.writeWord(self.address, w_reg, i2c_write)
+        # Clear bits in mask position, then write provided bits. The current
+        # value comes from the register cache, so this is a single write
+        self._regs.update(w_reg, mask, bits << start_position)
 
     def _read_register(self, reg):
         """
@@ -698,4 +698,4 @@ class QwiicVEML6030(object):
         :return: Register value
         :rtype: int
         """
-        return self._i2c.readWord(self.address, reg)
+        return self._regs.read(reg)
@@ -20,6 +20,9 @@ import network
 import time
 import xbee
 import config
+import uio
+import ustruct
+import ujson
 
 
 __version__ = "1.3.0"
@@ -145,12 +148,13 @@ class StatusLED:
         self.status_led.off()
 
 class MQTT:
-    def __init__(self):
-        umqtt_module = __import__("umqtt.simple")
-        self.MQTTClient = getattr(umqtt_module.simple, "MQTTClient")
+    def __init__(self, keepalive=30):
+        umqtt_module = __import__("umqtt.robust")
+        self.MQTTClient = getattr(umqtt_module.robust, "RobustMQTTClient")
         self.secrets = __import__("secrets")
         self.client = self.MQTTClient(config.MQTT_CLIENT_ID+self.get_iccid(), config.MQTT_SERVER, port=config.MQTT_PORT, 
-                        user=self.secrets.MQTT_USER, password=self.secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL)
+                        keepalive=keepalive, user=self.secrets.MQTT_USER, password=self.secrets.MQTT_PASSWORD, ssl=config.MQTT_SSL,
+                        queue_size=0)
     def connect(self):
         self.client.connect()
     def get_iccid(self):
@@ -160,8 +164,440 @@ class MQTT:
         self.topic = topic
         self.message = message
         self.client.publish(self.topic, str(self.message))
+    def publish_many(self, messages):
+        self.client.publish_many([(topic, str(message)) for topic, message in messages])
     def ping(self):
         self.client.ping()
+    def poll(self):
+        self.client.poll()
     def disconnect(self):
         self.client.disconnect()
 
+
+class Task:
+    def __init__(self, deadline, period, callback, args):
+        self.deadline = deadline
+        self.period = period
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+
+class Runtime:
+    # periodic and one-shot tasks, kept ordered by deadline. between deadlines
+    # the runtime sleeps instead of spinning, so the cpu idles while waiting.
+    # any object providing ticks_ms, ticks_add, ticks_diff and sleep_ms can be
+    # passed as the clock, which allows running the scheduler against a fake
+    # clock off-device.
+    #
+    # stop() can be called from a task or from outside one (an irq handler,
+    # another thread). the runtime doesn't start another sleep once stopped,
+    # and a sleep already under way ends within STOP_RATE ms.
+    BUTTON_RATE = 100 # ms between shutdown button checks
+    WATCHDOG_RATE = 10000 # ms between watchdog feeds
+    STOP_RATE = 100 # ms, longest a stop waits on an idle sleep
+
+    def __init__(self, clock=time, max_sleep=1000):
+        self.clock = clock
+        self.max_sleep = max_sleep # ms, upper bound on a single idle sleep
+        self.tasks = []
+        self.running = False
+        self.stopping = False
+        self.idle_ms = 0 # total time spent sleeping, for reporting
+
+    def _insert(self, task):
+        ticks_diff = self.clock.ticks_diff
+        i = len(self.tasks)
+        while i > 0 and ticks_diff(task.deadline, self.tasks[i - 1].deadline) < 0:
+            i -= 1
+        self.tasks.insert(i, task)
+
+    def every(self, period, callback, args=(), delay=0):
+        # run callback every period ms, first after delay ms (immediately by default)
+        task = Task(self.clock.ticks_add(self.clock.ticks_ms(), delay), period, callback, args)
+        self._insert(task)
+        return task
+
+    def after(self, delay, callback, args=()):
+        # run callback once, delay ms from now
+        task = Task(self.clock.ticks_add(self.clock.ticks_ms(), delay), 0, callback, args)
+        self._insert(task)
+        return task
+
+    def cancel(self, task):
+        task.active = False
+        if task in self.tasks:
+            self.tasks.remove(task)
+
+    def reschedule(self, task, period):
+        # change a periodic task's period, counting the next run from now
+        # rather than from the deadline already set with the old period
+        task.period = period
+        task.deadline = self.clock.ticks_add(self.clock.ticks_ms(), period)
+        if task in self.tasks: # not while it's being run or once cancelled
+            self.tasks.remove(task)
+            self._insert(task)
+
+    def add_button(self, button, press_time=5000):
+        return self.every(Runtime.BUTTON_RATE, button.check, (press_time,))
+
+    def add_watchdog(self, dog):
+        return self.every(Runtime.WATCHDOG_RATE, dog.feed)
+
+    def step(self):
+        clock = self.clock
+        now = clock.ticks_ms()
+        # run everything that is due
+        while self.tasks and clock.ticks_diff(self.tasks[0].deadline, now) <= 0:
+            task = self.tasks.pop(0)
+            if task.period:
+                task.deadline = clock.ticks_add(task.deadline, task.period)
+                if clock.ticks_diff(task.deadline, now) <= 0: # fell behind, don't burst to catch up
+                    task.deadline = clock.ticks_add(now, task.period)
+                self._insert(task)
+            else:
+                task.active = False
+            try:
+                task.callback(*task.args)
+            except Exception as e:
+                print(e)
+            now = clock.ticks_ms()
+        # sleep until the next deadline, in slices so a stop isn't kept waiting
+        if self.tasks and not self.stopping:
+            wait = clock.ticks_diff(self.tasks[0].deadline, now)
+            if wait > 0:
+                wait = min(wait, self.max_sleep)
+                while wait > 0 and not self.stopping:
+                    nap = min(wait, Runtime.STOP_RATE)
+                    clock.sleep_ms(nap)
+                    self.idle_ms += nap
+                    wait -= nap
+
+    def run(self):
+        self.running = True
+        self.stopping = False
+        while self.running and self.tasks:
+            self.step()
+
+    def stop(self):
+        self.running = False
+        self.stopping = True
+
+
+# upload sinks. each takes a tuple of fields aligned with the values passed to
+# Uploader.send(), with None for values that sink does not carry. a record is
+# serialized once per sink when it is added, and a batch of records goes out
+# in a single request.
+
+class HTTPSink:
+    name = "http"
+
+    def __init__(self, url, headers, fields):
+        import ujson
+        self.dumps = ujson.dumps
+        self.url = url
+        self.headers = dict(headers)
+        self.headers["Content-Type"] = "application/json"
+        self.fields = fields # (variable, unit) per value
+        self.fail = 0
+        import urequests
+        self.session = urequests.Session() # connection is kept open between posts
+
+    def serialize(self, values):
+        items = []
+        for field, value in zip(self.fields, values):
+            if field is not None:
+                items.append({"variable":field[0],"value":value,"unit":field[1]})
+        return self.dumps(items)[1:-1] # list body, joined into one array per batch
+
+    def size(self, item):
+        return len(item) + 1
+
+    def send(self, batch):
+        t1 = time.ticks_ms()
+        # the items are already serialized, so the body is joined into one
+        # string and sent with a content-length, in one write with the head
+        # when it fits
+        body = "[" + ",".join(batch) + "]"
+        response = self.session.post(self.url, headers=self.headers, data=body, request_1_1=True)
+        try:
+            print(" http -> ", len(batch), "samples (" + str(response.status_code), response.reason.decode(),
+                  "|", str(time.ticks_diff(time.ticks_ms(), t1)/1000), "secs)")
+            if not 200 <= response.status_code <= 299:
+                raise OSError(response.status_code)
+        finally:
+            response.close()
+
+
+class MQTTSink:
+    name = "mqtt"
+
+    def __init__(self, client, topics, separator=","):
+        self.client = client
+        self.topics = topics # topic per value
+        self.separator = separator
+        self.fail = 0
+
+    def serialize(self, values):
+        return [str(value) for topic, value in zip(self.topics, values) if topic is not None]
+
+    def size(self, item):
+        return sum([len(payload) + 1 for payload in item])
+
+    def send(self, batch):
+        messages = []
+        i = 0
+        for topic in self.topics:
+            if topic is not None:
+                # one payload per topic, holding every sample in the batch
+                messages.append((topic, self.separator.join([item[i] for item in batch])))
+                i += 1
+        self.client.publish_many(messages) # all topics in one write
+        print(" mqtt -> ", len(batch), "samples")
+
+
+class DRMSink:
+    name = "drm"
+
+    def __init__(self, transport, streams):
+        from digi import cloud
+        self.cloud = cloud
+        self.transport = transport
+        self.streams = streams # data stream per value
+        self.fail = 0
+
+    def serialize(self, values):
+        return [(stream, value) for stream, value in zip(self.streams, values) if stream is not None]
+
+    def size(self, item):
+        return sum([len(stream) + len(str(value)) for stream, value in item])
+
+    def send(self, batch):
+        data = self.cloud.DataPoints(self.transport)
+        for item in batch:
+            for stream, value in item:
+                data.add(stream, value)
+        data.send(timeout=10)
+        print(" drm -> ", len(batch), "samples")
+
+
+class RecordLog:
+    # append-only ring of fixed size records on the xbee file system, used to
+    # hold readings while the link is down. each slot holds a sequence number,
+    # length, checksum and the ujson encoded record. the head/tail pointers are
+    # written alternately to two checksummed slots of the pointer file, so a
+    # reset mid-write leaves the previous pointers intact. when the ring is
+    # full the oldest record is dropped.
+    #
+    # a record holds at most record_size - 7 (the header) bytes of ujson, the
+    # encoded sink item. anything bigger is dropped with a message, so scripts
+    # that upload long strings need a bigger record_size. the ring takes
+    # slots * record_size bytes of flash, and a ring left by a different
+    # size is rebuilt empty.
+    HEADER = "<IHB" # sequence, length, checksum
+    POINTER = "<IIIB" # generation, head, tail, checksum
+
+    def __init__(self, name, slots=32, record_size=256):
+        self.path = name + ".log"
+        self.ptr_path = name + ".ptr"
+        self.slots = slots
+        self.record_size = record_size
+        self.gen = self.head = self.tail = 0
+        try:
+            f = uio.open(self.path, mode="rb") # check if file exists
+            size = f.seek(0, 2)
+            f.close()
+            if size != slots * record_size:
+                print(" %s was made for another record size, emptied" % self.path)
+                raise OSError()
+        except OSError:
+            # create the ring at full size so it never grows
+            f = uio.open(self.path, mode="wb")
+            blank = bytes(record_size)
+            for i in range(slots):
+                f.write(blank)
+            f.close()
+            f = uio.open(self.ptr_path, mode="wb")
+            f.write(bytes(2 * ustruct.calcsize(RecordLog.POINTER)))
+            f.close()
+        self._load()
+
+    def __len__(self):
+        return self.tail - self.head
+
+    @staticmethod
+    def _checksum(data):
+        return sum(data) & 0xFF
+
+    def _load(self):
+        size = ustruct.calcsize(RecordLog.POINTER)
+        try:
+            f = uio.open(self.ptr_path, mode="rb")
+            data = f.read(2 * size)
+            f.close()
+        except OSError:
+            data = b""
+        for i in range(len(data) // size):
+            gen, head, tail, check = ustruct.unpack_from(RecordLog.POINTER, data, i * size)
+            if check == self._checksum(data[i * size:(i + 1) * size - 1]) and gen >= self.gen:
+                self.gen, self.head, self.tail = gen, head, tail
+        # pick up records appended after the last pointer update
+        f = uio.open(self.path, mode="rb")
+        while self._read(f, self.tail) is not None:
+            self.tail += 1
+        f.close()
+        if self.tail - self.head > self.slots:
+            self.head = self.tail - self.slots
+
+    def _save(self):
+        self.gen += 1
+        data = bytearray(ustruct.calcsize(RecordLog.POINTER))
+        ustruct.pack_into(RecordLog.POINTER, data, 0, self.gen, self.head, self.tail, 0)
+        data[-1] = self._checksum(data[:-1])
+        f = uio.open(self.ptr_path, mode="r+b")
+        f.seek((self.gen % 2) * len(data))
+        f.write(data)
+        f.close()
+
+    def _read(self, f, seq):
+        f.seek((seq % self.slots) * self.record_size)
+        record = f.read(self.record_size)
+        if len(record) < self.record_size:
+            return None
+        rseq, length, check = ustruct.unpack_from(RecordLog.HEADER, record)
+        start = ustruct.calcsize(RecordLog.HEADER)
+        payload = record[start:start + length]
+        if rseq != seq or length == 0 or check != self._checksum(payload):
+            return None
+        return payload
+
+    def append(self, items):
+        start = ustruct.calcsize(RecordLog.HEADER)
+        f = uio.open(self.path, mode="r+b")
+        try:
+            for item in items:
+                payload = ujson.dumps(item).encode()
+                if start + len(payload) > self.record_size:
+                    print(" record too large for log, dropped")
+                    continue
+                record = bytearray(self.record_size)
+                record[start:start + len(payload)] = payload
+                ustruct.pack_into(RecordLog.HEADER, record, 0, self.tail, len(payload), self._checksum(record[start:start + len(payload)]))
+                f.seek((self.tail % self.slots) * self.record_size)
+                f.write(record)
+                self.tail += 1
+                if self.tail - self.head > self.slots: # full, drop the oldest
+                    self.head += 1
+        finally:
+            f.close()
+        self._save()
+
+    def peek(self, count):
+        items = []
+        f = uio.open(self.path, mode="rb")
+        try:
+            seq = self.head
+            while seq < self.tail and len(items) < count:
+                payload = self._read(f, seq)
+                if payload is not None: # skip anything torn by a reset
+                    items.append(ujson.loads(payload.decode()))
+                seq += 1
+        finally:
+            f.close()
+        return items, seq - self.head
+
+    def drop(self, count):
+        self.head = min(self.head + count, self.tail)
+        self._save()
+
+
+class Uploader:
+    # collects records and flushes them to every sink when max_count records
+    # are pending, the oldest is max_age ms old, or the serialized records
+    # reach max_bytes. zero disables the age and byte triggers. a sink given a
+    # RecordLog keeps failed batches on flash and replays them, replay_count
+    # records per send, once the sink works again.
+    def __init__(self, status_led=None, max_count=1, max_age=0, max_bytes=0, replay_count=16):
+        self.status_led = status_led
+        self.max_count = max_count
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.replay_count = replay_count
+        self.sinks = []
+        self.logs = []
+        self.batches = []
+        self.sizes = [] # serialized bytes pending per sink
+        self.count = 0
+        self.oldest = 0
+
+    def add_sink(self, sink, log=None):
+        self.sinks.append(sink)
+        self.logs.append(log)
+        self.batches.append([])
+        self.sizes.append(0)
+        return sink
+
+    def send(self, *values):
+        print(" sample: ", *values)
+        for i, sink in enumerate(self.sinks):
+            item = sink.serialize(values)
+            self.batches[i].append(item)
+            self.sizes[i] += sink.size(item)
+        if self.count == 0:
+            self.oldest = time.ticks_ms()
+        self.count += 1
+        if self.due():
+            self.flush()
+
+    def due(self):
+        if self.count == 0:
+            return False
+        if self.count >= self.max_count:
+            return True
+        if self.max_bytes and max(self.sizes) >= self.max_bytes:
+            return True
+        return self.max_age and time.ticks_diff(time.ticks_ms(), self.oldest) >= self.max_age
+
+    def poll(self):
+        # for use as a runtime task, so the age trigger fires without new samples
+        if self.due():
+            self.flush()
+
+    def flush(self):
+        for sink, log, batch in zip(self.sinks, self.logs, self.batches):
+            if not batch:
+                continue
+            try:
+                if log is not None and len(log):
+                    # queue behind the backlog so readings go out in order
+                    log.append(batch)
+                    batch.clear()
+                    self.replay(sink, log)
+                else:
+                    sink.send(batch)
+                sink.fail = 0
+            except Exception as e:
+                print(e)
+                sink.fail += 1
+                if self.status_led:
+                    self.status_led.blink(2, 0.2)
+                if log is not None and batch:
+                    log.append(batch)
+            batch.clear()
+        self.sizes = [0] * len(self.sinks)
+        self.count = 0
+
+    def replay(self, sink, log):
+        while len(log):
+            items, used = log.peek(self.replay_count)
+            if items:
+                sink.send(items)
+            log.drop(used)
+            print(" " + sink.name, "backlog", len(log))
+
+    def failures(self):
+        # consecutive failures of the worst sink
+        return max([sink.fail for sink in self.sinks] + [0])
+
+    def report(self):
+        return ", ".join(["{name}_fails {fail}".format(name=sink.name, fail=sink.fail) for sink in self.sinks])
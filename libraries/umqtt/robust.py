@@ -0,0 +1,150 @@
+"""
+Reconnecting MQTT client built on umqtt.simple.
+
+RobustMQTTClient keeps one connection open for the life of the device:
+    - poll() sends PINGREQ when the connection has been idle for half the
+      keepalive period and treats a missing PINGRESP as a dead connection
+    - lost connections are retried from poll() with exponential backoff
+    - sessions are resumed with clean_session=False, and subscriptions are
+      replayed if the broker did not keep the session
+    - publish() never connects inline; while disconnected messages are held
+      in a small queue (or refused with OSError when queue_size is 0, so the
+      caller can store them itself) and sent after the next reconnect
+    - publish_many() sends several QoS 0 messages in a single socket write
+    - up to max_inflight QoS 1/2 messages may await acknowledgement at once;
+      unacknowledged ones are resent with the DUP flag after a reconnect
+
+Call poll() regularly, e.g. from a sensorlab.Runtime task.
+"""
+
+import time
+from .simple import MQTTClient
+
+class RobustMQTTClient(MQTTClient):
+
+    def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=60,
+                 ssl=False, ssl_params={}, min_backoff=1000, max_backoff=120000, queue_size=8,
+                 max_inflight=1, version=4, topic_aliases=16):
+        super().__init__(client_id, server, port=port, user=user, password=password,
+                         keepalive=keepalive, ssl=ssl, ssl_params=ssl_params,
+                         max_inflight=max_inflight, version=version, topic_aliases=topic_aliases)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = min_backoff
+        self.next_attempt = time.ticks_ms()
+        self.connected = False
+        self.queue = []
+        self.queue_size = queue_size
+        self.subscriptions = []
+        self.last_tx = self.ping_sent = time.ticks_ms()
+
+    def _close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def _lost(self):
+        # drop the connection and schedule the next attempt
+        self.connected = False
+        self._close()
+        self.next_attempt = time.ticks_add(time.ticks_ms(), self.backoff)
+        self.backoff = min(self.backoff * 2, self.max_backoff)
+
+    def connect(self, clean_session=False):
+        self._close()
+        try:
+            present = super().connect(clean_session)
+            if not present:
+                for topic, qos in self.subscriptions:
+                    super().subscribe(topic, qos)
+        except Exception:
+            self._lost()
+            raise
+        self.connected = True
+        self.backoff = self.min_backoff
+        self.ping_outstanding = False
+        self.last_tx = time.ticks_ms()
+        while self.connected and self.queue:
+            topic, msg, retain, qos = self.queue.pop(0)
+            self.publish(topic, msg, retain, qos)
+        return present
+
+    def disconnect(self):
+        self.next_attempt = None # don't reconnect
+        if self.connected:
+            self.connected = False
+            try:
+                super().disconnect()
+            except OSError:
+                pass
+        self._close()
+
+    def ping(self):
+        super().ping()
+        self.ping_sent = self.last_tx = time.ticks_ms()
+
+    def publish(self, topic, msg, retain=False, qos=0):
+        if self.connected:
+            try:
+                super().publish(topic, msg, retain, qos)
+                self.last_tx = time.ticks_ms()
+                return
+            except OSError as e:
+                print(" mqtt connection lost:", e)
+                self._lost()
+                if qos > 0:
+                    return # in the in-flight window, resent with DUP on reconnect
+        if not self.queue_size:
+            raise OSError("mqtt not connected")
+        if len(self.queue) >= self.queue_size:
+            self.queue.pop(0) # drop the oldest
+        self.queue.append((topic, msg, retain, qos))
+
+    def publish_many(self, msgs, retain=False):
+        if self.connected:
+            try:
+                super().publish_many(msgs, retain)
+                self.last_tx = time.ticks_ms()
+                return
+            except OSError as e:
+                print(" mqtt connection lost:", e)
+                self._lost()
+        if not self.queue_size:
+            raise OSError("mqtt not connected")
+        for topic, msg in msgs:
+            if len(self.queue) >= self.queue_size:
+                self.queue.pop(0) # drop the oldest
+            self.queue.append((topic, msg, retain, 0))
+
+    def subscribe(self, topic, qos=0):
+        if (topic, qos) not in self.subscriptions:
+            self.subscriptions.append((topic, qos))
+        if self.connected:
+            super().subscribe(topic, qos)
+
+    def poll(self):
+        now = time.ticks_ms()
+        if not self.connected:
+            if self.next_attempt is not None and time.ticks_diff(now, self.next_attempt) >= 0:
+                try:
+                    self.connect()
+                    print(" mqtt reconnected")
+                except Exception as e:
+                    print(" mqtt reconnect failed:", e)
+            return
+        try:
+            self.check_msg()
+            if self.keepalive:
+                if self.ping_outstanding:
+                    if time.ticks_diff(now, self.ping_sent) > self.keepalive * 1000:
+                        raise OSError("no PINGRESP")
+                elif time.ticks_diff(now, self.last_tx) >= self.keepalive * 500:
+                    self.ping()
+        except Exception as e:
+            # a desynced or malformed stream shows up as assertion, index or
+            # value errors from check_msg(), not just OSError
+            print(" mqtt connection lost:", repr(e))
+            self._lost()
@@ -13,10 +13,13 @@ from ubinascii import hexlify
 class MQTTException(Exception):
     pass
 
+def _bytes(s):
+    return s.encode() if isinstance(s, str) else s
+
 class MQTTClient:
 
     def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=0,
-                 ssl=False, ssl_params={}):
+                 ssl=False, ssl_params={}, max_inflight=1, version=4, topic_aliases=16):
         if port == 0:
             port = 8883 if ssl else 1883
         self.client_id = client_id
@@ -27,6 +30,7 @@ class MQTTClient:
         self.ssl_params = ssl_params
         self.pid = 0
         self.cb = None
+        self.cb_copy = False
         self.user = user
         self.pswd = password
         self.keepalive = keepalive
@@ -34,23 +38,185 @@ class MQTTClient:
         self.lw_msg = None
         self.lw_qos = 0
         self.lw_retain = False
+        self.ping_outstanding = False
+        # outgoing packets are assembled here and sent with a single write
+        self.buf = bytearray(128)
+        self.ack = bytearray(b"\x40\x02\0\0")
+        # QoS 1/2 messages sent but not yet acknowledged, oldest first:
+        # [pid, topic, msg, retain, qos, released]. publish() only blocks
+        # once max_inflight of them are outstanding.
+        self.max_inflight = max_inflight
+        self.inflight = []
+        self.rcv_pids = set() # incoming QoS 2 messages awaiting PUBREL
+        # incoming packets are read into this buffer, which is reused
+        self.rbuf = bytearray(128)
+        self.rmv = memoryview(self.rbuf)
+        # protocol level: 4 is MQTT 3.1.1, 5 is MQTT 5. a version 5 client
+        # falls back to 4 if the broker refuses it.
+        self.version = version
+        # MQTT 5 only: topics are given aliases in order of first publish,
+        # up to the lower of topic_aliases and the broker's maximum
+        self.topic_aliases = topic_aliases
+        self.alias_max = 0
+        self.aliases = {}
+        self.receive_max = 65535
+
+    def _reserve(self, n):
+        # grow (keeping contents) if a packet doesn't fit; the larger buffer is reused
+        if len(self.buf) < n:
+            buf = bytearray(n)
+            buf[:len(self.buf)] = self.buf
+            self.buf = buf
+        return self.buf
+
+    def _put_hdr(self, buf, i, op, sz):
+        buf[i] = op
+        i += 1
+        while sz > 0x7f:
+            buf[i] = (sz & 0x7f) | 0x80
+            sz >>= 7
+            i += 1
+        buf[i] = sz
+        return i + 1
 
-    def _send_str(self, s):
-        self.sock.write(struct.pack("!H", len(s)))
-        self.sock.write(s)
+    def _put_str(self, buf, i, s):
+        n = len(s)
+        buf[i] = n >> 8
+        buf[i + 1] = n & 0xff
+        buf[i + 2:i + 2 + n] = s
+        return i + 2 + n
+
+    def _get_len(self, buf, i):
+        n = 0
+        sh = 0
+        while 1:
+            b = buf[i]
+            n |= (b & 0x7f) << sh
+            if not b & 0x80:
+                return n
+            i += 1
+            sh += 7
+
+    def _len_size(self, n):
+        return 1 if n < 0x80 else 2 if n < 0x4000 else 3 if n < 0x200000 else 4
+
+    # Returns the alias for an outgoing topic: positive if the broker already
+    # knows it, negative if it is new and the topic must be sent with it, or
+    # 0 when all aliases are in use.
+    def _alias(self, topic):
+        a = self.aliases.get(topic)
+        if a:
+            return a
+        if len(self.aliases) < self.alias_max:
+            a = len(self.aliases) + 1
+            self.aliases[topic] = a
+            return -a
+        return 0
+
+    # Pick up the CONNACK properties that change how we talk to the broker
+    # and step over the rest.
+    def _connack_props(self, buf, i, end):
+        while i < end:
+            p = buf[i]
+            i += 1
+            if p == 0x22:  # Topic Alias Maximum
+                self.alias_max = min(self.topic_aliases, buf[i] << 8 | buf[i + 1])
+            elif p == 0x21:  # Receive Maximum
+                self.receive_max = buf[i] << 8 | buf[i + 1]
+            elif p == 0x13:  # Server Keep Alive
+                self.keepalive = buf[i] << 8 | buf[i + 1]
+            if p in (0x01, 0x17, 0x19, 0x24, 0x25, 0x28, 0x29, 0x2a):
+                i += 1
+            elif p in (0x13, 0x21, 0x22, 0x23):
+                i += 2
+            elif p in (0x02, 0x11, 0x18, 0x27):
+                i += 4
+            elif p == 0x0b:
+                i += self._len_size(self._get_len(buf, i))
+            else:  # string or binary data, a user property is two strings
+                i += 2 + (buf[i] << 8 | buf[i + 1])
+                if p == 0x26:
+                    i += 2 + (buf[i] << 8 | buf[i + 1])
+
+    def _next_pid(self):
+        self.pid = self.pid % 0xffff + 1
+        while self._find(self.pid) >= 0:
+            self.pid = self.pid % 0xffff + 1
+        return self.pid
+
+    def _find(self, pid):
+        for i in range(len(self.inflight)):
+            if self.inflight[i][0] == pid:
+                return i
+        return -1
+
+    def _send_ack(self, op, pid):
+        self.ack[0] = op
+        self.ack[2] = pid >> 8
+        self.ack[3] = pid & 0xff
+        self.sock.write(self.ack)
+
+    # Handle PUBACK, PUBREC, PUBREL or PUBCOMP, with the fixed header
+    # byte already read.
+    def _recv_ack(self, op):
+        sz = self._recv_len()
+        self._fill(sz)
+        pid = self.rbuf[0] << 8 | self.rbuf[1]
+        rc = self.rbuf[2] if sz > 2 else 0  # MQTT 5 reason code
+        if op == 0x62:  # PUBREL for a QoS 2 message we received
+            self.rcv_pids.discard(pid)
+            self._send_ack(0x70, pid)
+            return
+        i = self._find(pid)
+        if op == 0x50 and rc >= 0x80:  # PUBREC refusing the message
+            if i >= 0:
+                self.inflight.pop(i)
+        elif op == 0x50:  # PUBREC, answer even if unknown so the broker can finish
+            if i >= 0:
+                self.inflight[i][5] = True
+            self._send_ack(0x62, pid)
+        elif i >= 0:  # PUBACK or PUBCOMP completes the exchange
+            self.inflight.pop(i)
+
+    # Resend everything still unacknowledged, in the original order,
+    # after a new connection has been made.
+    def _resend(self):
+        for pid, topic, msg, retain, qos, released in self.inflight:
+            if released:
+                self._send_ack(0x62, pid)
+            else:
+                n = self._pack_publish(0, topic, msg, retain, qos, pid, True)
+                self.sock.write(self.buf, n)
+
+    # Read exactly n bytes into the start of the receive buffer.
+    def _fill(self, n):
+        if len(self.rbuf) < n:
+            self.rbuf = bytearray(n)
+            self.rmv = memoryview(self.rbuf)
+        i = 0
+        while i < n:
+            r = self.sock.readinto(self.rmv[i:n])
+            if not r:
+                raise OSError(-1)
+            i += r
 
     def _recv_len(self):
         n = 0
         sh = 0
         while 1:
-            b = self.sock.read(1)[0]
+            self._fill(1)
+            b = self.rbuf[0]
             n |= (b & 0x7f) << sh
             if not b & 0x80:
                 return n
             sh += 7
 
-    def set_callback(self, f):
+    # The callback receives topic and msg as memoryviews into the receive
+    # buffer, valid only until it returns. Pass copy=True to get bytes
+    # that can be kept.
+    def set_callback(self, f, copy=False):
         self.cb = f
+        self.cb_copy = copy
 
     def set_last_will(self, topic, msg, retain=False, qos=0):
         assert 0 <= qos <= 2
@@ -70,45 +236,81 @@ class MQTTClient:
             import ussl
             self.sock = ussl.wrap_socket(self.sock, **self.ssl_params)
         self.sock.connect((self.server, self.port))
-        premsg = bytearray(b"\x10\0\0\0\0\0")
-        msg = bytearray(b"\x04MQTT\x04\x02\0\0")
-
-        sz = 10 + 2 + len(self.client_id)
-        msg[6] = clean_session << 1
+        client_id = _bytes(self.client_id)
+        flags = clean_session << 1
+        sz = 10 + 2 + len(client_id)
         if self.user is not None:
-            sz += 2 + len(self.user) + 2 + len(self.pswd)
-            msg[6] |= 0xC0
+            user = _bytes(self.user)
+            pswd = _bytes(self.pswd)
+            sz += 2 + len(user) + 2 + len(pswd)
+            flags |= 0xC0
         if self.keepalive:
             assert self.keepalive < 65536
-            msg[7] |= self.keepalive >> 8
-            msg[8] |= self.keepalive & 0x00FF
         if self.lw_topic:
-            sz += 2 + len(self.lw_topic) + 2 + len(self.lw_msg)
-            msg[6] |= 0x4 | (self.lw_qos & 0x1) << 3 | (self.lw_qos & 0x2) << 3
-            msg[6] |= self.lw_retain << 5
+            lw_topic = _bytes(self.lw_topic)
+            lw_msg = _bytes(self.lw_msg)
+            sz += 2 + len(lw_topic) + 2 + len(lw_msg)
+            flags |= 0x4 | (self.lw_qos & 0x1) << 3 | (self.lw_qos & 0x2) << 3
+            flags |= self.lw_retain << 5
+        if self.version == 5:
+            # property lengths, plus a Session Expiry Interval that keeps the
+            # session until the next clean connect, as 3.1.1 does
+            sz += 1 if clean_session else 6
+            if self.lw_topic:
+                sz += 1
 
-        i = 1
-        while sz > 0x7f:
-            premsg[i] = (sz & 0x7f) | 0x80
-            sz >>= 7
-            i += 1
-        premsg[i] = sz
-
-        self.sock.write(premsg, i + 2)
-        self.sock.write(msg)
-        #print(hex(len(msg)), hexlify(msg, ":"))
-        self._send_str(self.client_id)
+        buf = self._reserve(sz + 4)
+        i = self._put_hdr(buf, 0, 0x10, sz)
+        buf[i:i + 7] = b"\0\x04MQTT\x04"
+        buf[i + 6] = self.version
+        buf[i + 7] = flags
+        buf[i + 8] = self.keepalive >> 8
+        buf[i + 9] = self.keepalive & 0x00FF
+        i += 10
+        if self.version == 5:
+            if clean_session:
+                buf[i] = 0
+                i += 1
+            else:
+                buf[i:i + 6] = b"\x05\x11\xff\xff\xff\xff"
+                i += 6
+        i = self._put_str(buf, i, client_id)
         if self.lw_topic:
-            self._send_str(self.lw_topic)
-            self._send_str(self.lw_msg)
+            if self.version == 5:
+                buf[i] = 0  # no will properties
+                i += 1
+            i = self._put_str(buf, i, lw_topic)
+            i = self._put_str(buf, i, lw_msg)
         if self.user is not None:
-            self._send_str(self.user)
-            self._send_str(self.pswd)
-        resp = self.sock.read(4)
-        assert resp[0] == 0x20 and resp[1] == 0x02
-        if resp[3] != 0:
-            raise MQTTException(resp[3])
-        return resp[2] & 1
+            i = self._put_str(buf, i, user)
+            i = self._put_str(buf, i, pswd)
+        #print(hex(i), hexlify(buf[:i], ":"))
+        self.sock.write(buf, i)
+        self._fill(1)
+        assert self.rbuf[0] == 0x20
+        sz = self._recv_len()
+        self._fill(sz)
+        rbuf = self.rbuf
+        if rbuf[1] != 0:
+            if self.version == 5 and rbuf[1] in (0x01, 0x84):
+                # unsupported protocol version, the broker only speaks 3.1.1
+                self.sock.close()
+                self.version = 4
+                return self.connect(clean_session)
+            raise MQTTException(rbuf[1])
+        present = rbuf[0] & 1
+        # aliases and limits only last for this connection
+        self.aliases = {}
+        self.alias_max = 0
+        self.receive_max = 65535
+        if self.version == 5 and sz > 2:
+            n = self._get_len(rbuf, 2)
+            i = 2 + self._len_size(n)
+            self._connack_props(rbuf, i, i + n)
+        if clean_session:
+            self.rcv_pids = set()
+        self._resend()
+        return present
 
     def disconnect(self):
         self.sock.write(b"\xe0\0")
@@ -116,59 +318,100 @@ class MQTTClient:
 
     def ping(self):
         self.sock.write(b"\xc0\0")
+        self.ping_outstanding = True
 
-    def publish(self, topic, msg, retain=False, qos=0):
-        pkt = bytearray(b"\x30\0\0\0")
-        pkt[0] |= qos << 1 | retain
+    def _pack_publish(self, i, topic, msg, retain, qos, pid, dup=False):
+        a = 0
+        if self.version == 5:
+            a = self._alias(topic)
+            if a > 0:
+                topic = b""
         sz = 2 + len(topic) + len(msg)
         if qos > 0:
             sz += 2
+        if self.version == 5:
+            sz += 4 if a else 1
         assert sz < 2097152
-        i = 1
-        while sz > 0x7f:
-            pkt[i] = (sz & 0x7f) | 0x80
-            sz >>= 7
+        buf = self._reserve(i + sz + 4)
+        i = self._put_hdr(buf, i, 0x30 | dup << 3 | qos << 1 | retain, sz)
+        i = self._put_str(buf, i, topic)
+        if qos > 0:
+            buf[i] = pid >> 8
+            buf[i + 1] = pid & 0xff
+            i += 2
+        if a:
+            a = abs(a)
+            buf[i] = 3  # property length
+            buf[i + 1] = 0x23  # Topic Alias
+            buf[i + 2] = a >> 8
+            buf[i + 3] = a & 0xff
+            i += 4
+        elif self.version == 5:
+            buf[i] = 0
             i += 1
-        pkt[i] = sz
-        #print(hex(len(pkt)), hexlify(pkt, ":"))
-        self.sock.write(pkt, i + 1)
-        self._send_str(topic)
+        buf[i:i + len(msg)] = msg
+        return i + len(msg)
+
+    def publish(self, topic, msg, retain=False, qos=0):
+        assert 0 <= qos <= 2
+        topic = _bytes(topic)
+        msg = _bytes(msg)
+        pid = 0
+        if qos > 0:
+            pid = self._next_pid()
+            # tracked before sending, so a failed write is resent on reconnect
+            self.inflight.append([pid, topic, msg, retain, qos, False])
+        n = self._pack_publish(0, topic, msg, retain, qos, pid)
+        #print(hex(n), hexlify(self.buf[:n], ":"))
+        self.sock.write(self.buf, n)
         if qos > 0:
-            self.pid += 1
-            pid = self.pid
-            struct.pack_into("!H", pkt, 0, pid)
-            self.sock.write(pkt, 2)
-        self.sock.write(msg)
-        if qos == 1:
-            while 1:
-                op = self.wait_msg()
-                if op == 0x40:
-                    sz = self.sock.read(1)
-                    assert sz == b"\x02"
-                    rcv_pid = self.sock.read(2)
-                    rcv_pid = rcv_pid[0] << 8 | rcv_pid[1]
-                    if pid == rcv_pid:
-                        return
-        elif qos == 2:
-            assert 0
+            self.wait_acks(min(self.max_inflight, self.receive_max) - 1)
+
+    # Block until no more than n QoS 1/2 messages are unacknowledged.
+    def wait_acks(self, n=0):
+        while len(self.inflight) > n:
+            self.wait_msg()
+
+    # Publish a list of (topic, msg) pairs at QoS 0. The packets are packed
+    # back to back and written together; the buffer is only flushed early
+    # when the next packet would not fit in it.
+    def publish_many(self, msgs, retain=False):
+        n = 0
+        for topic, msg in msgs:
+            topic = _bytes(topic)
+            msg = _bytes(msg)
+            if n and n + 2 + len(topic) + len(msg) + 8 > len(self.buf):
+                self.sock.write(self.buf, n)
+                n = 0
+            n = self._pack_publish(n, topic, msg, retain, 0, 0)
+        if n:
+            self.sock.write(self.buf, n)
 
     def subscribe(self, topic, qos=0):
         assert self.cb is not None, "Subscribe callback is not set"
-        pkt = bytearray(b"\x82\0\0\0")
-        self.pid += 1
-        struct.pack_into("!BH", pkt, 1, 2 + 2 + len(topic) + 1, self.pid)
-        #print(hex(len(pkt)), hexlify(pkt, ":"))
-        self.sock.write(pkt)
-        self._send_str(topic)
-        self.sock.write(qos.to_bytes(1, "little"))
+        topic = _bytes(topic)
+        pid = self._next_pid()
+        v5 = self.version == 5
+        buf = self._reserve(len(topic) + 10)
+        i = self._put_hdr(buf, 0, 0x82, 2 + v5 + 2 + len(topic) + 1)
+        buf[i] = pid >> 8
+        buf[i + 1] = pid & 0xff
+        i += 2
+        if v5:
+            buf[i] = 0  # no properties
+            i += 1
+        i = self._put_str(buf, i, topic)
+        buf[i] = qos
+        self.sock.write(buf, i + 1)
         while 1:
             op = self.wait_msg()
             if op == 0x90:
-                resp = self.sock.read(4)
-                #print(resp)
-                assert resp[1] == pkt[2] and resp[2] == pkt[3]
-                if resp[3] == 0x80:
-                    raise MQTTException(resp[3])
+                sz = self._recv_len()
+                self._fill(sz)
+                resp = self.rbuf
+                assert resp[0] == pid >> 8 and resp[1] == pid & 0xff
+                if resp[sz - 1] >= 0x80:
+                    raise MQTTException(resp[sz - 1])
                 return
 
     # Wait for a single incoming MQTT message and process it.
@@ -176,36 +419,48 @@ class MQTTClient:
     # set by .set_callback() method. Other (internal) MQTT
     # messages processed internally.
     def wait_msg(self):
-        res = self.sock.read(1)
+        res = self.sock.readinto(self.rbuf, 1)
         self.sock.setblocking(True)
         if res is None:
             return None
-        if res == b"":
+        if res == 0:
             raise OSError(-1)
-        if res == b"\xd0":  # PINGRESP
-            sz = self.sock.read(1)[0]
-            assert sz == 0
+        op = self.rbuf[0]
+        if op == 0xd0:  # PINGRESP
+            self._fill(1)
+            assert self.rbuf[0] == 0
+            self.ping_outstanding = False
             return None
-        op = res[0]
+        if op in (0x40, 0x50, 0x62, 0x70):
+            self._recv_ack(op)
+            return op
         if op & 0xf0 != 0x30:
             return op
         sz = self._recv_len()
-        topic_len = self.sock.read(2)
-        topic_len = (topic_len[0] << 8) | topic_len[1]
-        topic = self.sock.read(topic_len)
-        sz -= topic_len + 2
+        self._fill(sz)
+        rbuf = self.rbuf
+        i = 2 + (rbuf[0] << 8 | rbuf[1])
+        topic = self.rmv[2:i]
         if op & 6:
-            pid = self.sock.read(2)
-            pid = pid[0] << 8 | pid[1]
-            sz -= 2
-        msg = self.sock.read(sz)
+            pid = rbuf[i] << 8 | rbuf[i + 1]
+            i += 2
+        if self.version == 5:  # skip the properties
+            n = self._get_len(rbuf, i)
+            i += self._len_size(n) + n
+        msg = self.rmv[i:sz]
+        if self.cb_copy:
+            topic = bytes(topic)
+            msg = bytes(msg)
+        if op & 6 == 4:
+            # QoS 2: deliver once, even if the broker resends before PUBREL
+            if pid not in self.rcv_pids:
+                self.rcv_pids.add(pid)
+                self.cb(topic, msg)
+            self._send_ack(0x50, pid)
+            return
         self.cb(topic, msg)
         if op & 6 == 2:
-            pkt = bytearray(b"\x40\x02\0\0")
-            struct.pack_into("!H", pkt, 2, pid)
-            self.sock.write(pkt)
-        elif op & 6 == 4:
-            assert 0
+            self._send_ack(0x40, pid)
 
     # Checks whether a pending message from server is available.
     # If not, returns immediately with None. Otherwise, does
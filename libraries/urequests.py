@@ -16,26 +16,55 @@ NOTE: Due to the extremely small amount of memory available for use on the
       so as to not run out of memory.
       When this functionality is used, the content and text values on
       the Response class are not longer valid.
+
+NOTE: Added Session, which keeps one HTTP/1.1 keep-alive connection per
+      (scheme, host, port) open between requests instead of connecting (and
+      negotiating TLS) for every one. A connection goes back to the session
+      once its response body has been read or the response is closed, and
+      a request on a connection the server has since dropped is retried
+      once on a new one.
+
+NOTE: data may also be a file object or an iterable (list, tuple, generator)
+      of str/bytes pieces, which is streamed with chunked transfer encoding
+      rather than held in memory as one string.
 """
 
 import usocket
 
 class Response:
 
-    def __init__(self, f, chunked_response):
+    def __init__(self, f, chunked_response, length=None, release=None):
         self.raw = f
         self.encoding = "utf-8"
         self._cached = None
         self._chunked_response = chunked_response
         self._chunk_size = 0
+        self._length = length # body bytes left, None if the body runs to EOF
+        self._release = release # takes a kept-alive socket back
+
+    def _done(self):
+        # whole body read, so the connection can carry another request
+        if self._release and self.raw:
+            self._release(self.raw)
+            self.raw = None
 
     def close(self):
+        if self.raw and self._release:
+            # drain a small unread body so the connection can be reused
+            try:
+                if self._chunked_response or self._length <= 4096:
+                    while self.read(512):
+                        pass
+            except (OSError, ValueError):
+                pass
         if self.raw:
             self.raw.close()
             self.raw = None
         self._cached = None
 
     def read(self, sz=16 * 1024):
+        if not self.raw:
+            return b""
         if self._chunked_response:
             if self._chunk_size == 0:
                 l = self.raw.readline()
@@ -49,12 +78,22 @@ class Response:
                     # End of message
                     sep = self.raw.read(2)
                     assert sep == b"\r\n"
+                    self._done()
                     return b""
             data = self.raw.read(min(sz, self._chunk_size))
             self._chunk_size -= len(data)
             if self._chunk_size == 0:
                 sep = self.raw.read(2)
                 assert sep == b"\r\n"
+        elif self._length is not None:
+            data = b""
+            if self._length:
+                data = self.raw.read(min(sz, self._length))
+                if not data:
+                    raise OSError("connection closed")
+                self._length -= len(data)
+            if self._length == 0:
+                self._done()
         else:
             data = self.raw.read(sz)
         return data
@@ -63,20 +102,20 @@ class Response:
     def content(self):
         if self._cached is None:
             try:
-                if self._chunked_response:
+                if self._chunked_response or self._length is not None:
+                    content = b""
                     while True:
                         data = self.read()
                         if data == b"":
                             break
-                        if self._cached is None:
-                            self._cached = data
-                        else:
-                            self._cached += data
+                        content += data
+                    self._cached = content
                 else:
                     self._cached = self.raw.read()
             finally:
-                self.raw.close()
-                self.raw = None
+                if self.raw:
+                    self.raw.close()
+                    self.raw = None
         return self._cached
 
     @property
@@ -88,8 +127,7 @@ class Response:
         return ujson.loads(self.content)
 
 
-def request(method, url, data=None, json=None, headers={}, stream=None,
-            verify=None, cert=None, request_1_1=False):
+def _parse_url(url):
     try:
         scheme, _, host, path = url.split("/", 3)
     except ValueError:
@@ -97,18 +135,23 @@ def request(method, url, data=None, json=None, headers={}, stream=None,
         path = ""
     if scheme == "http:":
         port = 80
-        proto = usocket.IPPROTO_TCP
     elif scheme == "https:":
-        import ussl
         port = 443
-        proto = usocket.IPPROTO_SEC
     else:
         raise ValueError("Unsupported scheme: " + scheme)
 
     if ":" in host:
         host, port = host.split(":", 1)
         port = int(port)
+    return scheme, host, port, path
 
+
+def _connect(scheme, host, port, verify=None, cert=None):
+    if scheme == "https:":
+        import ussl
+        proto = usocket.IPPROTO_SEC
+    else:
+        proto = usocket.IPPROTO_TCP
     s = usocket.socket(usocket.AF_INET, usocket.SOCK_STREAM, proto)
     try:
         if proto == usocket.IPPROTO_SEC:
@@ -120,58 +163,260 @@ def request(method, url, data=None, json=None, headers={}, stream=None,
                 wrap_params['ca_certs'] = verify
             s = ussl.wrap_socket(s, **wrap_params)
         s.connect((host, port))
-        if request_1_1:
-            s.write(b"%s /%s HTTP/1.1\r\n" % (method, path))
+    except OSError:
+        s.close()
+        raise
+    return s
+
+
+_buf = bytearray(256) # request head, then body chunks while streaming
+_merge_limit = 1024 # largest head and body written together, bigger bodies go in a second write
+
+def _put(i, s):
+    global _buf
+    if isinstance(s, str):
+        s = s.encode()
+    n = i + len(s)
+    if len(_buf) < n:
+        buf = bytearray(n + 64)
+        buf[:i] = _buf[:i]
+        _buf = buf
+    _buf[i:n] = s
+    return n
+
+
+def _write_chunk(s, mv, n, last=False):
+    # the size line goes in the gap left in front of the data
+    h = b"%x\r\n" % n
+    mv[8 - len(h):8] = h
+    mv[8 + n:10 + n] = b"\r\n"
+    end = 10 + n
+    if last:
+        mv[end:end + 5] = b"0\r\n\r\n"
+        end += 5
+    s.write(mv[8 - len(h):end])
+
+
+# Send a body of unknown length with chunked transfer encoding. body is a
+# file object, read straight into the buffer, or an iterable of str/bytes
+# pieces, which are packed together so small pieces share a chunk.
+def _send_chunked(s, body):
+    mv = memoryview(_buf)
+    cap = len(_buf) - 15
+    n = 0
+    if hasattr(body, "readinto"):
+        while True:
+            n = body.readinto(mv[8:8 + cap])
+            if not n:
+                break
+            _write_chunk(s, mv, n)
+        s.write(b"0\r\n\r\n")
+    else:
+        for p in body:
+            if isinstance(p, str):
+                p = p.encode()
+            if n + len(p) > cap:
+                if n:
+                    _write_chunk(s, mv, n)
+                    n = 0
+                if len(p) > cap:
+                    s.write(b"%x\r\n" % len(p))
+                    s.write(p)
+                    s.write(b"\r\n")
+                    continue
+            mv[8 + n:8 + n + len(p)] = p
+            n += len(p)
+        if n:
+            _write_chunk(s, mv, n, True)
         else:
-            s.write(b"%s /%s HTTP/1.0\r\n" % (method, path))
-        if not "Host" in headers:
-            s.write(b"Host: %s\r\n" % host)
-        s.write(b"Connection: close\r\n")
-        # Iterate over keys to avoid tuple alloc
-        for k in headers:
-            s.write(k)
-            s.write(b": ")
-            s.write(headers[k])
-            s.write(b"\r\n")
-        if json is not None:
-            assert data is None
-            import ujson
-            data = ujson.dumps(json)
-            s.write(b"Content-Type: application/json\r\n")
-        if data:
-            s.write(b"Content-Length: %d\r\n" % len(data))
-        s.write(b"\r\n")
-        if data:
-            s.write(data)
+            s.write(b"0\r\n\r\n")
+
+
+def _streamed(data):
+    return data is not None and not isinstance(data, (str, bytes, bytearray))
+
 
+# The request head is assembled in _buf and written at once, together with
+# the body if they fit in _merge_limit bytes.
+def _send(s, method, host, path, headers, data, json, request_1_1, keep_alive=False):
+    if json is not None:
+        assert data is None
+        import ujson
+        data = ujson.dumps(json)
+    if isinstance(data, str):
+        data = data.encode()
+    stream = _streamed(data)
+    i = _put(0, method)
+    i = _put(i, " /")
+    i = _put(i, path)
+    if request_1_1 or stream:
+        i = _put(i, " HTTP/1.1\r\n")
+    else:
+        i = _put(i, " HTTP/1.0\r\n")
+    if not "Host" in headers:
+        i = _put(i, "Host: ")
+        i = _put(i, host)
+        i = _put(i, "\r\n")
+    if keep_alive:
+        i = _put(i, "Connection: keep-alive\r\n")
+    else:
+        i = _put(i, "Connection: close\r\n")
+    # Iterate over keys to avoid tuple alloc
+    for k in headers:
+        i = _put(i, k)
+        i = _put(i, ": ")
+        i = _put(i, headers[k])
+        i = _put(i, "\r\n")
+    if json is not None:
+        i = _put(i, "Content-Type: application/json\r\n")
+    if stream:
+        i = _put(i, "Transfer-Encoding: chunked\r\n")
+    elif data:
+        i = _put(i, "Content-Length: %d\r\n" % len(data))
+    elif keep_alive and method in ("POST", "PUT", "PATCH"):
+        i = _put(i, "Content-Length: 0\r\n")
+    i = _put(i, "\r\n")
+    if data and not stream and i + len(data) <= max(len(_buf), _merge_limit):
+        i = _put(i, data)
+        data = None
+    s.write(_buf, i)
+    if stream:
+        _send_chunked(s, data)
+    elif data:
+        s.write(data)
+
+
+# Read the status line and headers. Returns status, reason, whether the body
+# is chunked, its length (None if it runs until the server closes) and
+# whether the server will keep the connection open afterwards.
+def _recv_head(s, method):
+    l = s.readline()
+    #print(l)
+    if not l:
+        raise OSError("connection closed")
+    l = l.split(None, 2)
+    status = int(l[1])
+    reason = ""
+    if len(l) > 2:
+        reason = l[2].rstrip()
+    keep_alive = l[0] == b"HTTP/1.1"
+    chunked = False
+    length = None
+    while True:
         l = s.readline()
+        if not l or l == b"\r\n":
+            break
         #print(l)
-        l = l.split(None, 2)
-        status = int(l[1])
-        reason = ""
-        if len(l) > 2:
-            reason = l[2].rstrip()
+        k = l[:l.find(b":") + 1].lower()
+        if k == b"transfer-encoding:":
+            if b"chunked" in l:
+                chunked = True
+        elif k == b"content-length:":
+            length = int(l[15:])
+        elif k == b"connection:":
+            v = l[11:].strip().lower()
+            if v == b"close":
+                keep_alive = False
+            elif v == b"keep-alive":
+                keep_alive = True
+        elif k == b"location:" and not 200 <= status <= 299:
+            raise NotImplementedError("Redirects not yet supported")
+    if method == "HEAD" or status in (204, 304):
         chunked = False
-        while True:
-            l = s.readline()
-            if not l or l == b"\r\n":
-                break
-            #print(l)
-            if l.startswith(b"Transfer-Encoding:"):
-                if b"chunked" in l:
-                    chunked = True
-            elif l.startswith(b"Location:") and not 200 <= status <= 299:
-                raise NotImplementedError("Redirects not yet supported")
+        length = 0
+    if chunked:
+        length = None
+    elif length is None:
+        keep_alive = False # body is delimited by the close
+    return status, reason, chunked, length, keep_alive
+
+
+def request(method, url, data=None, json=None, headers={}, stream=None,
+            verify=None, cert=None, request_1_1=False):
+    scheme, host, port, path = _parse_url(url)
+    s = _connect(scheme, host, port, verify, cert)
+    try:
+        _send(s, method, host, path, headers, data, json, request_1_1)
+        status, reason, chunked, length, _ = _recv_head(s, method)
     except OSError:
         s.close()
         raise
 
-    resp = Response(s, chunked)
+    resp = Response(s, chunked, length)
     resp.status_code = status
     resp.reason = reason
     return resp
 
 
+class Session:
+
+    def __init__(self):
+        self._idle = {} # (scheme, host, port) -> idle socket
+
+    def _take(self, key):
+        return self._idle.pop(key, None)
+
+    def _keep(self, key, s):
+        old = self._idle.get(key)
+        if old:
+            old.close()
+        self._idle[key] = s
+
+    def request(self, method, url, data=None, json=None, headers={}, stream=None,
+                verify=None, cert=None, request_1_1=True):
+        scheme, host, port, path = _parse_url(url)
+        key = (scheme, host, port)
+        s = self._take(key)
+        while True:
+            reused = s is not None
+            if not reused:
+                s = _connect(scheme, host, port, verify, cert)
+            try:
+                _send(s, method, host, path, headers, data, json, True, True)
+                status, reason, chunked, length, keep_alive = _recv_head(s, method)
+                break
+            except OSError:
+                s.close()
+                s = None
+                # a generator or file can't be sent a second time
+                if not reused or (_streamed(data) and not isinstance(data, (list, tuple))):
+                    raise
+                # the server dropped the idle connection, retry on a new one
+
+        release = None
+        if keep_alive:
+            release = lambda s: self._keep(key, s)
+        resp = Response(s, chunked, length, release)
+        resp.status_code = status
+        resp.reason = reason
+        if length == 0:
+            resp._done()
+        return resp
+
+    def close(self):
+        for s in self._idle.values():
+            s.close()
+        self._idle = {}
+
+    def head(self, url, **kw):
+        return self.request("HEAD", url, **kw)
+
+    def get(self, url, **kw):
+        return self.request("GET", url, **kw)
+
+    def post(self, url, **kw):
+        return self.request("POST", url, **kw)
+
+    def put(self, url, **kw):
+        return self.request("PUT", url, **kw)
+
+    def patch(self, url, **kw):
+        return self.request("PATCH", url, **kw)
+
+    def delete(self, url, **kw):
+        return self.request("DELETE", url, **kw)
+
+
 def head(url, **kw):
     return request("HEAD", url, **kw)
 
@@ -0,0 +1,144 @@
+# a minimal in-process MQTT broker for the umqtt tests. it acknowledges
+# connects, pings, publishes and subscribes, and records what it receives.
+import socket
+import struct
+import threading
+import time
+
+
+class Broker:
+    def __init__(self, session_present=0, alias_max=0):
+        self.listener = socket.socket()
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(5)
+        self.port = self.listener.getsockname()[1]
+        self.session_present = session_present
+        self.alias_max = alias_max # topic alias maximum sent in a v5 CONNACK
+        self.ignore_ping = False
+        self.v5 = True # False refuses MQTT 5 connects, as a 3.1.1 broker does
+        self.conns = []
+        self.packets = [] # (first header byte, body)
+        self.connects = [] # CONNECT bodies
+        self.publishes = [] # (topic, payload, qos, dup)
+        self.bytes = 0
+        self._aliases = {}
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        self.drop()
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR) # wakes the accept thread
+        except OSError:
+            pass
+        self.listener.close()
+
+    def wait_for(self, condition, timeout=2):
+        end = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > end:
+                raise AssertionError("broker timed out")
+            time.sleep(0.005)
+
+    def send(self, data):
+        # write raw packets to the newest connection
+        self.conns[-1].sendall(data)
+
+    def drop(self):
+        # cut every connection, as a lost cellular link would
+        for conn in self.conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+        self.conns = []
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.conns.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _recv(self, conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise OSError("closed")
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        version = 4
+        try:
+            while True:
+                header = self._recv(conn, 1)[0]
+                size = shift = 0
+                head = 1
+                while True:
+                    b = self._recv(conn, 1)[0]
+                    head += 1
+                    size |= (b & 0x7F) << shift
+                    shift += 7
+                    if not b & 0x80:
+                        break
+                body = self._recv(conn, size)
+                self.bytes += head + size
+                self.packets.append((header, body))
+                op = header & 0xF0
+                if op == 0x10:
+                    version = body[6]
+                    self.connects.append(body)
+                    if version == 5 and not self.v5:
+                        conn.sendall(b"\x20\x02\x00\x01")
+                        conn.close()
+                        return
+                    if version == 5:
+                        props = b""
+                        if self.alias_max:
+                            props = b"\x22" + struct.pack("!H", self.alias_max)
+                        conn.sendall(bytes([0x20, 3 + len(props), self.session_present, 0, len(props)]) + props)
+                    else:
+                        conn.sendall(bytes([0x20, 2, self.session_present, 0]))
+                elif op == 0xC0:
+                    if not self.ignore_ping:
+                        conn.sendall(b"\xd0\x00")
+                elif op == 0x30:
+                    self._publish(conn, header, body, version)
+                elif op == 0x60:
+                    conn.sendall(b"\x70\x02" + body[:2])
+                elif op == 0x80:
+                    conn.sendall(b"\x90\x03" + body[:2] + b"\x00")
+                elif op == 0xE0:
+                    conn.close()
+                    return
+        except OSError:
+            pass
+
+    def _publish(self, conn, header, body, version):
+        qos = (header >> 1) & 3
+        n = struct.unpack("!H", body[:2])[0]
+        topic = body[2:2 + n]
+        i = 2 + n
+        if qos:
+            pid = body[i:i + 2]
+            i += 2
+        if version == 5:
+            n = body[i]
+            props = body[i + 1:i + 1 + n]
+            i += 1 + n
+            if props[:1] == b"\x23":
+                alias = struct.unpack("!H", props[1:3])[0]
+                if topic:
+                    self._aliases[alias] = topic
+                else:
+                    topic = self._aliases[alias]
+        self.publishes.append((topic, body[i:], qos, bool(header & 8)))
+        if qos == 1:
+            conn.sendall(b"\x40\x02" + pid)
+        elif qos == 2:
+            conn.sendall(b"\x50\x02" + pid)
@@ -0,0 +1,71 @@
+# the libraries are written for micropython. under cpython they import the
+# stand-ins in tests/fakes, and time gets the micropython ticks functions.
+import os
+import sys
+import time
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, "fakes"), os.path.join(HERE, "..", "libraries")]
+
+if not hasattr(time, "ticks_ms"):
+    time.ticks_ms = lambda: int(time.monotonic() * 1000)
+    time.ticks_add = lambda ticks, delta: ticks + delta
+    time.ticks_diff = lambda new, old: new - old
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+
+
+class FakeClock:
+    # a clock for sensorlab.Runtime that only moves when slept on
+    def __init__(self):
+        self.now = 0
+        self.slept = 0
+        self.on_sleep = None # called after each sleep, to act mid-run
+
+    def ticks_ms(self):
+        return self.now
+
+    def ticks_add(self, ticks, delta):
+        return ticks + delta
+
+    def ticks_diff(self, new, old):
+        return new - old
+
+    def sleep_ms(self, ms):
+        self.now += ms
+        self.slept += ms
+        if self.on_sleep:
+            self.on_sleep(self.now)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def bus():
+    # the fake smbus2, emptied for the test
+    import smbus2
+    smbus2.reset()
+    yield smbus2
+    smbus2.reset()
+
+
+@pytest.fixture
+def broker():
+    from broker import Broker
+    b = Broker()
+    yield b
+    b.close()
+
+
+@pytest.fixture
+def http_server():
+    from http_server import Server
+    import usocket
+    server = Server()
+    usocket.reset()
+    yield server
+    server.close()
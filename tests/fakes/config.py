@@ -0,0 +1 @@
+# stand-in for a project's config.py
@@ -0,0 +1,16 @@
+# stand-in for digi.cloud, recording the data points sent
+TRANSPORT_TCP = 0
+TRANSPORT_UDP = 1
+sent = []
+
+
+class DataPoints:
+    def __init__(self, transport=TRANSPORT_TCP):
+        self.items = []
+
+    def add(self, stream, value):
+        self.items.append((stream, value))
+
+    def send(self, timeout=0):
+        sent.append(self.items)
+        self.items = []
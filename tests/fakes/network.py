@@ -0,0 +1,2 @@
+# stand-in for the xbee network module
+Cellular = None
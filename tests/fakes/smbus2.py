@@ -0,0 +1,131 @@
+# stand-in for smbus2, backed by a 256 byte register file per address.
+#
+# every bus transaction is counted and logged as (address, method) in the
+# order it reached the bus, so tests can check how many transactions a read
+# took and that transactions from several threads didn't interleave. faults
+# queued in FAULTS[address] are raised, in order, by the next transactions to
+# that address (None lets one through).
+from ctypes import Structure, POINTER, c_char, c_uint16, create_string_buffer, memmove, string_at
+import threading
+
+DEVICES = {} # address -> bytearray(256)
+FAULTS = {} # address -> exceptions for the next transactions
+LOG = [] # (address, method) per transaction
+COUNT = {"transactions": 0, "messages": 0, "bytes": 0}
+
+_busy = threading.Lock()
+
+
+def reset():
+    DEVICES.clear()
+    FAULTS.clear()
+    del LOG[:]
+    for key in COUNT:
+        COUNT[key] = 0
+
+
+class i2c_msg(Structure):
+    _fields_ = [("addr", c_uint16), ("flags", c_uint16), ("len", c_uint16), ("buf", POINTER(c_char))]
+
+    @staticmethod
+    def write(address, data):
+        data = bytes(data)
+        return i2c_msg(addr=address, flags=0, len=len(data), buf=create_string_buffer(data, len(data)))
+
+    @staticmethod
+    def read(address, length):
+        return i2c_msg(addr=address, flags=1, len=length, buf=create_string_buffer(length))
+
+    def __bytes__(self):
+        return string_at(self.buf, self.len)
+
+    def __iter__(self):
+        return iter(bytes(self))
+
+    def __len__(self):
+        return self.len
+
+
+class SMBus:
+    def __init__(self, bus=1):
+        self.pointer = {} # register pointer per address, set by write_byte
+
+    def _begin(self, address, method):
+        # a transaction overlapping another means the caller didn't hold the
+        # bus; real hardware would have mixed the two up
+        if not _busy.acquire(False):
+            raise AssertionError("overlapping bus transactions")
+        try:
+            faults = FAULTS.get(address)
+            if faults:
+                fault = faults.pop(0)
+                if fault is not None:
+                    raise fault
+            if address not in DEVICES:
+                raise OSError(121, "Remote I/O error")
+            LOG.append((address, method))
+            COUNT["transactions"] += 1
+            return DEVICES[address]
+        finally:
+            _busy.release()
+
+    def read_byte(self, address):
+        return self._begin(address, "read_byte")[self.pointer.get(address, 0)]
+
+    def read_byte_data(self, address, register):
+        return self._begin(address, "read_byte_data")[register]
+
+    def read_word_data(self, address, register):
+        data = self._begin(address, "read_word_data")
+        return data[register] | data[register + 1] << 8
+
+    def read_i2c_block_data(self, address, register, length):
+        assert length <= 32
+        return list(self._begin(address, "read_i2c_block_data")[register:register + length])
+
+    def write_byte(self, address, value):
+        self._begin(address, "write_byte")
+        self.pointer[address] = value
+
+    def write_byte_data(self, address, register, value):
+        self._begin(address, "write_byte_data")[register] = value
+
+    def write_word_data(self, address, register, value):
+        data = self._begin(address, "write_word_data")
+        data[register] = value & 0xFF
+        data[register + 1] = value >> 8
+
+    def write_i2c_block_data(self, address, register, values):
+        self._begin(address, "write_i2c_block_data")[register:register + len(values)] = bytes(values)
+
+    def write_quick(self, address):
+        self._begin(address, "write_quick")
+
+    def i2c_rdwr(self, *messages):
+        # one transaction on the bus however many devices the messages address
+        if not _busy.acquire(False):
+            raise AssertionError("overlapping bus transactions")
+        try:
+            COUNT["transactions"] += 1
+            COUNT["messages"] += len(messages)
+            pointer = {}
+            for msg in messages:
+                faults = FAULTS.get(msg.addr)
+                if faults:
+                    fault = faults.pop(0)
+                    if fault is not None:
+                        raise fault
+                if msg.addr not in DEVICES:
+                    raise OSError(121, "Remote I/O error")
+                LOG.append((msg.addr, "i2c_rdwr"))
+                if msg.flags == 0:
+                    pointer[msg.addr] = bytes(msg)[0]
+                else:
+                    start = pointer[msg.addr]
+                    memmove(msg.buf, bytes(DEVICES[msg.addr][start:start + msg.len]), msg.len)
+                    COUNT["bytes"] += msg.len
+        finally:
+            _busy.release()
+
+    def close(self):
+        pass
@@ -0,0 +1,7 @@
+# micropython's ujson writes without spaces
+from json import loads, load
+import json as _json
+
+
+def dumps(obj):
+    return _json.dumps(obj, separators=(",", ":"))
@@ -0,0 +1,77 @@
+# stand-in for micropython's usocket: a real tcp socket with the stream
+# methods (read, readinto, readline, write) the micropython one has. connects
+# and writes are counted so tests can assert how a request went out.
+import socket as _socket
+
+AF_INET = _socket.AF_INET
+SOCK_STREAM = _socket.SOCK_STREAM
+IPPROTO_TCP = _socket.IPPROTO_TCP
+IPPROTO_SEC = -1
+
+COUNT = {"connects": 0, "writes": 0, "bytes": 0}
+
+
+def reset():
+    for key in COUNT:
+        COUNT[key] = 0
+
+
+def getaddrinfo(host, port, *args):
+    return _socket.getaddrinfo(host, port, *args)
+
+
+class socket:
+    def __init__(self, af=AF_INET, type=SOCK_STREAM, proto=0):
+        self.s = _socket.socket(af, type)
+
+    def connect(self, address):
+        COUNT["connects"] += 1
+        self.s.connect(address)
+
+    def write(self, data, length=None):
+        if isinstance(data, str):
+            data = data.encode()
+        data = bytes(data if length is None else memoryview(data)[:length])
+        self.s.sendall(data)
+        COUNT["writes"] += 1
+        COUNT["bytes"] += len(data)
+        return len(data)
+
+    def read(self, size=-1):
+        out = b""
+        try:
+            while size < 0 or len(out) < size:
+                data = self.s.recv(4096 if size < 0 else size - len(out))
+                if not data:
+                    break
+                out += data
+        except BlockingIOError:
+            return out or None
+        return out
+
+    def readinto(self, buf, size=None):
+        size = len(buf) if size is None else size
+        try:
+            data = self.s.recv(size)
+        except BlockingIOError:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def readline(self):
+        out = b""
+        while not out.endswith(b"\n"):
+            data = self.s.recv(1)
+            if not data:
+                break
+            out += data
+        return out
+
+    def setblocking(self, flag):
+        self.s.setblocking(flag)
+
+    def settimeout(self, timeout):
+        self.s.settimeout(timeout)
+
+    def close(self):
+        self.s.close()
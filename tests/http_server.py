@@ -0,0 +1,70 @@
+# a local HTTP/1.1 server for the urequests tests, recording each request's
+# connection and body
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True # the body is written after the head
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                n = int(self.rfile.readline(), 16)
+                body += self.rfile.read(n)
+                self.rfile.readline()
+                if n == 0:
+                    return body
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        server.requests.append((self.command, self.path, dict(self.headers), self._body()))
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"5\r\nhello\r\n3\r\n!!!\r\n0\r\n\r\n")
+        elif self.path == "/close":
+            self.send_response(201)
+            self.send_header("Content-Length", "2")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"ok")
+            self.close_connection = True
+        elif self.path == "/drop":
+            # closes without saying so, as a server timing out an idle
+            # connection does
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.close_connection = True
+        else:
+            body = b'{"status":true}'
+            self.send_response(202)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    do_GET = do_PUT = do_POST
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.connections = set()
+        self.requests = [] # (method, path, headers, body)
+        self.url = "http://127.0.0.1:%d" % self.server_address[1]
+        threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True).start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,93 @@
+# BME280.read_all() reads the data registers in one burst and compensates
+# with the calibration unpacked in begin(). it must agree with the per-value
+# properties. run with -s for the timings.
+import random
+import struct
+import time
+
+import pytest
+
+import qwiic_bme280
+from qwiic_i2c import linux_i2c
+
+
+@pytest.fixture
+def registers(bus):
+    regs = bytearray(256)
+    regs[0xD0] = 0x60 # chip id
+    # the calibration example from the datasheet, plus plausible humidity trim
+    struct.pack_into("<HhhHhhhhhhhh", regs, 0x88,
+                     27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+    regs[0xA1] = 75
+    struct.pack_into("<h", regs, 0xE1, 362)
+    regs[0xE3] = 0
+    regs[0xE4] = 19
+    regs[0xE5] = 0x20 | 0x0B
+    regs[0xE6] = 50
+    regs[0xE7] = 30
+    bus.DEVICES[0x77] = regs
+    return regs
+
+
+@pytest.fixture
+def sensor(registers):
+    bme = qwiic_bme280.QwiicBme280(i2c_driver=linux_i2c.LinuxI2C())
+    assert bme.begin()
+    return bme
+
+
+def set_raw(registers, pressure, temperature, humidity):
+    registers[0xF7:0xFF] = bytes((pressure >> 12, pressure >> 4 & 0xFF, (pressure & 0x0F) << 4,
+                                  temperature >> 12, temperature >> 4 & 0xFF, (temperature & 0x0F) << 4,
+                                  humidity >> 8, humidity & 0xFF))
+
+
+def test_matches_per_value_reads(sensor, registers):
+    rnd = random.Random(1)
+    for _ in range(2000):
+        set_raw(registers, rnd.randrange(200000, 500000), rnd.randrange(400000, 600000),
+                rnd.randrange(20000, 40000))
+        expected = (sensor.temperature_celsius, sensor.pressure, sensor.humidity)
+        assert sensor.read_all() == expected
+
+
+def test_datasheet_example(sensor, registers):
+    set_raw(registers, 415148, 519888, 30000)
+    temperature, pressure, humidity = sensor.read_all()
+    assert temperature == pytest.approx(25.08, abs=0.01)
+    assert pressure == pytest.approx(100653, abs=2)
+    assert 0 <= humidity <= 100
+
+
+def test_one_transaction_and_cpu_time(sensor, registers, bus):
+    set_raw(registers, 415148, 519888, 30000)
+    n = 2000
+    start = bus.COUNT["transactions"]
+    t = time.perf_counter()
+    for _ in range(n):
+        sensor.temperature_celsius
+        sensor.pressure
+        sensor.humidity
+    separate = time.perf_counter() - t
+    separate_tx = (bus.COUNT["transactions"] - start) / float(n)
+    start = bus.COUNT["transactions"]
+    t = time.perf_counter()
+    for _ in range(n):
+        sensor.read_all()
+    burst = time.perf_counter() - t
+    burst_tx = (bus.COUNT["transactions"] - start) / float(n)
+    assert burst_tx == 1
+    assert separate_tx == 5
+    print("\nper value: %d transactions, %.1f us; read_all: %d transaction, %.1f us"
+          % (separate_tx, separate / n * 1e6, burst_tx, burst / n * 1e6))
+
+
+def test_read_all_from_plan(sensor, registers, bus):
+    import qwiic_i2c
+    set_raw(registers, 415148, 519888, 30000)
+    plan = qwiic_i2c.ReadPlan(sensor._i2c)
+    env = sensor.add_to_plan(plan)
+    start = bus.COUNT["transactions"]
+    plan.run()
+    assert bus.COUNT["transactions"] - start == 1
+    assert sensor.read_all(plan.view(env)) == sensor.read_all()
@@ -0,0 +1,84 @@
+# HeartRateBatch must find exactly the beats heart_rate.HeartRate does, fed
+# the same samples one at a time. run with -s for the timings.
+import math
+import random
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from qwiic_max3010x import heart_rate, heart_rate_batch
+
+RATE = 100
+
+
+def recording(n, seed=1, bpm=72, step=0):
+    # IR and red traces with a pulse, its harmonic, noise and optionally a
+    # step in the baseline (the finger moving)
+    rnd = random.Random(seed)
+    f = bpm / 60.0
+    ir = [int(100000 + 800 * math.sin(2 * math.pi * f * i / RATE)
+              + 300 * math.sin(2 * math.pi * 2 * f * i / RATE + 1)
+              + rnd.gauss(0, 40) + (step if i > n // 2 else 0)) for i in range(n)]
+    red = [int(60000 + 300 * math.sin(2 * math.pi * f * i / RATE) + rnd.gauss(0, 20)) for i in range(n)]
+    return ir, red
+
+
+def reference(samples):
+    hr = heart_rate.HeartRate()
+    return [hr.checkForBeat(x) for x in samples]
+
+
+@pytest.mark.parametrize("step", [0, 5000])
+def test_beats_match_streaming_detector(step):
+    ir, _ = recording(20000, step=step)
+    batch = heart_rate_batch.HeartRateBatch(sampleRate=RATE)
+    expected = reference(ir)
+    assert sum(expected) > 100
+    assert batch.checkForBeats(ir).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_beats_match_on_noise(seed):
+    # spikes across the full 18 bit range exercise the wraparound and the
+    # amplitude checks
+    rnd = random.Random(seed)
+    samples = [rnd.randint(0, 2 ** 18 - 1) if rnd.random() < 0.1 else rnd.randint(1000, 1100)
+               for _ in range(5000)]
+    batch = heart_rate_batch.HeartRateBatch(sampleRate=RATE)
+    assert batch.checkForBeats(samples).tolist() == reference(samples)
+
+
+def test_filtered_signal_matches():
+    ir, _ = recording(5000)
+    hr = heart_rate.HeartRate()
+    ac = []
+    for x in ir:
+        hr.checkForBeat(x)
+        ac.append(hr.IR_AC_Signal_Current)
+    assert heart_rate_batch.HeartRateBatch(sampleRate=RATE).filter(ir)[1].tolist() == ac
+
+
+def test_analyze_rate_and_spo2():
+    ir, red = recording(6000, bpm=72)
+    result = heart_rate_batch.HeartRateBatch(sampleRate=RATE).analyze(ir, red)
+    assert len(result['bpm']) == len(result['beats']) - 1 == len(result['spo2'])
+    assert np.nanmedian(result['beatAvg']) == pytest.approx(72, abs=3)
+    assert result['times'][1] == result['beats'][1] / RATE
+    spo2 = result['spo2'][~np.isnan(result['spo2'])]
+    assert len(spo2) and ((spo2 > 50) & (spo2 <= 100)).all()
+
+
+def test_throughput():
+    ir, _ = recording(60000, step=5000)
+    start = time.perf_counter()
+    expected = reference(ir)
+    streaming = time.perf_counter() - start
+    batch = heart_rate_batch.HeartRateBatch(sampleRate=RATE)
+    start = time.perf_counter()
+    got = batch.checkForBeats(ir)
+    vectorized = time.perf_counter() - start
+    assert got.tolist() == expected
+    print("\n%d samples (10 min at 100 Hz): checkForBeat %.0f ms, HeartRateBatch %.0f ms, x%.1f"
+          % (len(ir), streaming * 1000, vectorized * 1000, streaming / vectorized))
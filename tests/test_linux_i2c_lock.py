@@ -0,0 +1,204 @@
+# the shared bus lock under contention. the fake smbus2 logs transactions
+# in bus order and fails on any that overlap. run with -s for the timings.
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+import qwiic_i2c
+from qwiic_i2c import linux_i2c
+from qwiic_i2c.linux_i2c import BusLock
+
+ADDRESSES = range(0x10, 0x18)
+
+
+@pytest.fixture
+def devices(bus):
+    for address in ADDRESSES:
+        bus.DEVICES[address] = bytearray([address] * 256)
+    return bus
+
+
+@pytest.fixture(autouse=True)
+def switch_often():
+    # make the interpreter switch threads far more often than it would, so
+    # missing locking shows up
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def queue_up(lock, n, body):
+    # start n threads that queue on lock in order
+    threads = []
+    for i in range(n):
+        t = threading.Thread(target=body, args=(i,))
+        t.start()
+        threads.append(t)
+        while lock._next_ticket < len(threads) + 1:
+            time.sleep(0.001)
+    return threads
+
+
+def test_drivers_on_one_bus_share_a_lock(devices):
+    assert linux_i2c.LinuxI2C()._lock is linux_i2c.LinuxI2C()._lock
+
+
+def test_pointer_then_read_pairs_stay_atomic(devices):
+    i2c = linux_i2c.LinuxI2C()
+    errors = []
+    rounds = 300
+
+    def worker(address):
+        buf = bytearray(4)
+        try:
+            for i in range(rounds):
+                with i2c:
+                    i2c.writeCommand(address, i & 0xFF)
+                    if i2c.readByte(address) != address:
+                        errors.append(address)
+                i2c.readBlockInto(address, 0, buf)
+                if buf != bytearray([address] * 4):
+                    errors.append(address)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(a,)) for a in ADDRESSES]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    assert errors == []
+    log = devices.LOG
+    assert len(log) == len(ADDRESSES) * rounds * 4 # pointer, read, and the two rdwr messages
+    # every pointer write is followed straight away by its read
+    for i, (address, method) in enumerate(log):
+        if method == "write_byte":
+            assert log[i + 1] == (address, "read_byte")
+    # and the threads did take turns
+    assert len(set(address for address, _ in log[:len(log) // 4])) > 1
+    print("\n%d threads: %d transactions in %.0f ms" % (len(ADDRESSES), devices.COUNT["transactions"], elapsed * 1000))
+
+
+def test_fair_lock_serves_in_arrival_order():
+    lock = BusLock(True)
+    order = []
+    lock.acquire()
+
+    def waiter(i):
+        with lock:
+            order.append(i)
+
+    threads = queue_up(lock, 6, waiter)
+    lock.release()
+    for t in threads:
+        t.join()
+    assert order == list(range(6))
+
+
+def test_fast_poller_cannot_starve_others(devices):
+    i2c = linux_i2c.LinuxI2C()
+    done = threading.Event()
+    reads = []
+
+    def poller():
+        while not done.is_set():
+            i2c.readByte(0x10, 0)
+
+    def other():
+        start = time.perf_counter()
+        for _ in range(50):
+            i2c.readByte(0x11, 0)
+        reads.append(time.perf_counter() - start)
+
+    p = threading.Thread(target=poller)
+    p.start()
+    o = threading.Thread(target=other)
+    o.start()
+    o.join(5)
+    done.set()
+    p.join()
+    assert reads and not o.is_alive()
+
+
+def test_reentrant_and_owned():
+    lock = BusLock()
+    with lock:
+        with lock:
+            assert lock._depth == 2
+        assert lock._owner == threading.get_ident()
+    assert lock._owner is None
+    lock.acquire()
+    errors = []
+
+    def release():
+        try:
+            lock.release()
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=release)
+    t.start()
+    t.join()
+    assert len(errors) == 1
+    lock.release()
+
+
+@pytest.mark.parametrize("victim", [0, 1])
+def test_interrupted_waiter_does_not_strand_queue(victim):
+    # the victim's wait is interrupted (e.g. KeyboardInterrupt) while it is
+    # first in the queue, or in the middle of it
+    lock = BusLock(True)
+    order = []
+    lock.acquire()
+    wait = lock._cond.wait
+    victim_ident = []
+
+    def interruptible_wait(timeout=None):
+        if victim_ident and threading.get_ident() == victim_ident[0]:
+            raise KeyboardInterrupt
+        return wait(timeout)
+
+    def waiter(i):
+        if i == victim:
+            victim_ident.append(threading.get_ident())
+        try:
+            with lock:
+                order.append(i)
+        except KeyboardInterrupt:
+            order.append("interrupted %d" % i)
+
+    threads = queue_up(lock, 3, waiter)
+    lock._cond.wait = interruptible_wait
+    with lock._cond:
+        lock._cond.notify_all()
+    while ("interrupted %d" % victim) not in order:
+        time.sleep(0.001)
+    lock.release()
+    for t in threads:
+        t.join(2)
+    assert not any(t.is_alive() for t in threads)
+    assert [i for i in order if isinstance(i, int)] == [i for i in range(3) if i != victim]
+    assert lock._serving == lock._next_ticket and lock._abandoned == set()
+
+
+def test_async_calls_interleave_safely(devices):
+    i2c = linux_i2c.LinuxI2C()
+
+    async def main():
+        bus = qwiic_i2c.AsyncI2C(i2c)
+        try:
+            blocks = await asyncio.gather(*[bus.read_block(a, 0, 3) for a in ADDRESSES])
+            found = await bus.scan()
+        finally:
+            bus.close()
+        return blocks, found
+
+    blocks, found = asyncio.run(main())
+    assert blocks == [[a] * 3 for a in ADDRESSES]
+    assert list(ADDRESSES) == [a for a in found if a in ADDRESSES]
@@ -0,0 +1,174 @@
+# LinuxI2C retries, backoff and circuit breaker against the fault-injecting
+# fake smbus2
+import errno
+import threading
+
+import pytest
+
+from qwiic_i2c import linux_i2c
+
+NACK = OSError(errno.EREMOTEIO, "Remote I/O error")
+
+
+class FakeTime:
+    # monotonic only moves when slept on; the sleeps are recorded
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(linux_i2c, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def i2c(bus, clock):
+    bus.DEVICES[0x40] = bytearray(range(256))
+    bus.DEVICES[0x41] = bytearray(256)
+    return linux_i2c.LinuxI2C()
+
+
+def test_classify_error():
+    assert linux_i2c.classifyError(OSError(errno.EREMOTEIO, "")) == linux_i2c.NACK
+    assert linux_i2c.classifyError(OSError(errno.EIO, "")) == linux_i2c.NACK
+    assert linux_i2c.classifyError(OSError(errno.EAGAIN, "")) == linux_i2c.ARBITRATION
+    assert linux_i2c.classifyError(OSError(errno.ETIMEDOUT, "")) == linux_i2c.TIMEOUT
+    assert linux_i2c.classifyError(OSError(errno.EINVAL, "")) == linux_i2c.OTHER
+    assert linux_i2c.classifyError(ValueError()) == linux_i2c.OTHER
+
+
+def test_transient_errors_retried(i2c, bus, clock):
+    bus.FAULTS[0x40] = [OSError(errno.EAGAIN, "again"), OSError(errno.EIO, "io")]
+    assert i2c.readByte(0x40, 7) == 7
+    stats = i2c.deviceStats(0x40).asDict()
+    assert stats["retries"] == 2 and stats["failures"] == 0 and stats["transactions"] == 1
+    assert stats["errors"][linux_i2c.ARBITRATION] == 1 and stats["errors"][linux_i2c.NACK] == 1
+    assert len(clock.sleeps) == 2
+
+
+def test_gives_up_after_attempts(i2c, bus, clock):
+    policy = i2c.retry_policy
+    bus.FAULTS[0x40] = [NACK] * 10
+    with pytest.raises(OSError):
+        i2c.readByte(0x40, 0)
+    assert len(bus.FAULTS[0x40]) == 10 - policy.attempts
+    stats = i2c.deviceStats(0x40).asDict()
+    assert stats["retries"] == policy.attempts - 1 and stats["failures"] == 1
+
+
+def test_writes_not_retried(i2c, bus):
+    bus.FAULTS[0x40] = [NACK]
+    with pytest.raises(OSError):
+        i2c.writeByte(0x40, 0, 1)
+    assert i2c.deviceStats(0x40).asDict()["retries"] == 0
+    assert bus.DEVICES[0x40][0] == 0
+
+
+def test_backoff_bounded_and_jittered(clock):
+    policy = linux_i2c.RetryPolicy(base_delay=0.001, max_delay=0.004, jitter=0.5)
+    for retry in range(1, 6):
+        nominal = min(0.001 * 2 ** (retry - 1), 0.004)
+        delays = [policy.delay(retry) for _ in range(500)]
+        assert all(nominal * 0.5 <= d <= nominal for d in delays)
+        assert max(delays) - min(delays) > nominal * 0.3 # actually spread out
+    assert linux_i2c.RetryPolicy(jitter=0).delay(1) == 0.0005
+
+
+def test_breaker_trips_per_transaction_and_cools_down(bus, clock):
+    bus.DEVICES[0x40] = bytearray(256)
+    bus.DEVICES[0x41] = bytearray(256)
+    i2c = linux_i2c.LinuxI2C(retry_policy=linux_i2c.RetryPolicy(attempts=3, trip_count=3, cooldown=5.0))
+    policy = i2c.retry_policy
+    # two failed reads, three attempts each, aren't enough to trip
+    for _ in range(2):
+        bus.FAULTS[0x40] = [NACK] * 3
+        with pytest.raises(OSError):
+            i2c.readByte(0x40, 0)
+    assert not policy.isOpen(0x40)
+    bus.FAULTS[0x40] = [NACK] * 3
+    with pytest.raises(OSError):
+        i2c.readByte(0x40, 0)
+    assert policy.isOpen(0x40)
+    # open: fails fast without touching the bus, other devices unaffected
+    sent = bus.COUNT["transactions"]
+    with pytest.raises(OSError):
+        i2c.readByte(0x40, 0)
+    assert bus.COUNT["transactions"] == sent
+    assert i2c.deviceStats(0x40).asDict()["fast_fails"] == 1
+    assert i2c.readByte(0x41, 0) == 0
+    # half-open after the cooldown: a failed trial re-opens at once
+    clock.now += 5.0
+    assert not policy.isOpen(0x40)
+    bus.FAULTS[0x40] = [NACK] * 3
+    with pytest.raises(OSError):
+        i2c.readByte(0x40, 0)
+    assert policy.isOpen(0x40)
+    # a successful trial closes it
+    clock.now += 5.0
+    assert i2c.readByte(0x40, 0) == 0
+    assert not policy.isOpen(0x40)
+    assert policy._nacks == {}
+
+
+def test_nacks_outside_window_dont_trip(bus, clock):
+    bus.DEVICES[0x40] = bytearray(256)
+    i2c = linux_i2c.LinuxI2C(retry_policy=linux_i2c.RetryPolicy(attempts=1, trip_count=3, trip_window=1.0))
+    for _ in range(6):
+        bus.FAULTS[0x40] = [NACK]
+        with pytest.raises(OSError):
+            i2c.readByte(0x40, 0)
+        clock.now += 0.6
+    assert not i2c.retry_policy.isOpen(0x40)
+
+
+def test_only_nacks_trip(bus, clock):
+    bus.DEVICES[0x40] = bytearray(256)
+    i2c = linux_i2c.LinuxI2C(retry_policy=linux_i2c.RetryPolicy(attempts=1, trip_count=2))
+    for _ in range(5):
+        bus.FAULTS[0x40] = [OSError(errno.ETIMEDOUT, "stuck")]
+        with pytest.raises(OSError):
+            i2c.readByte(0x40, 0)
+    assert not i2c.retry_policy.isOpen(0x40)
+    assert i2c.deviceStats(0x40).asDict()["errors"][linux_i2c.TIMEOUT] == 5
+
+
+def test_stats_bytes_and_latency(i2c):
+    i2c.readBlock(0x40, 0, 16)
+    i2c.readWord(0x40, 0)
+    stats = i2c.deviceStats(0x40).asDict()
+    assert stats["transactions"] == 2 and stats["bytes"] == 18
+    # the fake clock doesn't move during a transaction
+    assert stats["latency_us"][100] == 2
+    assert set(i2c.busStats()) == {0x40}
+
+
+def test_stats_exact_under_threads(bus):
+    bus.DEVICES[0x40] = bytearray(256)
+    i2c = linux_i2c.LinuxI2C(retry_policy=linux_i2c.RetryPolicy(base_delay=0, jitter=0))
+    errors = []
+
+    def worker():
+        try:
+            for i in range(500):
+                i2c.readByte(0x40, i & 0xFF)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    stats = i2c.deviceStats(0x40).asDict()
+    assert stats["transactions"] == 8 * 500 == sum(stats["latency_us"].values())
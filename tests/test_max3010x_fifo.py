@@ -0,0 +1,134 @@
+# MAX3010x FIFO draining at 400 samples/s: polling the pointers against the
+# interrupt modes. the sensor is simulated on the fake smbus2 and time is
+# counted in samples, so the transaction counts are exact. run with -s for
+# the timings.
+import time
+
+import pytest
+
+from qwiic_i2c import linux_i2c
+from qwiic_max3010x import qwiic_max3010x as M
+
+
+class Sensor(bytearray):
+    # a MAX3010x register file with a 32 sample FIFO. each sample's red
+    # reading is its sequence number, IR is that plus 100000.
+    def __init__(self):
+        bytearray.__init__(self, 256)
+        bytearray.__setitem__(self, 0xFF, 0x15) # part id
+        self.fifo = []
+        self.made = 0
+
+    def _leds(self):
+        slots = (self[M.MAX30105_MULTILEDCONFIG1] & 0x07, self[M.MAX30105_MULTILEDCONFIG1] >> 4 & 0x07,
+                 self[M.MAX30105_MULTILEDCONFIG2] & 0x07)
+        return len([s for s in slots if s])
+
+    def _raise(self, bit):
+        if bytearray.__getitem__(self, M.MAX30105_INTENABLE1) & bit:
+            bytearray.__setitem__(self, M.MAX30105_INTSTAT1, self[M.MAX30105_INTSTAT1] | bit)
+
+    def sample(self):
+        # the sensor takes a sample
+        if len(self.fifo) == 32: # full, the oldest is overwritten
+            self.fifo.pop(0)
+            bytearray.__setitem__(self, 5, min(self[5] + 1, 31))
+            bytearray.__setitem__(self, 6, (self[6] + 1) & 31)
+        self.fifo.append(self.made)
+        self.made += 1
+        bytearray.__setitem__(self, 4, (self[4] + 1) & 31)
+        self._raise(M.MAX30105_INT_DATA_RDY_ENABLE)
+        if len(self.fifo) >= 32 - (self[M.MAX30105_FIFOCONFIG] & 0x0F):
+            self._raise(M.MAX30105_INT_A_FULL_ENABLE)
+
+    def interrupt(self):
+        return bytearray.__getitem__(self, M.MAX30105_INTSTAT1) != 0
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) and key.start == M.MAX30105_FIFODATA:
+            width = 3 * self._leds()
+            out = bytearray()
+            for _ in range((key.stop - key.start) // width):
+                seq = self.fifo.pop(0)
+                for led in range(self._leds()):
+                    v = seq + led * 100000
+                    out += bytes((v >> 16 & 3, v >> 8 & 0xFF, v & 0xFF))
+            bytearray.__setitem__(self, 6, (self[6] + len(out) // width) & 31)
+            bytearray.__setitem__(self, 5, 0)
+            # reading the FIFO clears the interrupt, as on the part
+            bytearray.__setitem__(self, M.MAX30105_INTSTAT1, 0)
+            return bytes(out)
+        value = bytearray.__getitem__(self, key)
+        if key == M.MAX30105_INTSTAT1:
+            bytearray.__setitem__(self, key, 0) # cleared by reading
+        elif key == M.MAX30105_MODECONFIG:
+            value &= ~M.MAX30105_RESET # self-clearing
+        return value
+
+    def __setitem__(self, key, value):
+        if key == M.MAX30105_FIFOWRITEPTR:
+            self.fifo = []
+        bytearray.__setitem__(self, key, value)
+
+
+class Pin:
+    # the INT output, active low
+    def __init__(self, sensor):
+        self.sensor = sensor
+
+    def value(self):
+        return 0 if self.sensor.interrupt() else 1
+
+
+@pytest.fixture
+def sensor(bus):
+    s = Sensor()
+    bus.DEVICES[0x57] = s
+    return s
+
+
+def run(bus, sensor, mode, poll_ms=1, seconds=2):
+    max3010x = M.QwiicMax3010x(i2c_driver=linux_i2c.LinuxI2C())
+    max3010x.setup(sampleAverage=1, ledMode=2, sampleRate=400)
+    if mode == "data ready":
+        max3010x.enableInterruptMode()
+    elif mode == "almost full":
+        max3010x.enableInterruptMode(almostFull=24)
+    elif mode == "almost full, pin":
+        max3010x.enableInterruptMode(almostFull=24, pin=Pin(sensor))
+    got = []
+    start = bus.COUNT["transactions"]
+    spent = 0
+    for ms in range(0, seconds * 1000, poll_ms):
+        while sensor.made < (ms + poll_ms) * 400 // 1000:
+            sensor.sample()
+        t = time.perf_counter()
+        max3010x.check()
+        spent += time.perf_counter() - t
+        while max3010x.available():
+            max3010x.nextSample()
+            got.append((max3010x.red[max3010x.tail], max3010x.IR[max3010x.tail]))
+    return got, (bus.COUNT["transactions"] - start) / seconds, spent
+
+
+@pytest.mark.parametrize("mode, most", [
+    ("polling", 1400), # pointers every poll, plus the FIFO when there's data
+    ("data ready", 1800), # status every poll, plus pointers and FIFO per sample
+    ("almost full", 1040), # status every poll, pointers and FIFO per 24 samples
+    ("almost full, pin", 40), # pointers and FIFO per 24 samples only
+])
+def test_every_sample_once_in_order(bus, sensor, mode, most):
+    got, per_second, spent = run(bus, sensor, mode)
+    # in almost full mode up to 23 samples wait in the FIFO at the end
+    assert sensor.made - 24 < len(got) <= sensor.made
+    assert got == [(i, i + 100000) for i in range(len(got))]
+    assert per_second <= most
+    print("\n%s: %d transactions/s at 400 samples/s, check() %.1f us per call"
+          % (mode, per_second, spent / 2000 * 1e6))
+
+
+def test_slow_poller_sees_overflow(bus, sensor):
+    # polled every 100 ms the 32 sample FIFO overflows; the newest 32 are kept
+    got, _, _ = run(bus, sensor, "polling", poll_ms=100, seconds=1)
+    assert len(got) == 10 * 32
+    assert got[-1][0] == sensor.made - 1
@@ -0,0 +1,132 @@
+# MMC5983MA continuous-mode streaming against a simulated sensor that
+# finishes a measurement every period of a fake clock, so rates and
+# transactions per sample are exact. run with -s for the timings.
+import time
+
+import pytest
+
+import qwiic_mmc5983ma
+from qwiic_i2c import linux_i2c
+
+Q = qwiic_mmc5983ma.QwiicMMC5983MA
+
+
+class Clock:
+    # stands in for the time module; microseconds, so periods add up exactly
+    def __init__(self):
+        self.us = 0
+
+    def sleep(self, seconds):
+        self.us += round(seconds * 1000000)
+
+
+class Sensor(bytearray):
+    # measures every period_us while continuous mode is on. x of each
+    # measurement is its sequence number.
+    def __init__(self, clock, period_us):
+        bytearray.__init__(self, 256)
+        self.clock = clock
+        self.period_us = period_us
+        self.next_us = None
+        self.made = 0
+        bytearray.__setitem__(self, Q.PROD_ID_REG, Q.PROD_ID)
+        bytearray.__setitem__(self, Q.STATUS_REG, Q.MEAS_M_DONE) # for the calibration
+
+    def _measure(self):
+        while self.next_us is not None and self.clock.us >= self.next_us:
+            seq = self.made
+            self.made += 1
+            self[0:7] = bytes((seq >> 10 & 0xFF, seq >> 2 & 0xFF, 0x80, 0, 0x80, 0, (seq & 3) << 6))
+            bytearray.__setitem__(self, Q.STATUS_REG, bytearray.__getitem__(self, Q.STATUS_REG) | Q.MEAS_M_DONE)
+            self.next_us += self.period_us
+
+    def done(self):
+        self._measure()
+        return bytearray.__getitem__(self, Q.STATUS_REG) & Q.MEAS_M_DONE
+
+    def __getitem__(self, key):
+        if key == Q.STATUS_REG:
+            self._measure()
+        return bytearray.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        if key == Q.STATUS_REG: # write 1 to clear
+            value = bytearray.__getitem__(self, key) & ~value
+        elif key == Q.INT_CTRL_2_REG:
+            if value & Q.CMM_EN and self.next_us is None:
+                self.next_us = self.clock.us + self.period_us
+            elif not value & Q.CMM_EN:
+                self.next_us = None
+        bytearray.__setitem__(self, key, value)
+
+
+class Pin:
+    # the INT output, high while a measurement is waiting
+    def __init__(self, sensor):
+        self.sensor = sensor
+
+    def value(self):
+        return self.sensor.done()
+
+
+def magnetometer(bus, monkeypatch, frequency):
+    clock = Clock()
+    sensor = Sensor(clock, 1000000 // frequency)
+    bus.DEVICES[0x30] = sensor
+    mag = Q(i2c_driver=linux_i2c.LinuxI2C())
+    bytearray.__setitem__(sensor, Q.STATUS_REG, 0)
+    monkeypatch.setattr(qwiic_mmc5983ma, "time", clock)
+    return mag, sensor, clock
+
+
+@pytest.mark.parametrize("frequency", [10, 100, 200, 1000])
+@pytest.mark.parametrize("use_pin", [False, True])
+def test_sustained_rate_and_transactions(bus, monkeypatch, frequency, use_pin):
+    mag, sensor, clock = magnetometer(bus, monkeypatch, frequency)
+    pin = Pin(sensor) if use_pin else None
+    n = 500
+    start = bus.COUNT["transactions"]
+    wall = time.perf_counter()
+    got = [xyz[0] for xyz in mag.stream_xyz(frequency, count=n, pin=pin)]
+    wall = time.perf_counter() - wall
+    # every measurement read exactly once, none missed
+    assert got == list(range(n))
+    # the stream keeps up with the sensor: the last sample is read within a
+    # poll interval of being measured
+    assert clock.us == pytest.approx(n * 1000000 // frequency, abs=1000000 // frequency // 4 + 1)
+    per_sample = (bus.COUNT["transactions"] - start) / float(n)
+    if use_pin:
+        # the output registers and the flag clear, plus setup and teardown
+        assert per_sample < 2.1
+    else:
+        # and the status checks: one straight after the previous read, then
+        # one every quarter period
+        assert per_sample < 2 + 5 + 0.1
+    # continuous mode is left off
+    assert not sensor[Q.INT_CTRL_2_REG] & Q.CMM_EN
+    print("\n%d Hz%s: %.2f transactions per sample, %.0f us of cpu per sample"
+          % (frequency, " with INT pin" if use_pin else "", per_sample, wall / n * 1e6))
+
+
+def test_bandwidth_fits_frequency(bus, monkeypatch):
+    mag, sensor, clock = magnetometer(bus, monkeypatch, 100)
+    for frequency, bandwidth in ((10, 100), (100, 100), (200, 200), (1000, 800)):
+        list(mag.stream_xyz(frequency, count=1))
+        assert mag.get_filter_bandwidth() == bandwidth
+
+
+def test_stalled_sensor_times_out(bus, monkeypatch):
+    mag, sensor, clock = magnetometer(bus, monkeypatch, 100)
+    sensor.period_us = 10 ** 9 # never finishes
+    assert list(mag.stream_xyz(100, count=3)) == []
+    # ten periods, checked four times each
+    assert clock.us == 40 * 2500
+    assert not sensor[Q.INT_CTRL_2_REG] & Q.CMM_EN
+
+
+def test_stream_callback_stops_early(bus, monkeypatch):
+    mag, sensor, clock = magnetometer(bus, monkeypatch, 100)
+    got = []
+    assert mag.stream(lambda x, y, z: got.append(x) or len(got) < 10, 100) == 10
+    assert got == list(range(10))
+    assert not sensor[Q.INT_CTRL_2_REG] & Q.CMM_EN
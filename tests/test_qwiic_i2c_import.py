@@ -0,0 +1,75 @@
+# qwiic_i2c loads platform modules and helpers on first use. each import is
+# measured in a fresh interpreter. run with -s for the timings.
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PATH = os.pathsep.join([os.path.join(HERE, "fakes"), os.path.join(HERE, "..", "libraries")])
+
+# what importing the package used to load: every platform module and helper
+EAGER = ["linux_i2c", "circuitpy_i2c", "micropython_i2c", "read_plan", "async_i2c",
+         "register_cache", "bus_census"]
+
+MEASURE = """
+import json, sys, time, tracemalloc
+tracemalloc.start()
+start = time.perf_counter()
+import qwiic_i2c
+for name in %r:
+    __import__("qwiic_i2c." + name)
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "bytes": tracemalloc.get_traced_memory()[0],
+                  "modules": sorted(m for m in sys.modules if m.startswith("qwiic_i2c."))}))
+"""
+
+
+def measure(preload=(), then="", env=None, runs=5):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", MEASURE % (list(preload), then)], check=True,
+                             capture_output=True, text=True,
+                             env=dict(os.environ, PYTHONPATH=PATH, **(env or {})))
+        results.append(json.loads(out.stdout.splitlines()[-1]))
+    return min(results, key=lambda r: r["seconds"])
+
+
+def test_import_loads_no_platform_module():
+    lazy = measure(runs=1)
+    assert lazy["modules"] == ["qwiic_i2c.i2c_driver"]
+
+
+def test_driver_loads_only_its_platform():
+    result = measure(then="qwiic_i2c.getI2CDriver()", runs=1)
+    assert result["modules"] == ["qwiic_i2c.i2c_driver", "qwiic_i2c.linux_i2c"]
+    result = measure(then="qwiic_i2c.RegisterCache(None, 0x40)", runs=1)
+    assert result["modules"] == ["qwiic_i2c.i2c_driver", "qwiic_i2c.register_cache"]
+
+
+def test_forced_platform():
+    result = measure(then="assert type(qwiic_i2c.getI2CDriver()).__name__ == 'LinuxI2C'",
+                     env={"QWIIC_I2C_PLATFORM": "linux"}, runs=1)
+    assert "qwiic_i2c.circuitpy_i2c" not in result["modules"]
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        subprocess.run([sys.executable, "-c", "import qwiic_i2c; qwiic_i2c.getI2CDriver()"], check=True,
+                       capture_output=True, text=True,
+                       env=dict(os.environ, PYTHONPATH=PATH, QWIIC_I2C_PLATFORM="raspberry"))
+    assert "ValueError: QWIIC_I2C_PLATFORM: unknown platform raspberry" in e.value.stderr
+
+
+def test_lazy_import_cheaper_than_eager():
+    measure(EAGER, runs=1) # leaves bytecode cached, so compiling isn't measured
+    lazy = measure()
+    # the driver class only; opening the bus would count the fake smbus2
+    first_driver = measure(then="qwiic_i2c._getDriverClass()")
+    eager = measure(EAGER)
+    assert lazy["bytes"] < first_driver["bytes"] < eager["bytes"]
+    print("\nimport qwiic_i2c: lazy %.2f ms / %d KB, with the linux driver %.2f ms / %d KB,"
+          " everything %.2f ms / %d KB"
+          % (lazy["seconds"] * 1000, lazy["bytes"] // 1024,
+             first_driver["seconds"] * 1000, first_driver["bytes"] // 1024,
+             eager["seconds"] * 1000, eager["bytes"] // 1024))
@@ -0,0 +1,128 @@
+# RegisterCache, and the bus reads it saves the drivers that use it
+import pytest
+
+import qwiic_i2c
+from qwiic_i2c import linux_i2c
+
+
+@pytest.fixture
+def i2c(bus):
+    return linux_i2c.LinuxI2C()
+
+
+def transactions(bus, func, *args):
+    start = bus.COUNT["transactions"]
+    func(*args)
+    return bus.COUNT["transactions"] - start
+
+
+def test_cacheable_register_read_once(i2c, bus):
+    bus.DEVICES[0x40] = bytearray(256)
+    bus.DEVICES[0x40][1] = 0x5A
+    regs = qwiic_i2c.RegisterCache(i2c, 0x40)
+    regs.cacheable(1)
+    assert [regs.read(1) for _ in range(4)] == [0x5A] * 4
+    assert bus.COUNT["transactions"] == 1
+    assert (regs.hits, regs.misses) == (3, 1)
+    # uncached registers always go to the device
+    assert transactions(bus, regs.read, 2) == 1
+    assert transactions(bus, regs.read, 2) == 1
+
+
+def test_update_is_one_write_once_cached(i2c, bus):
+    bus.DEVICES[0x40] = bytearray(256)
+    regs = qwiic_i2c.RegisterCache(i2c, 0x40)
+    regs.cacheable(1)
+    assert transactions(bus, regs.update, 1, 0xF0, 0x03) == 2 # read, write
+    assert transactions(bus, regs.update, 1, 0xFC, 0x04) == 1
+    assert bus.DEVICES[0x40][1] == 0x04
+    assert regs.read(1) == 0x04
+
+
+def test_volatile_bits(i2c, bus):
+    bus.DEVICES[0x40] = bytearray(256)
+    regs = qwiic_i2c.RegisterCache(i2c, 0x40)
+    regs.volatile(0, 0x08) # a ready flag
+    regs.write(0, 0x06)
+    bus.DEVICES[0x40][0] |= 0x08 # set by the device
+    # a read of the other bits is a hit, one of the flag goes to the device
+    assert transactions(bus, regs.read, 0, 0x06) == 0
+    assert regs.read(0, 0x08) & 0x08
+    # the flag isn't written back
+    regs.update(0, 0xFF, 0x01)
+    assert bus.DEVICES[0x40][0] == 0x07
+    regs.volatile(0)
+    assert transactions(bus, regs.read, 0) == 1
+
+
+def test_word_registers_preset_and_invalidate(i2c, bus):
+    bus.DEVICES[0x48] = bytearray(256)
+    regs = qwiic_i2c.RegisterCache(i2c, 0x48, word=True)
+    regs.preset(0, 0x1234) # write-only, reset value known
+    assert transactions(bus, regs.update, 0, 0xFF00, 0x56) == 1
+    assert bus.DEVICES[0x48][0:2] == bytearray([0x56, 0x12])
+    regs.invalidate()
+    bus.DEVICES[0x48][0] = 0x77
+    assert regs.read(0) == 0x1277
+
+
+def test_veml6030_config_calls(i2c, bus):
+    import qwiic_veml6030
+    bus.DEVICES[0x48] = bytearray(256)
+    light = qwiic_veml6030.QwiicVEML6030(i2c_driver=i2c)
+    assert transactions(bus, light.set_gain, 2) == 2
+    assert transactions(bus, light.set_integ_time, 100) == 1
+    assert transactions(bus, light.power_on) == 1
+    assert transactions(bus, light.read_gain) == 0
+    assert (light.read_gain(), light.read_integ_time()) == (2.0, 100)
+
+
+def test_nau7802_keeps_ready_bit_volatile(i2c, bus):
+    import qwiic_nau7802
+    bus.DEVICES[0x2A] = bytearray(256)
+    scale = qwiic_nau7802.QwiicNAU7802(i2c_driver=i2c)
+    assert transactions(bus, scale.set_gain, 3) == 2
+    assert transactions(bus, scale.set_bit, 7, scale.NAU7802_CTRL1) == 1
+    bus.DEVICES[0x2A][scale.NAU7802_PU_CTRL] = 0x08 # cycle ready
+    assert scale.get_bit(3, scale.NAU7802_PU_CTRL)
+    assert transactions(bus, scale.set_bit, 1, scale.NAU7802_PU_CTRL) == 1
+    assert bus.DEVICES[0x2A][scale.NAU7802_PU_CTRL] == 0x02
+
+
+def test_max3010x_config_calls(i2c, bus):
+    from qwiic_max3010x import qwiic_max3010x
+    bus.DEVICES[0x57] = bytearray(256)
+    sensor = qwiic_max3010x.QwiicMax3010x(i2c_driver=i2c)
+    assert transactions(bus, sensor.setSampleRate, qwiic_max3010x.MAX30105_SAMPLERATE_400) == 2
+    assert transactions(bus, sensor.setPulseWidth, qwiic_max3010x.MAX30105_PULSEWIDTH_411) == 1
+    assert bus.DEVICES[0x57][qwiic_max3010x.MAX30105_PARTICLECONFIG] == 0x0F
+
+
+def test_config_sequence_hit_ratio(i2c, bus):
+    import qwiic_cap1203
+    bus.DEVICES[0x28] = bytearray(256)
+    bus.DEVICES[0x28][0xFD] = 0x6D
+    touch = qwiic_cap1203.QwiicCAP1203(i2c_driver=i2c)
+    touch.begin()
+    start = bus.COUNT["transactions"]
+    for _ in range(10):
+        touch.set_sensitivity(2)
+        touch.get_sensitivity()
+        touch.is_interrupt_enabled()
+    assert touch._regs.hitRatio() > 0.9
+    assert bus.COUNT["transactions"] - start == 10
+    print("\ncap1203 config sequence: hit ratio %.2f" % touch._regs.hitRatio())
+
+
+@pytest.mark.parametrize("bandwidth", [100, 200, 400, 800])
+def test_mmc5983ma_bandwidth_round_trip(i2c, bus, bandwidth):
+    import qwiic_mmc5983ma
+    regs = bytearray(256)
+    regs[0x2F] = 0x30 # product id
+    regs[0x08] = 0x01 # measurement done
+    bus.DEVICES[0x30] = regs
+    mag = qwiic_mmc5983ma.QwiicMMC5983MA(i2c_driver=i2c)
+    mag.set_filter_bandwidth(bandwidth)
+    assert mag.get_filter_bandwidth() == bandwidth
+    assert regs[mag.INT_CTRL_1_REG] & (mag.BW1 | mag.BW0) == {
+        100: 0, 200: mag.BW0, 400: mag.BW1, 800: mag.BW1 | mag.BW0}[bandwidth]
@@ -0,0 +1,170 @@
+# RecordLog and the Uploader backlog through a cellular outage, including
+# resets at the worst moments
+import os
+
+import pytest
+
+import sensorlab
+
+
+@pytest.fixture(autouse=True)
+def flash(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class Client:
+    # MQTT client whose link can be taken down
+    def __init__(self):
+        self.up = False
+        self.writes = []
+
+    def publish_many(self, messages):
+        if not self.up:
+            raise OSError("link down")
+        self.writes.append(messages)
+
+    def values(self, topic):
+        return [int(v) for messages in self.writes for t, m in messages if t == topic for v in m.split(",")]
+
+
+def test_append_peek_drop():
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([["1", "a"], ["2", "b"]])
+    log.append([["3", "c"]])
+    assert len(log) == 3
+    items, used = log.peek(2)
+    assert items == [["1", "a"], ["2", "b"]] and used == 2
+    log.drop(used)
+    assert log.peek(8) == ([["3", "c"]], 1)
+    assert os.path.getsize("q.log") == 8 * 64
+
+
+def test_survives_reset():
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([[i] for i in range(5)])
+    log.drop(2)
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    assert log.peek(8) == ([[2], [3], [4]], 3)
+
+
+def test_reset_before_pointer_save(monkeypatch):
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([[0], [1]])
+    # power lost after the records were written, before the pointers were
+    monkeypatch.setattr(log, "_save", lambda: None)
+    log.append([[2], [3]])
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    assert log.peek(8) == ([[0], [1], [2], [3]], 4)
+
+
+def test_torn_record_write():
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([[0], [1], [2]])
+    # power lost halfway through writing the last record
+    with open("q.log", "r+b") as f:
+        f.seek(2 * 64 + 8)
+        f.write(b"\xff" * 20)
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    assert log.peek(8) == ([[0], [1]], 3)
+
+
+def test_torn_pointer_write():
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([[0], [1], [2]])
+    log.drop(1)
+    # power lost halfway through writing the newest pointer slot
+    size = os.path.getsize("q.ptr") // 2
+    with open("q.ptr", "r+b") as f:
+        f.seek((log.gen % 2) * size + 4)
+        f.write(b"\xff\xff")
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    # the older pointers are used, so the dropped record comes back rather
+    # than anything being lost
+    assert log.peek(8) == ([[0], [1], [2]], 3)
+
+
+def test_wrapped_ring_keeps_newest():
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    for i in range(8 * 2 + 3):
+        log.append([[i]])
+    assert len(log) == 8
+    assert log.peek(8) == ([[i] for i in range(11, 19)], 8)
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    assert log.peek(8) == ([[i] for i in range(11, 19)], 8)
+    log.drop(5)
+    log.append([[19]])
+    assert log.peek(8) == ([[16], [17], [18], [19]], 4)
+
+
+def test_reopen_with_other_record_size(capsys):
+    log = sensorlab.RecordLog("q", slots=8, record_size=64)
+    log.append([[0], [1]])
+    log = sensorlab.RecordLog("q", slots=8, record_size=128)
+    assert len(log) == 0
+    assert os.path.getsize("q.log") == 8 * 128
+    assert "another record size" in capsys.readouterr().out
+    log.append([["x" * 100]])
+    assert log.peek(8) == ([["x" * 100]], 1)
+
+
+def test_oversize_record_dropped(capsys):
+    log = sensorlab.RecordLog("q", slots=8, record_size=32)
+    log.append([["x" * 40], ["ok"]])
+    assert log.peek(8) == ([["ok"]], 1)
+    assert "too large" in capsys.readouterr().out
+
+
+def test_uploader_replays_backlog_in_order():
+    client = Client()
+    uploader = sensorlab.Uploader(max_count=1, replay_count=16)
+    uploader.add_sink(sensorlab.MQTTSink(client, ("t", "h")), sensorlab.RecordLog("mqtt", slots=64, record_size=64))
+    for i in range(40):
+        uploader.send(i, 100 + i)
+    assert uploader.failures() == 40
+    # the device resets during the outage
+    uploader.logs[0] = sensorlab.RecordLog("mqtt", slots=64, record_size=64)
+    assert len(uploader.logs[0]) == 40
+    client.up = True
+    uploader.send(40, 140)
+    assert client.values("t") == list(range(41))
+    assert client.values("h") == list(range(100, 141))
+    # replayed replay_count records per write rather than one by one
+    assert len(client.writes) == 3
+    assert len(uploader.logs[0]) == 0 and uploader.failures() == 0
+
+
+def test_uploader_outage_during_replay():
+    client = Client()
+    uploader = sensorlab.Uploader(max_count=1, replay_count=4)
+    sink = uploader.add_sink(sensorlab.MQTTSink(client, ("t",)), sensorlab.RecordLog("mqtt", slots=64, record_size=64))
+    for i in range(10):
+        uploader.send(i)
+    client.up = True
+    sent = []
+
+    def publish_many(messages):
+        # the link drops again after two writes
+        if len(sent) == 2:
+            raise OSError("link down")
+        sent.append(messages)
+
+    client.publish_many = publish_many
+    uploader.send(10)
+    assert sink.fail == 11 # consecutive, counting the outage before
+    assert len(uploader.logs[0]) == 3
+    client.publish_many = Client.publish_many.__get__(client)
+    uploader.send(11)
+    values = [int(v) for messages in sent + client.writes for t, m in messages for v in m.split(",")]
+    assert values == list(range(12))
+
+
+def test_uploader_ring_overflow_drops_oldest():
+    client = Client()
+    uploader = sensorlab.Uploader(max_count=1)
+    uploader.add_sink(sensorlab.MQTTSink(client, ("t",)), sensorlab.RecordLog("mqtt", slots=16, record_size=32))
+    for i in range(100):
+        uploader.send(i)
+    client.up = True
+    uploader.send(100)
+    assert client.values("t") == list(range(85, 101))
@@ -0,0 +1,147 @@
+# sensorlab.Runtime against a fake clock, so schedules are checked to the ms
+import sensorlab
+
+
+def test_periodic_and_one_shot(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    fired = []
+    rt.every(2000, lambda: fired.append(("every", clock.now)))
+    rt.after(500, lambda: fired.append(("after", clock.now)))
+    rt.after(7000, rt.stop)
+    rt.run()
+    assert fired == [("every", 0), ("after", 500), ("every", 2000), ("every", 4000), ("every", 6000)]
+    assert not rt.running
+
+
+def test_sleeps_between_deadlines(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    calls = []
+    rt.every(1000, lambda: calls.append(clock.now))
+    rt.after(10000, rt.stop)
+    rt.run()
+    # every ms up to the stop is spent asleep, none spinning
+    assert clock.now == 10000
+    assert rt.idle_ms == clock.slept == 10000
+    assert calls == list(range(0, 10001, 1000))
+
+
+def test_sleep_bounded_by_max_sleep(clock):
+    rt = sensorlab.Runtime(clock=clock, max_sleep=300)
+    rt.after(1000, rt.stop)
+    rt.step()
+    assert clock.now == 300
+
+
+def test_button_checked_every_button_rate(clock):
+    class Button:
+        checks = []
+
+        def check(self, press_time):
+            self.checks.append((clock.now, press_time))
+
+    rt = sensorlab.Runtime(clock=clock)
+    rt.add_button(Button(), 3000)
+    rt.after(1000, rt.stop)
+    rt.run()
+    assert len(Button.checks) == 1000 // sensorlab.Runtime.BUTTON_RATE + 1
+    assert Button.checks[1] == (sensorlab.Runtime.BUTTON_RATE, 3000)
+
+
+def test_late_task_does_not_burst(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+
+    def slow():
+        runs.append(clock.now)
+        if len(runs) == 2:
+            clock.now += 3500 # overran three periods
+
+    rt.every(1000, slow)
+    rt.after(8000, rt.stop)
+    rt.run()
+    # one late run as soon as it can, then back on the period with no catch-up
+    assert runs == [0, 1000, 4500, 5500, 6500, 7500]
+
+
+def test_cancel(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+    task = rt.every(1000, lambda: runs.append(clock.now))
+    rt.after(2500, rt.cancel, (task,))
+    rt.after(5000, rt.stop)
+    rt.run()
+    assert runs == [0, 1000, 2000]
+    assert not task.active
+
+
+def test_task_error_does_not_stop_runtime(clock, capsys):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+
+    def fails():
+        runs.append(clock.now)
+        raise ValueError("sensor unplugged")
+
+    rt.every(1000, fails)
+    rt.after(2000, rt.stop)
+    rt.run()
+    assert runs == [0, 1000, 2000]
+    assert "sensor unplugged" in capsys.readouterr().out
+
+
+def test_reschedule_counts_from_now(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+    task = rt.every(10000, lambda: runs.append(clock.now))
+    rt.after(10300, rt.reschedule, (task, 20000))
+    rt.after(50400, rt.stop)
+    rt.run()
+    assert runs == [0, 10000, 30300, 50300]
+    assert task.period == 20000
+
+
+def test_reschedule_from_own_callback(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+
+    def acquire():
+        runs.append(clock.now)
+        if len(runs) == 2:
+            rt.reschedule(task, 5000)
+
+    task = rt.every(1000, acquire)
+    rt.after(12000, rt.stop)
+    rt.run()
+    assert runs == [0, 1000, 6000, 11000]
+
+
+def test_stop_from_task_does_not_sleep_again(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    rt.every(1000, lambda: None, delay=1000)
+    rt.after(0, rt.stop)
+    rt.run()
+    assert clock.slept == 0
+
+
+def test_stop_from_outside_ends_sleep_within_stop_rate(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    rt.every(1000, lambda: None, delay=1000)
+
+    def interrupt(now):
+        if now >= 250:
+            rt.stop()
+
+    clock.on_sleep = interrupt
+    rt.run()
+    assert clock.now < 250 + sensorlab.Runtime.STOP_RATE
+
+
+def test_run_again_after_stop(clock):
+    rt = sensorlab.Runtime(clock=clock)
+    runs = []
+    rt.every(1000, lambda: runs.append(clock.now))
+    rt.after(1000, rt.stop)
+    rt.run()
+    rt.after(1000, rt.stop)
+    rt.run()
+    assert runs == [0, 1000, 2000]
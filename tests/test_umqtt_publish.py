@@ -0,0 +1,82 @@
+# packets are assembled in MQTTClient.buf and go out in one socket write.
+# run with -s for the timings.
+import time
+
+import usocket
+from umqtt.simple import MQTTClient
+
+
+def connected(broker, **kwargs):
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, **kwargs)
+    client.connect()
+    usocket.reset()
+    return client
+
+
+def test_connect_is_one_write(broker):
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, user="u", password="pw", keepalive=60)
+    client.set_last_will("lw", "bye", qos=1)
+    usocket.reset()
+    client.connect()
+    assert usocket.COUNT["writes"] == 1
+    body = broker.connects[-1]
+    assert body[:7] == b"\0\x04MQTT\x04"
+    assert body[7] == 0xC0 | 0x08 | 0x04 | 0x02 # user, password, will qos 1, will, clean
+    assert body.endswith(b"\0\x02lw\0\x03bye\0\x01u\0\x02pw")
+    client.disconnect()
+
+
+def test_publish_is_one_write(broker):
+    client = connected(broker)
+    client.publish("t/1", "hello")
+    client.publish(b"t/2", b"x" * 300, qos=1) # larger than the initial buffer
+    assert usocket.COUNT["writes"] == 2
+    broker.wait_for(lambda: len(broker.publishes) == 2)
+    assert broker.publishes == [(b"t/1", b"hello", 0, False), (b"t/2", b"x" * 300, 1, False)]
+    # 2 + 2 + 3 + 5 and 3 + 2 + 3 + 2 + 300 bytes
+    assert usocket.COUNT["bytes"] == 12 + 310
+    client.disconnect()
+
+
+def test_publish_many_is_one_write(broker):
+    client = connected(broker)
+    client.publish_many([("temperature", "21.5"), ("humidity", "40"), ("pressure", "1013.2")])
+    assert usocket.COUNT["writes"] == 1
+    broker.wait_for(lambda: len(broker.publishes) == 3)
+    assert [(t, m) for t, m, _, _ in broker.publishes] == [
+        (b"temperature", b"21.5"), (b"humidity", b"40"), (b"pressure", b"1013.2")]
+    client.disconnect()
+
+
+def test_publish_many_splits_only_when_buffer_full(broker):
+    client = connected(broker)
+    size = len(client.buf)
+    messages = [("t%d" % i, "v" * 100) for i in range(10)]
+    client.publish_many(messages)
+    # each 106 byte packet gets a write of its own only if it doesn't fit
+    # behind the previous ones
+    per_write = max(1, size // 106)
+    assert usocket.COUNT["writes"] == -(-10 // per_write)
+    broker.wait_for(lambda: len(broker.publishes) == 10)
+    client.disconnect()
+
+
+def test_publish_rate(broker):
+    client = connected(broker)
+    n = 2000
+    start = time.perf_counter()
+    for i in range(n):
+        client.publish("ble_sensor/temperature", "21.5")
+    single = time.perf_counter() - start
+    writes = usocket.COUNT["writes"]
+    usocket.reset()
+    start = time.perf_counter()
+    for i in range(0, n, 4):
+        client.publish_many([("ble_sensor/temperature", "21.5")] * 4)
+    many = time.perf_counter() - start
+    assert writes == n
+    assert usocket.COUNT["writes"] == n // 4
+    broker.wait_for(lambda: len(broker.publishes) == 2 * n, timeout=10)
+    print("\npublish: %d msgs/s, 1 write each; publish_many x4: %d msgs/s, %d writes"
+          % (n / single, n / many, usocket.COUNT["writes"]))
+    client.disconnect()
@@ -0,0 +1,140 @@
+# RobustMQTTClient against the in-process broker, with its timing driven by
+# the fake clock
+import time
+
+import pytest
+
+from umqtt import robust
+from umqtt.robust import RobustMQTTClient
+
+
+@pytest.fixture
+def client(broker, clock, monkeypatch):
+    monkeypatch.setattr(robust, "time", clock)
+    c = RobustMQTTClient("dev", "127.0.0.1", port=broker.port, keepalive=2,
+                         min_backoff=100, max_backoff=400, queue_size=4)
+    yield c
+    c._close()
+
+
+def wait_lost(client):
+    # the broker's close reaches the client on one of its next reads
+    for _ in range(400):
+        client.poll()
+        if not client.connected:
+            return
+        time.sleep(0.005)
+    raise AssertionError("drop not noticed")
+
+
+def test_connects_without_clean_session(client, broker):
+    assert client.connect() == 0
+    assert client.connected
+    assert broker.connects[-1][7] & 0x02 == 0
+
+
+def test_ping_after_half_keepalive(client, broker, clock):
+    client.connect()
+    clock.sleep_ms(999)
+    client.poll()
+    assert not client.ping_outstanding
+    clock.sleep_ms(1)
+    client.poll()
+    assert client.ping_outstanding
+    broker.wait_for(lambda: broker.packets[-1][0] == 0xC0)
+    broker.wait_for(lambda: client.poll() or not client.ping_outstanding)
+    assert client.connected
+
+
+def test_publishing_defers_ping(client, broker, clock):
+    client.connect()
+    for _ in range(5):
+        clock.sleep_ms(800)
+        client.publish("t", "1")
+        client.poll()
+    broker.wait_for(lambda: len(broker.publishes) == 5)
+    assert not [h for h, _ in broker.packets if h == 0xC0]
+
+
+def test_missing_pingresp_drops_connection(client, broker, clock):
+    broker.ignore_ping = True
+    client.connect()
+    clock.sleep_ms(1000)
+    client.poll()
+    assert client.ping_outstanding
+    clock.sleep_ms(2000)
+    client.poll()
+    assert client.connected
+    clock.sleep_ms(1)
+    client.poll()
+    assert not client.connected
+
+
+def test_reconnect_backoff(client, broker, clock):
+    client.connect()
+    broker.close() # nothing listening any more
+    wait_lost(client)
+    attempts = []
+    for _ in range(50):
+        clock.sleep_ms(50)
+        before = client.next_attempt
+        client.poll()
+        if client.next_attempt != before:
+            attempts.append(clock.now)
+    # tried after 100, 200, 400, then every 400 ms
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert gaps[:4] == [200, 400, 400, 400]
+    assert not client.connected
+
+
+def test_reconnect_resubscribes_and_flushes_queue(client, broker, clock):
+    client.set_callback(lambda topic, msg: None)
+    client.subscribe("cmd") # recorded while disconnected
+    client.connect()
+    broker.drop()
+    wait_lost(client)
+    for i in range(6):
+        client.publish("t", str(i))
+    assert [m for _, m, _, _ in client.queue] == ["2", "3", "4", "5"] # oldest dropped
+    clock.sleep_ms(client.min_backoff)
+    client.poll()
+    assert client.connected
+    assert client.backoff == client.min_backoff
+    broker.wait_for(lambda: len(broker.publishes) == 4)
+    assert [m for _, m, _, _ in broker.publishes] == [b"2", b"3", b"4", b"5"]
+    # the broker kept no session, so the subscription was sent again
+    assert len([h for h, _ in broker.packets if h == 0x82]) == 2
+
+
+def test_queue_size_zero_raises(broker, clock, monkeypatch):
+    monkeypatch.setattr(robust, "time", clock)
+    client = RobustMQTTClient("dev", "127.0.0.1", port=broker.port, queue_size=0)
+    with pytest.raises(OSError):
+        client.publish("t", "1")
+    with pytest.raises(OSError):
+        client.publish_many([("t", "1"), ("h", "2")])
+    assert client.queue == []
+    client.connect()
+    client.publish_many([("t", "1"), ("h", "2")])
+    broker.wait_for(lambda: len(broker.publishes) == 2)
+    client._close()
+
+
+def test_malformed_stream_is_a_lost_connection(client, broker, clock):
+    client.set_callback(lambda topic, msg: None)
+    client.connect()
+    broker.wait_for(lambda: broker.conns)
+    broker.send(b"\xd0\x05") # a PINGRESP with a body
+    wait_lost(client)
+    clock.sleep_ms(client.min_backoff)
+    client.poll()
+    assert client.connected
+
+
+def test_disconnect_stops_reconnecting(client, broker, clock):
+    client.connect()
+    client.disconnect()
+    clock.sleep_ms(10000)
+    client.poll()
+    assert not client.connected
+    assert len(broker.connects) == 1
@@ -0,0 +1,115 @@
+# MQTT 5 topic aliases: a topic is sent once per connection, then replaced
+# by a two byte alias. run with -s for the byte counts.
+import time
+
+from broker import Broker
+from umqtt.robust import RobustMQTTClient
+from umqtt.simple import MQTTClient
+
+TOPIC = "ble_sensor/temperature"
+
+
+def publish_bytes(broker, client, n):
+    start = broker.bytes
+    for _ in range(n):
+        client.publish(TOPIC, "21.5")
+    broker.wait_for(lambda: len(broker.publishes) >= n)
+    return broker.bytes - start
+
+
+def test_alias_replaces_topic_after_first_publish():
+    broker = Broker(alias_max=10)
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, version=5)
+    client.connect()
+    assert client.alias_max == 10
+    client.publish(TOPIC, "1")
+    client.publish(TOPIC, "2")
+    client.publish("other", "3", qos=1)
+    client.publish_many([(TOPIC, "4"), ("other", "5")])
+    broker.wait_for(lambda: len(broker.publishes) == 5)
+    assert [(t, m) for t, m, _, _ in broker.publishes] == [
+        (TOPIC.encode(), b"1"), (TOPIC.encode(), b"2"), (b"other", b"3"), (TOPIC.encode(), b"4"), (b"other", b"5")]
+    assert client.aliases == {TOPIC.encode(): 1, b"other": 2}
+    # publishes after the first carry an empty topic
+    bodies = [body for h, body in broker.packets if h & 0xF0 == 0x30]
+    assert bodies[1][:2] == b"\0\0"
+    client.disconnect()
+    broker.close()
+
+
+def test_client_limit_and_no_broker_support():
+    broker = Broker(alias_max=10)
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, version=5, topic_aliases=1)
+    client.connect()
+    client.publish("a", "1")
+    client.publish("b", "2")
+    client.publish("b", "3")
+    assert client.aliases == {b"a": 1}
+    client.disconnect()
+    broker.close()
+
+    broker = Broker() # no Topic Alias Maximum in the CONNACK
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, version=5)
+    client.connect()
+    client.publish("a", "1")
+    broker.wait_for(lambda: broker.publishes)
+    assert client.alias_max == 0 and client.aliases == {}
+    client.disconnect()
+    broker.close()
+
+
+def test_falls_back_to_3_1_1():
+    broker = Broker()
+    broker.v5 = False
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port, version=5, user="u", password="p")
+    client.connect(False)
+    assert client.version == 4
+    client.publish(TOPIC, "1")
+    broker.wait_for(lambda: broker.publishes)
+    assert [body[6] for body in broker.connects] == [5, 4]
+    client.disconnect()
+    broker.close()
+
+
+def test_reconnect_resets_aliases():
+    broker = Broker(alias_max=2)
+    client = RobustMQTTClient("dev", "127.0.0.1", port=broker.port, version=5, min_backoff=0)
+    client.connect()
+    client.publish("a", "1")
+    client.publish("a", "2")
+    broker.wait_for(lambda: len(broker.publishes) == 2)
+    broker.drop()
+    for _ in range(200):
+        client.poll()
+        if not client.connected:
+            break
+        time.sleep(0.005)
+    client.poll() # reconnects, min_backoff is 0
+    assert client.connected
+    client.publish("a", "3")
+    broker.wait_for(lambda: len(broker.publishes) == 3)
+    # the new connection's broker doesn't know alias 1, so the topic is sent
+    assert broker.publishes[-1][:2] == (b"a", b"3")
+    assert broker.packets[-1][1][:3] == b"\0\x01a"
+    client.disconnect()
+    broker.close()
+
+
+def test_bytes_per_publish():
+    n = 100
+    sizes = {}
+    for version, alias_max in ((4, 0), (5, 0), (5, 10)):
+        broker = Broker(alias_max=alias_max)
+        client = MQTTClient("dev", "127.0.0.1", port=broker.port, version=version)
+        client.connect()
+        sizes[version, alias_max] = publish_bytes(broker, client, n)
+        client.disconnect()
+        broker.close()
+    # 2 + 2 + 22 topic + 4 payload, plus a property length byte in 5
+    assert sizes[4, 0] == n * 30
+    assert sizes[5, 0] == n * 31
+    # the topic with its alias once (34), then 2 + 2 + 0 + 4 (alias
+    # property) + 4 payload
+    assert sizes[5, 10] == 34 + (n - 1) * 12
+    print("\nbytes per publish of %s: 3.1.1 %.1f, 5 %.1f, 5 with alias %.1f"
+          % (TOPIC, sizes[4, 0] / n, sizes[5, 0] / n, sizes[5, 10] / n))
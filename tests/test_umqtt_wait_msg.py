@@ -0,0 +1,94 @@
+# incoming messages are parsed in place in MQTTClient.rbuf. run with -s for
+# the timings.
+import time
+import tracemalloc
+
+from umqtt.simple import MQTTClient
+
+
+def publish_packet(topic, msg, qos=0, pid=1):
+    body = bytes([len(topic) >> 8, len(topic) & 0xFF]) + topic
+    if qos:
+        body += bytes([pid >> 8, pid & 0xFF])
+    return bytes([0x30 | qos << 1, len(body) + len(msg)]) + body + msg
+
+
+def subscribed(broker, callback, **kwargs):
+    client = MQTTClient("dev", "127.0.0.1", port=broker.port)
+    client.connect()
+    client.set_callback(callback, **kwargs)
+    client.subscribe("cmd")
+    return client
+
+
+def test_callback_gets_views_into_receive_buffer(broker):
+    got = []
+    client = subscribed(broker, lambda topic, msg: got.append((topic, msg, bytes(topic), bytes(msg))))
+    broker.send(publish_packet(b"cmd", b"relay on"))
+    client.wait_msg()
+    topic, msg, topic_bytes, msg_bytes = got[0]
+    assert isinstance(msg, memoryview) and msg.obj is client.rbuf
+    assert (topic_bytes, msg_bytes) == (b"cmd", b"relay on")
+    client.disconnect()
+
+
+def test_copy_gives_bytes(broker):
+    got = []
+    client = subscribed(broker, lambda topic, msg: got.append((topic, msg)), copy=True)
+    broker.send(publish_packet(b"cmd", b"one") + publish_packet(b"cmd", b"two"))
+    client.wait_msg()
+    client.wait_msg()
+    assert got == [(b"cmd", b"one"), (b"cmd", b"two")]
+    client.disconnect()
+
+
+def test_qos1_acked_and_qos2_delivered_once(broker):
+    got = []
+    client = subscribed(broker, lambda topic, msg: got.append(bytes(msg)))
+    broker.send(publish_packet(b"cmd", b"a", qos=1, pid=5))
+    broker.send(publish_packet(b"cmd", b"b", qos=2, pid=7) * 2 + b"\x62\x02\x00\x07")
+    for _ in range(4):
+        client.wait_msg()
+    assert got == [b"a", b"b"]
+    broker.wait_for(lambda: [h for h, _ in broker.packets if h in (0x40, 0x50, 0x70)] == [0x40, 0x50, 0x50, 0x70])
+    assert client.rcv_pids == set()
+    client.disconnect()
+
+
+def test_large_message_grows_buffer_once(broker):
+    got = []
+    client = subscribed(broker, lambda topic, msg: got.append(len(msg)))
+    packet = b"\x30\x8a\x02\x00\x03cmd" + b"x" * 261 # 266 byte body
+    broker.send(packet * 3)
+    client.wait_msg()
+    rbuf = client.rbuf
+    client.wait_msg()
+    client.wait_msg()
+    assert got == [261] * 3
+    assert client.rbuf is rbuf
+    client.disconnect()
+
+
+def test_no_allocations_kept_per_message(broker):
+    sizes = []
+    client = subscribed(broker, lambda topic, msg: sizes.append(len(msg)))
+    n = 500
+    broker.send(publish_packet(b"cmd", b"x" * 20) * n)
+    for _ in range(10):
+        client.wait_msg()
+    rbuf = client.rbuf
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for _ in range(n - 10):
+        client.wait_msg()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    kept = [s for s in after.compare_to(before, "filename")
+            if s.traceback[0].filename.endswith("simple.py") and s.size_diff > 0]
+    assert kept == []
+    assert client.rbuf is rbuf
+    assert len(sizes) == n
+    print("\nwait_msg: %d msgs/s, no memory kept by the parser" % ((n - 10) / elapsed))
+    client.disconnect()
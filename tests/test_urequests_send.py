@@ -0,0 +1,99 @@
+# requests go out with as few socket writes as possible: the head and a
+# small body in one, a streamed body in chunks packed into the buffer.
+# run with -s for the timings.
+import io
+import json
+import time
+
+import sensorlab
+import urequests
+import usocket
+
+
+def post(session, url, **kwargs):
+    usocket.COUNT["writes"] = 0
+    session.post(url, **kwargs).close()
+    return usocket.COUNT["writes"]
+
+
+def test_small_body_one_write(http_server):
+    session = urequests.Session()
+    body = '[{"variable":"t","value":1}]'
+    assert post(session, http_server.url + "/v", headers={"device-token": "abc"}, data=body) == 1
+    method, path, headers, received = http_server.requests[-1]
+    assert received == body.encode()
+    assert headers["Content-Length"] == str(len(body))
+    assert headers["device-token"] == "abc"
+    session.close()
+
+
+def test_body_up_to_merge_limit_one_write(http_server):
+    session = urequests.Session()
+    assert post(session, http_server.url + "/v", data="x" * 800) == 1
+    assert post(session, http_server.url + "/v", data="x" * 3000) == 2
+    assert http_server.requests[-1][3] == b"x" * 3000
+    session.close()
+
+
+def test_generator_body_chunked(http_server):
+    session = urequests.Session()
+
+    def pieces():
+        for i in range(200):
+            yield '{"v":%d},' % i
+
+    writes = post(session, http_server.url + "/v", data=pieces())
+    expected = "".join('{"v":%d},' % i for i in range(200)).encode()
+    assert http_server.requests[-1][2]["Transfer-Encoding"] == "chunked"
+    assert http_server.requests[-1][3] == expected
+    # small pieces share chunks filling the buffer, not a write each
+    assert writes <= 1 + -(-len(expected) // (len(urequests._buf) - 15))
+    session.close()
+
+
+def test_file_and_large_piece_bodies(http_server):
+    session = urequests.Session()
+    post(session, http_server.url + "/v", data=io.BytesIO(b"z" * 1000))
+    assert http_server.requests[-1][3] == b"z" * 1000
+    post(session, http_server.url + "/v", data=["[", "x" * 600, ",", "y", "]"])
+    assert http_server.requests[-1][3] == b"[" + b"x" * 600 + b",y]"
+    post(session, http_server.url + "/v", data="ünï")
+    assert http_server.requests[-1][3] == "ünï".encode()
+    session.close()
+
+
+def test_http_sink_posts_batch_in_one_write(http_server):
+    sink = sensorlab.HTTPSink(http_server.url + "/api/v1.6/devices/dev", {"X-Auth-Token": "t"},
+                              (("temperature", "C"), None, ("humidity", "%")))
+    batch = [sink.serialize((20 + i, 1000, 40 + i)) for i in range(5)]
+    usocket.COUNT["writes"] = 0
+    sink.send(batch)
+    assert usocket.COUNT["writes"] == 1
+    method, path, headers, body = http_server.requests[-1]
+    assert headers["Content-Type"] == "application/json"
+    assert int(headers["Content-Length"]) == len(body)
+    assert json.loads(body) == [item for i in range(5) for item in (
+        {"variable": "temperature", "value": 20 + i, "unit": "C"},
+        {"variable": "humidity", "value": 40 + i, "unit": "%"})]
+    # past _merge_limit the body follows the head in a second write, on the
+    # same connection
+    usocket.COUNT["writes"] = 0
+    sink.send(batch * 4)
+    assert usocket.COUNT["writes"] == 2
+    assert len(json.loads(http_server.requests[-1][3])) == 40
+    assert usocket.COUNT["connects"] == 1
+    sink.session.close()
+
+
+def test_send_rate(http_server):
+    session = urequests.Session()
+    body = '[{"variable":"t","value":1}]'
+    n = 200
+    usocket.COUNT["writes"] = 0
+    start = time.perf_counter()
+    for _ in range(n):
+        session.post(http_server.url + "/v", data=body).close()
+    elapsed = time.perf_counter() - start
+    assert usocket.COUNT["writes"] == n
+    print("\n%d posts: %.2f ms each, 1 write each" % (n, elapsed * 1000 / n))
+    session.close()
@@ -0,0 +1,92 @@
+# urequests.Session keeps one connection per host open between requests.
+# run with -s for the timings.
+import time
+
+import urequests
+import usocket
+
+
+def test_100_posts_one_connection(http_server):
+    session = urequests.Session()
+    start = time.perf_counter()
+    for i in range(100):
+        r = session.post(http_server.url + "/v/data", headers={"device-token": "x"},
+                         json=[{"variable": "t", "value": i}])
+        assert r.status_code == 202
+        r.close()
+    elapsed = time.perf_counter() - start
+    assert usocket.COUNT["connects"] == 1
+    assert len(http_server.connections) == 1
+    assert http_server.requests[-1][3] == b'[{"variable":"t","value":99}]'
+    session.close()
+
+    start = time.perf_counter()
+    for i in range(100):
+        urequests.post(http_server.url + "/v/data", json=[{"variable": "t", "value": i}]).close()
+    plain = time.perf_counter() - start
+    assert usocket.COUNT["connects"] == 101
+    print("\n100 posts: session %.1f ms, 1 connect; without %.1f ms, 100 connects"
+          % (elapsed * 1000, plain * 1000))
+
+
+def test_content_read_releases_connection(http_server):
+    session = urequests.Session()
+    r = session.post(http_server.url + "/v")
+    assert r.json() == {"status": True}
+    assert len(session._idle) == 1
+    r = session.post(http_server.url + "/chunked", data="x")
+    assert r.content == b"hello!!!"
+    r = session.post(http_server.url + "/v", data="y")
+    r.close()
+    assert usocket.COUNT["connects"] == 1
+    session.close()
+
+
+def test_unread_response_is_not_reused(http_server):
+    session = urequests.Session()
+    r = session.post(http_server.url + "/v") # body left unread
+    session.post(http_server.url + "/v").close()
+    assert usocket.COUNT["connects"] == 2
+    r.close()
+    session.close()
+
+
+def test_connection_close_honoured(http_server):
+    session = urequests.Session()
+    r = session.post(http_server.url + "/close", data="x")
+    assert (r.status_code, r.text) == (201, "ok")
+    assert session._idle == {}
+    session.post(http_server.url + "/v").close()
+    assert usocket.COUNT["connects"] == 2
+    session.close()
+
+
+def test_stale_connection_retried_once(http_server):
+    session = urequests.Session()
+    session.post(http_server.url + "/drop", data="d").close()
+    time.sleep(0.05) # the server closes its end
+    r = session.post(http_server.url + "/v", data="after drop")
+    assert r.status_code == 202
+    r.close()
+    assert usocket.COUNT["connects"] == 2
+    assert http_server.requests[-1][3] == b"after drop"
+    session.close()
+
+
+def test_stale_connection_with_generator_body_raises(http_server):
+    session = urequests.Session()
+    session.post(http_server.url + "/drop", data="d").close()
+    time.sleep(0.05)
+
+    def body():
+        yield "a"
+        yield "b"
+
+    try:
+        session.post(http_server.url + "/v", data=body()).close()
+    except OSError:
+        pass # already partly consumed, can't be sent again
+    else:
+        # the write went into the socket buffer before the close was seen
+        assert http_server.requests[-1][3] == b"ab"
+    session.close()